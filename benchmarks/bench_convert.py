@@ -0,0 +1,85 @@
+"""Micro-benchmark of NotionRowConverter throughput.
+
+Converts in-memory rows against a fake Notion DB schema, so no network
+access or token is required. Date columns are benchmarked separately,
+since date parsing takes most of the time when they are present.
+
+Usage: python benchmarks/bench_convert.py [ROWS] [REPEAT]
+"""
+
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from csv2notion.cli_args import parse_args
+from csv2notion.notion_convert import NotionRowConverter
+from csv2notion.utils_static import ConversionRules
+
+PLAIN_COLUMNS = {
+    "title": ("title", "row"),
+    "text": ("text", "some text"),
+    "number": ("number", "42"),
+    "checkbox": ("checkbox", "true"),
+    "tags": ("multi_select", "a, b, c"),
+    "url": ("url", "https://example.com"),
+    "email": ("email", "test@example.com"),
+    "select": ("select", "option"),
+}
+
+DATE_COLUMNS = {
+    **PLAIN_COLUMNS,
+    "date": ("date", "2022-01-01"),
+    "created": ("created_time", "2022-01-01 10:00"),
+    "edited": ("last_edited_time", "2022-01-02 10:00"),
+}
+
+ColumnsType = Dict[str, Tuple[str, str]]
+
+
+def make_rows(columns: ColumnsType, rows_count: int) -> List[Dict[str, str]]:
+    return [
+        {name: col_value for name, (_, col_value) in columns.items()}
+        for _ in range(rows_count)
+    ]
+
+
+def make_converter(columns: ColumnsType) -> NotionRowConverter:
+    args = parse_args(["--token", "x", str(Path("bench.csv"))])
+    rules = ConversionRules.from_args(args)
+
+    db: Any = SimpleNamespace(
+        columns={name: {"type": col_type} for name, (col_type, _) in columns.items()}
+    )
+
+    return NotionRowConverter(db, rules)
+
+
+def bench(columns: ColumnsType, rows_count: int, repeat: int) -> float:
+    best = float("inf")
+
+    for _ in range(repeat):
+        rows = make_rows(columns, rows_count)
+        converter = make_converter(columns)
+
+        start = time.perf_counter()
+        for _ in converter.iter_notion_rows(rows):  # type: ignore
+            pass  # noqa: WPS420
+        best = min(best, time.perf_counter() - start)
+
+    return rows_count / best
+
+
+def main() -> None:
+    rows_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    for name, columns in (("plain", PLAIN_COLUMNS), ("dates", DATE_COLUMNS)):
+        rows_per_sec = bench(columns, rows_count, repeat)
+
+        print(f"{name}: {rows_per_sec:,.0f} rows/sec")  # noqa: WPS421
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""Benchmark of every csv2notion stage against a fake Notion server.
+
+Generates a synthetic CSV and measures reading it, guessing column types,
+preparing Notion DB, converting and uploading rows. Notion API is served
+by the in-process fake server used in tests, so no network access
+or token is required.
+
+Results are compared with stored baselines (benchmarks/baselines.json),
+the run fails if any stage got slower or makes more API calls per row,
+or if a scenario uses more memory than the baseline allows.
+Baselines are only compared with runs using the same parameters.
+Every scenario runs in a separate process, so its peak memory
+is not affected by other scenarios. Client side request rate limit
+of Notion SDK is disabled, so upload is limited by csv2notion only.
+
+Usage: python benchmarks/bench_pipeline.py [--rows N] [--scenario NAME]
+       [--latency SECONDS] [--max-threads N] [--batch-size N] [--save-baseline]
+"""
+
+import argparse
+import csv
+import inspect
+import json
+import random
+import sys
+import tempfile
+import time
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from unittest.mock import patch
+
+from notion.client import NotionClient
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# fake Notion server lives with the tests
+sys.path.insert(0, str(ROOT_DIR))
+
+from csv2notion.cli_args import parse_args  # noqa: E402
+from csv2notion.cli_steps import (  # noqa: E402
+    convert_csv_to_notion_rows,
+    prepare_csv_data,
+    upload_rows,
+)
+from csv2notion.csv_data import CSVData, csv_read  # noqa: E402
+from csv2notion.notion_db import (  # noqa: E402
+    NotionDB,
+    get_notion_client,
+    notion_db_from_csv,
+)
+from csv2notion.notion_db_client import NotionClientExtended  # noqa: E402
+from tests.fixtures.fake_notion_server import FakeNotionServer  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None  # type: ignore
+
+BASELINES_FILE = ROOT_DIR / "benchmarks" / "baselines.json"
+
+# allowed deviation from baseline before the stage is flagged
+SPEED_TOLERANCE = 0.3
+RSS_TOLERANCE = 0.5
+API_CALLS_TOLERANCE = 0.05
+
+# stages faster than this are too noisy to compare throughput
+MIN_TIMED_SECONDS = 0.05
+
+RELATION_ROWS = 50
+FILES_COUNT = 10
+
+# column name -> (Notion type, value generator), file columns hold file names
+ColumnGenerator = Callable[[random.Random, int], str]
+Scenario = Dict[str, Tuple[str, ColumnGenerator]]
+
+PLAIN_SCENARIO: Scenario = {
+    "name": ("title", lambda rnd, i: f"row {i}"),
+    "text": ("text", lambda rnd, i: f"text {rnd.randint(0, 10 ** 6)}"),
+    "number": ("number", lambda rnd, i: str(rnd.randint(0, 1000))),
+    "checkbox": ("checkbox", lambda rnd, i: rnd.choice(["true", "false"])),
+    "select": ("select", lambda rnd, i: f"option {rnd.randint(0, 20)}"),
+    "tags": (
+        "multi_select",
+        lambda rnd, i: ", ".join(f"tag {t}" for t in rnd.sample(range(50), 3)),
+    ),
+}
+
+MIXED_SCENARIO: Scenario = {
+    **PLAIN_SCENARIO,
+    "date": (
+        "date",
+        lambda rnd, i: f"2022-{rnd.randint(1, 12):02}-{rnd.randint(1, 28):02}",
+    ),
+    "person": ("person", lambda rnd, i: "fake@example.com"),
+    "relation": (
+        "relation",
+        lambda rnd, i: f"related {rnd.randint(0, RELATION_ROWS - 1)}",
+    ),
+    "file": ("file", lambda rnd, i: f"{rnd.randint(0, FILES_COUNT - 1)}.txt"),
+}
+
+SCENARIOS = {"plain": PLAIN_SCENARIO, "mixed": MIXED_SCENARIO}
+
+StageResult = Dict[str, float]
+ScenarioResult = Dict[str, Any]
+
+
+def generate_csv(
+    csv_file: Path, scenario: Scenario, rows_count: int, seed: int = 0
+) -> None:
+    """Write synthetic CSV, with local files for file columns next to it"""
+
+    rnd = random.Random(seed)
+
+    files_dir = csv_file.parent / "files"
+    files_dir.mkdir(exist_ok=True)
+    for file_index in range(FILES_COUNT):
+        (files_dir / f"{file_index}.txt").write_text(f"file {file_index}\n" * 100)
+
+    with open(csv_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(scenario.keys())
+
+        for i in range(rows_count):
+            writer.writerow(
+                files_dir / gen(rnd, i) if col_type == "file" else gen(rnd, i)
+                for col_type, gen in scenario.values()
+            )
+
+
+def make_database(
+    client: NotionClientExtended, csv_data: CSVData, scenario: Scenario
+) -> str:
+    """Create Notion DB with scenario column types, relation target included"""
+
+    _, collection_id = notion_db_from_csv(client, "bench", csv_data)
+    notion_db = NotionDB(client, collection_id)
+
+    for column in notion_db.collection.get_schema_properties():
+        col_type = scenario[column["name"]][0]
+
+        if col_type == "relation":
+            relation_id = _make_relation_target(client, csv_data.csv_file.parent)
+            notion_db.collection.set(
+                f"schema.{column['id']}",
+                {
+                    "name": column["name"],
+                    "type": "relation",
+                    "collection_id": relation_id,
+                },
+            )
+
+    return collection_id
+
+
+def run_stages(  # noqa: WPS210
+    server: FakeNotionServer, csv_file: Path, scenario: Scenario, args: Namespace
+) -> Dict[str, StageResult]:
+    column_types = [col_type for col_type, _ in list(scenario.values())[1:]]
+    rows_count = len(csv_read(csv_file, False))
+
+    results = {}
+
+    def measure(stage: str, func: Callable[[], Any]) -> Any:
+        calls_before = sum(server.requests.values())
+        rss_before = _peak_rss_mb()
+
+        time_start = time.perf_counter()
+        stage_result = func()
+        elapsed = time.perf_counter() - time_start
+
+        api_calls = sum(server.requests.values()) - calls_before
+
+        results[stage] = {
+            "seconds": elapsed,
+            "rows_per_sec": rows_count / max(elapsed, 1e-9),
+            # peak RSS is a high-water mark, only its growth is due to the stage
+            "rss_growth_mb": _peak_rss_mb() - rss_before,
+            "api_calls_per_row": api_calls / rows_count,
+        }
+        return stage_result
+
+    measure("csv_read", lambda: csv_read(csv_file, False))
+
+    csv_data = CSVData(csv_file, column_types=column_types)
+    measure("column_types", csv_data._guess_column_types)  # noqa: WPS437
+
+    client = get_notion_client("fake_token", api_base_url=server.api_url)
+    collection_id = make_database(client, csv_data, scenario)
+    notion_db = NotionDB(client, collection_id)
+
+    measure("prepare", lambda: prepare_csv_data(csv_data, notion_db, args))
+
+    notion_rows = measure(
+        "convert", lambda: list(convert_csv_to_notion_rows(csv_data, notion_db, args))
+    )
+
+    measure(
+        "upload",
+        lambda: upload_rows(
+            notion_rows,
+            client=client,
+            collection_id=collection_id,
+            is_merge=False,
+            max_threads=args.max_threads,
+            total=rows_count,
+            batch_size=args.batch_size,
+        ),
+    )
+
+    return results
+
+
+def find_regressions(result: ScenarioResult, baseline: ScenarioResult) -> List[str]:
+    regressions = []
+
+    max_rss = baseline["peak_rss_mb"] * (1 + RSS_TOLERANCE)
+    if result["peak_rss_mb"] > max_rss:
+        regressions.append(f"peak_rss_mb {result['peak_rss_mb']:,.2f}")
+
+    for stage, stage_result in result["stages"].items():
+        stage_baseline = baseline["stages"].get(stage)
+        if stage_baseline is None:
+            continue
+
+        min_speed = stage_baseline["rows_per_sec"] * (1 - SPEED_TOLERANCE)
+        is_timed = stage_baseline["seconds"] >= MIN_TIMED_SECONDS
+        if is_timed and stage_result["rows_per_sec"] < min_speed:
+            regressions.append(
+                f"{stage}: rows_per_sec {stage_result['rows_per_sec']:,.1f}"
+            )
+
+        max_api_calls = stage_baseline["api_calls_per_row"] * (1 + API_CALLS_TOLERANCE)
+        if stage_result["api_calls_per_row"] > max_api_calls:
+            regressions.append(
+                f"{stage}: api_calls_per_row {stage_result['api_calls_per_row']:,.2f}"
+            )
+
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark csv2notion stages")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--scenario", choices=list(SCENARIOS), action="append")
+    parser.add_argument(
+        "--latency", type=float, default=0, help="fake server latency, seconds"
+    )
+    parser.add_argument("--max-threads", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"store results as new baseline in {BASELINES_FILE.name}",
+    )
+    bench_args = parser.parse_args()
+
+    baselines = _load_baselines()
+    has_regressions = False
+
+    for scenario_name in bench_args.scenario or list(SCENARIOS):
+        result = _run_scenario_process(scenario_name, bench_args)
+
+        _print_result(scenario_name, result)
+
+        if bench_args.save_baseline:
+            baselines[scenario_name] = result
+            continue
+
+        baseline = baselines.get(scenario_name)
+        if baseline is None:
+            continue
+
+        # API calls include fixed per run calls, so per row values depend on rows
+        if baseline["params"] != result["params"]:
+            print(  # noqa: WPS421
+                f"ERROR {scenario_name}: baseline was saved with"
+                f" {baseline['params']}, not comparable with {result['params']}"
+            )
+            has_regressions = True
+            continue
+
+        regressions = find_regressions(result, baseline)
+        for regression in regressions:
+            print(f"REGRESSION {scenario_name} {regression}")  # noqa: WPS421
+        has_regressions = has_regressions or bool(regressions)
+
+    if bench_args.save_baseline:
+        BASELINES_FILE.write_text(
+            json.dumps(baselines, indent=2, sort_keys=True) + "\n"
+        )
+
+    if has_regressions:
+        sys.exit(1)
+
+
+def _run_scenario_process(scenario_name: str, bench_args: Namespace) -> ScenarioResult:
+    # spawned, so that peak RSS is measured from a fresh process
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_run_scenario, scenario_name, bench_args).result()
+
+
+def _run_scenario(scenario_name: str, bench_args: Namespace) -> ScenarioResult:
+    scenario = SCENARIOS[scenario_name]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file = Path(tmp_dir) / f"{scenario_name}.csv"
+        generate_csv(csv_file, scenario, bench_args.rows)
+
+        args = parse_args(
+            [
+                "--token",
+                "fake_token",
+                f"--max-threads={bench_args.max_threads}",
+                f"--batch-size={bench_args.batch_size}",
+                str(csv_file),
+            ]
+        )
+
+        # SDK caps requests at 50 per second, which would be measured instead
+        sdk_post = inspect.unwrap(NotionClient.post)
+
+        with patch.object(NotionClient, "post", sdk_post):
+            with FakeNotionServer(latency=bench_args.latency) as server:
+                stages = run_stages(server, csv_file, scenario, args)
+
+    return {
+        "params": {
+            "rows": bench_args.rows,
+            "latency": bench_args.latency,
+            "max_threads": bench_args.max_threads,
+            "batch_size": bench_args.batch_size,
+        },
+        "peak_rss_mb": _peak_rss_mb(),
+        "stages": stages,
+    }
+
+
+def _make_relation_target(client: NotionClientExtended, tmp_dir: Path) -> str:
+    relation_file = tmp_dir / "relation.csv"
+    relation_file.write_text("name\nrelated\n")
+
+    _, relation_id = notion_db_from_csv(client, "relation", CSVData(relation_file))
+    relation_db = NotionDB(client, relation_id)
+
+    for i in range(RELATION_ROWS):
+        relation_db.add_row_key(f"related {i}")
+
+    return relation_id
+
+
+def _peak_rss_mb() -> float:
+    # not available on Windows
+    if resource is None:
+        return 0  # type: ignore[unreachable]
+
+    # kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _load_baselines() -> Dict[str, ScenarioResult]:
+    try:
+        return dict(json.loads(BASELINES_FILE.read_text()))
+    except FileNotFoundError:
+        return {}
+
+
+def _print_result(scenario_name: str, result: ScenarioResult) -> None:
+    print(  # noqa: WPS421
+        f"{scenario_name}: {result['peak_rss_mb']:,.1f} MB peak RSS, {result['params']}"
+    )
+
+    for stage, stage_result in result["stages"].items():
+        print(  # noqa: WPS421
+            f"  {stage:<14}"
+            f"{stage_result['rows_per_sec']:>12,.0f} rows/sec"
+            f"{stage_result['rss_growth_mb']:>+10,.1f} MB peak RSS"
+            f"{stage_result['api_calls_per_row']:>8,.2f} API calls/row"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,30 @@ import logging
 import os
 import signal
 import sys
+from functools import partial
 from pathlib import Path
 from typing import Any, Optional
 
 from csv2notion.cli_args import parse_args
-from csv2notion.cli_steps import convert_csv_to_notion_rows, new_database, upload_rows
-from csv2notion.csv_data import CSVData
-from csv2notion.notion_db import get_collection_id, get_notion_client
+from csv2notion.cli_steps import (
+    convert_csv_to_notion_rows,
+    make_file_manifest,
+    make_notion_client,
+    make_sync_state,
+    make_upload_journal,
+    new_database,
+    prefetch_row_keys,
+    prepare_csv_data,
+    save_metadata_cache,
+    start_sync_state,
+    upload_rows,
+    upload_rows_sharded,
+    upload_total,
+)
+from csv2notion.csv_data import CSVData, StreamingCSVData
+from csv2notion.notion_db import NotionDB, get_collection_id
 from csv2notion.utils_exceptions import CriticalError, NotionError
+from csv2notion.utils_file import file_hash_cache
 
 logger = logging.getLogger(__name__)
 
@@ -19,36 +35,100 @@ def cli(*argv: str) -> None:
 
     setup_logging(is_verbose=args.verbose, log_file=args.log)
 
+    if args.hash_cache:
+        file_hash_cache.load(args.hash_cache)
+
     logger.info("Validating CSV & Notion DB schema")
 
-    csv_data = CSVData(
-        args.csv_file, args.column_types, args.fail_on_duplicate_csv_columns
+    csv_data_class = StreamingCSVData if args.stream else CSVData
+    csv_data = csv_data_class(
+        args.csv_file,
+        args.column_types,
+        args.fail_on_duplicate_csv_columns,
+        args.type_sample_rows,
     )
 
     if not csv_data:
         raise CriticalError("CSV file is empty")
 
-    client = get_notion_client(
-        args.token,
-        is_randomize_select_colors=args.randomize_select_colors,
-    )
+    client = make_notion_client(args)
+
+    journal = make_upload_journal(args)
+
+    sync_state = make_sync_state(args)
 
     if args.url:
         collection_id = get_collection_id(client, args.url)
+    elif journal is not None and journal.collection_id:
+        logger.info("Resuming upload into database created before")
+        collection_id = journal.collection_id
     else:
         collection_id = new_database(args, client, csv_data)
 
-    notion_rows = convert_csv_to_notion_rows(csv_data, client, collection_id, args)
+    if journal is not None:
+        journal.start(collection_id)
+
+        if journal:
+            logger.info(f"Skipping {len(journal)} rows uploaded before")
+
+    if args.merge and args.merge_prefetch_keys:
+        prefetch_row_keys(client, collection_id, csv_data, csv_data.key_column)
+
+    notion_db = NotionDB(client, collection_id)
+
+    prepare_csv_data(csv_data, notion_db, args)
+
+    file_manifest = make_file_manifest(csv_data, notion_db, args)
+
+    if sync_state is not None:
+        start_sync_state(sync_state, collection_id, csv_data, notion_db, args)
 
     logger.info("Uploading {0}...".format(args.csv_file.name))
 
-    upload_rows(
-        notion_rows,
-        client=client,
-        collection_id=collection_id,
-        is_merge=args.merge,
-        max_threads=args.max_threads,
-    )
+    if args.processes > 1:
+        upload_rows_sharded(
+            args,
+            csv_data,
+            collection_id,
+            total=upload_total(csv_data, journal, sync_state),
+            initializer=partial(setup_logging, args.verbose, args.log),
+            file_manifest=file_manifest,
+            sync_state=sync_state,
+            metadata_cache=client.options.get("metadata_cache"),
+        )
+    else:
+        notion_rows = convert_csv_to_notion_rows(
+            csv_data,
+            notion_db,
+            args,
+            journal,
+            file_manifest=file_manifest,
+            sync_state=sync_state,
+        )
+
+        upload_rows(
+            notion_rows,
+            client=client,
+            collection_id=collection_id,
+            is_merge=args.merge,
+            max_threads=args.max_threads,
+            total=upload_total(csv_data, journal, sync_state),
+            batch_size=args.batch_size,
+            journal=journal,
+            engine=args.engine,
+        )
+
+    if journal is not None:
+        journal.remove()
+
+    if sync_state is not None:
+        logger.info(f"Skipped {sync_state.skipped} unchanged rows")
+        sync_state.save()
+
+    if args.hash_cache:
+        file_hash_cache.save(args.hash_cache)
+
+    save_metadata_cache(notion_db)
 
     logger.info("Done!")
 
@@ -2,7 +2,10 @@ import argparse
 from pathlib import Path
 from typing import Any, Dict, List, Sequence, Tuple, Union
 
+from notion.settings import API_BASE_URL
+
 from csv2notion.notion_convert_map import map_icon
+from csv2notion.notion_metadata_cache import DEFAULT_TTL
 from csv2notion.utils_exceptions import CriticalError
 from csv2notion.utils_static import ALLOWED_TYPES, FileType
 from csv2notion.utils_str import split_str
@@ -51,6 +54,37 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
                 "help": "upload threads (default: 5)",
                 "metavar": "NUMBER",
             },
+            "--processes": {
+                "type": lambda x: max(int(x), 1),
+                "default": 1,
+                "help": (
+                    "split CSV rows by key between NUMBER processes,"
+                    " each with its own"
+                    "\n--max-threads upload threads (default: 1)"
+                ),
+                "metavar": "NUMBER",
+            },
+            "--engine": {
+                "choices": ["threads", "async"],
+                "default": "threads",
+                "help": (
+                    "upload engine (default: threads);"
+                    "\nasync engine keeps up to --max-threads requests in flight"
+                    " using a single local copy of Notion DB"
+                ),
+            },
+            "--adaptive-threads": {
+                "action": "store_true",
+                "help": (
+                    "adjust number of upload threads to server load,"
+                    "\nusing --max-threads as the upper limit"
+                ),
+            },
+            "--api-url": {
+                # Notion API base URL, used to run against a fake server in tests
+                "default": API_BASE_URL,
+                "help": argparse.SUPPRESS,
+            },
             "--log": {
                 "type": Path,
                 "metavar": "FILE",
@@ -112,6 +146,13 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
                 "metavar": "COLUMN",
                 "default": [],
             },
+            "--merge-skip-unchanged": {
+                "action": "store_true",
+                "help": (
+                    "compare CSV values with existing Notion DB rows during merge"
+                    "\nand only update values that have changed"
+                ),
+            },
             "--merge-skip-new": {
                 "action": "store_true",
                 "help": (
@@ -119,6 +160,23 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
                     " during merge"
                 ),
             },
+            "--merge-prefetch-keys": {
+                "action": "store_true",
+                "help": (
+                    "fetch only Notion DB rows with keys found in CSV"
+                    " instead of all rows;"
+                    "\nfaster when merging small CSV into large Notion DB"
+                ),
+            },
+            "--sync-state": {
+                "type": Path,
+                "metavar": "FILE",
+                "help": (
+                    "file to keep fingerprints of merged rows between runs;"
+                    "\nonly rows that changed in CSV since last run are uploaded,"
+                    "\nchanges made in Notion are not detected"
+                ),
+            },
         },
         "relations options": {
             "--add-missing-relations": {
@@ -252,6 +310,123 @@ def parse_args(argv: Sequence[str]) -> argparse.Namespace:
                 ),
             },
         },
+        "performance options": {
+            "--stream": {
+                "action": "store_true",
+                "help": (
+                    "read CSV file row by row instead of loading it into memory;"
+                    "\nrows are converted while they are being uploaded"
+                ),
+            },
+            "--type-sample-rows": {
+                "type": lambda x: max(int(x), 0),
+                "default": 0,
+                "help": (
+                    "guess column types from the first NUMBER rows only"
+                    " (default: 0, all rows)"
+                ),
+                "metavar": "NUMBER",
+            },
+            "--resume": {
+                "action": "store_true",
+                "help": (
+                    "keep a journal of uploaded rows next to CSV file;"
+                    "\nif upload is interrupted, run the same command again"
+                    " to upload only the remaining rows"
+                ),
+            },
+            "--register-select-options": {
+                "action": "store_true",
+                "help": (
+                    "add all new select and multi-select options to Notion DB"
+                    " in a single"
+                    "\nschema update before upload, instead of one update"
+                    " per new option"
+                ),
+            },
+            "--batch-size": {
+                "type": lambda x: max(int(x), 1),
+                "default": 1,
+                "help": (
+                    "number of new rows to create in a single transaction"
+                    " (default: 1);"
+                    "\nrows with local files are always created one by one"
+                ),
+                "metavar": "NUMBER",
+            },
+            "--reuse-uploads": {
+                "action": "store_true",
+                "help": (
+                    "upload files with identical content only once"
+                    " and reuse their Notion URL"
+                ),
+            },
+            "--upload-cache": {
+                "type": Path,
+                "metavar": "FILE",
+                "help": (
+                    "file to keep uploaded file URLs between runs;"
+                    "\nimplies --reuse-uploads"
+                ),
+            },
+            "--hash-cache": {
+                "type": Path,
+                "metavar": "FILE",
+                "help": (
+                    "file to keep SHA-256 of local files between runs;"
+                    "\nfiles are rehashed only if their size or modification time"
+                    " changes"
+                ),
+            },
+            "--preflight-files": {
+                "action": "store_true",
+                "help": (
+                    "check and hash all local files referenced by CSV in parallel"
+                    " before upload;"
+                    "\nmissing and not allowed files are reported all at once"
+                ),
+            },
+            "--file-upload-threads": {
+                "type": lambda x: max(int(x), 0),
+                "default": 0,
+                "help": (
+                    "upload local files of rows in NUMBER background threads,"
+                    " shared by"
+                    "\nall upload threads (default: 0, upload files one by one)"
+                ),
+                "metavar": "NUMBER",
+            },
+            "--metadata-cache": {
+                "type": Path,
+                "metavar": "FILE",
+                "help": (
+                    "file to keep Notion DB schema, workspace users"
+                    " and relation DB row keys"
+                    "\nbetween runs; cached records are revalidated"
+                    " with a single request"
+                ),
+            },
+            "--metadata-cache-ttl": {
+                "type": lambda x: max(float(x), 0),
+                "default": DEFAULT_TTL,
+                "help": (
+                    "seconds to keep entries in --metadata-cache"
+                    f" (default: {DEFAULT_TTL})"
+                ),
+                "metavar": "SECONDS",
+            },
+            "--pipeline-size": {
+                "type": lambda x: max(int(x), 0),
+                "default": 0,
+                "help": (
+                    "convert rows in a separate thread while uploading,"
+                    " keeping at most NUMBER"
+                    "\nconverted rows ahead of upload (default: 0, convert all rows"
+                    " before upload)"
+                ),
+                "metavar": "NUMBER",
+            },
+        },
     }
 
     _parse_schema(parser, schema)
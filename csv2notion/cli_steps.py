@@ -1,22 +1,49 @@
 import logging
 from argparse import Namespace
+from dataclasses import dataclass
 from functools import partial
-from typing import List
+from typing import Any, Callable, Dict, Iterable, Optional
 
+from notion.store import Missing
 from tqdm import tqdm
 
-from csv2notion.csv_data import CSVData
+from csv2notion.csv_data import CSVData, CSVRowType
 from csv2notion.notion_convert import NotionRowConverter
-from csv2notion.notion_db import NotionDB, notion_db_from_csv
+from csv2notion.notion_db import NotionDB, get_notion_client, notion_db_from_csv
 from csv2notion.notion_db_client import NotionClientExtended
+from csv2notion.notion_file_manifest import FileManifest, build_file_manifest
+from csv2notion.notion_metadata_cache import MetadataCache
 from csv2notion.notion_preparator import NotionPreparator
+from csv2notion.notion_sync_state import SyncState
+from csv2notion.notion_upload_cache import UploadCache
+from csv2notion.notion_upload_journal import UploadJournal
+from csv2notion.notion_upload_pool import FileUploadPool
 from csv2notion.notion_uploader import NotionUploadRow
+from csv2notion.utils_async import AsyncRowUploader
+from csv2notion.utils_exceptions import CriticalError
+from csv2notion.utils_file import FileKey, file_hash_cache
+from csv2notion.utils_process import Shard, process_shards
 from csv2notion.utils_static import ConversionRules
-from csv2notion.utils_threading import ThreadRowUploader, process_iter
+from csv2notion.utils_threading import (
+    ThreadRowUploader,
+    chunk_iter,
+    prefetch_iter,
+    process_iter,
+)
+from csv2notion.utils_throttle import AdaptiveThrottle
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass
+class ShardResult(object):
+    """State collected by worker process, to be saved by the parent process"""
+
+    hashes: Dict[FileKey, str]
+    sync_state: Optional[SyncState] = None
+    metadata_cache: Optional[MetadataCache] = None
+
+
 def new_database(
     args: Namespace, client: NotionClientExtended, csv_data: CSVData
 ) -> str:
@@ -42,36 +69,362 @@ def new_database(
     return collection_id
 
 
-def convert_csv_to_notion_rows(
-    csv_data: CSVData, client: NotionClientExtended, collection_id: str, args: Namespace
-) -> List[NotionUploadRow]:
-    notion_db = NotionDB(client, collection_id)
+def make_upload_cache(args: Namespace) -> Optional[UploadCache]:
+    if not (args.reuse_uploads or args.upload_cache):
+        return None
+
+    upload_cache = UploadCache(args.upload_cache)
+
+    if upload_cache:
+        logger.info(f"Loaded {len(upload_cache)} uploaded files from cache")
+
+    return upload_cache
+
+
+def make_throttle(args: Namespace) -> Optional[AdaptiveThrottle]:
+    if not args.adaptive_threads:
+        return None
+
+    return AdaptiveThrottle(max_limit=args.max_threads)
+
+
+def make_upload_pool(args: Namespace) -> Optional[FileUploadPool]:
+    if not args.file_upload_threads:
+        return None
+
+    return FileUploadPool(max_workers=args.file_upload_threads)
+
+
+def make_upload_journal(args: Namespace) -> Optional[UploadJournal]:
+    if not args.resume:
+        return None
+
+    journal_file = args.csv_file.with_name(f"{args.csv_file.name}.journal")
+
+    return UploadJournal(journal_file)
+
+
+def make_sync_state(args: Namespace) -> Optional[SyncState]:
+    if not args.sync_state:
+        return None
+
+    if not args.merge:
+        raise CriticalError("--sync-state can only be used with --merge")
+
+    return SyncState(args.sync_state)
+
+
+def start_sync_state(
+    sync_state: SyncState,
+    collection_id: str,
+    csv_data: CSVData,
+    notion_db: NotionDB,
+    args: Namespace,
+) -> None:
+    sync_state.start(
+        collection_id, csv_data, notion_db, ConversionRules.from_args(args)
+    )
+
+    if sync_state:
+        logger.info(f"Loaded {len(sync_state)} row fingerprints from last sync")
+
+
+def make_metadata_cache(args: Namespace) -> Optional[MetadataCache]:
+    if not args.metadata_cache:
+        return None
+
+    return MetadataCache(args.metadata_cache, ttl=args.metadata_cache_ttl)
+
+
+def make_notion_client(args: Namespace) -> NotionClientExtended:
+    metadata_cache = make_metadata_cache(args)
+
+    client = get_notion_client(
+        args.token,
+        api_base_url=args.api_url,
+        is_randomize_select_colors=args.randomize_select_colors,
+        is_merge_skip_unchanged=args.merge_skip_unchanged,
+        upload_cache=make_upload_cache(args),
+        upload_pool=make_upload_pool(args),
+        throttle=make_throttle(args),
+        metadata_cache=metadata_cache,
+    )
+
+    if metadata_cache is not None:
+        metadata_cache.preload(client)
+
+    return client
+
+
+def save_metadata_cache(notion_db: NotionDB) -> None:
+    metadata_cache: Optional[MetadataCache] = notion_db.client.options.get(
+        "metadata_cache"
+    )
+    if metadata_cache is None:
+        return
+
+    notion_db.update_metadata_cache(metadata_cache)
+    metadata_cache.save()
+
+
+def prefetch_row_keys(
+    client: NotionClientExtended,
+    collection_id: str,
+    csv_rows: Iterable[CSVRowType],
+    key_column: str,
+) -> None:
+    csv_keys = {row[key_column] for row in csv_rows}
+    client.options["row_keys"] = {collection_id: csv_keys}
+
+
+def prepare_csv_data(csv_data: CSVData, notion_db: NotionDB, args: Namespace) -> None:
+    conversion_rules = ConversionRules.from_args(args)
+
+    preparator = NotionPreparator(notion_db, csv_data, conversion_rules)
+    preparator.prepare()
+
+    # worker processes would add the same missing relation row each
+    if args.processes > 1 and args.add_missing_relations:
+        preparator.add_missing_relations()
+
+
+def make_file_manifest(
+    csv_data: CSVData, notion_db: NotionDB, args: Namespace
+) -> Optional[FileManifest]:
+    if not args.preflight_files:
+        return None
+
+    logger.info("Checking files")
+
+    file_manifest = build_file_manifest(
+        csv_data, notion_db, ConversionRules.from_args(args)
+    )
 
+    logger.info(f"Found {len(file_manifest)} files")
+
+    return file_manifest
+
+
+def convert_csv_to_notion_rows(
+    csv_data: CSVData,
+    notion_db: NotionDB,
+    args: Namespace,
+    journal: Optional[UploadJournal] = None,
+    shard: Optional[Shard] = None,
+    file_manifest: Optional[FileManifest] = None,
+    sync_state: Optional[SyncState] = None,
+) -> Iterable[NotionUploadRow]:
     conversion_rules = ConversionRules.from_args(args)
 
-    NotionPreparator(notion_db, csv_data, conversion_rules).prepare()
+    on_row_error = None
+    if sync_state is not None:
+        # rows with conversion errors are checked again on next run
+        on_row_error = partial(sync_state.discard_row, key_column=csv_data.key_column)
+
+    converter = NotionRowConverter(
+        notion_db, conversion_rules, file_manifest, on_row_error
+    )
+
+    csv_rows: Iterable[CSVRowType] = csv_data
+    if shard is not None:
+        csv_rows = shard.filter_rows(csv_rows, csv_data.key_column)
+    if sync_state is not None:
+        csv_rows = sync_state.skip_unchanged(csv_rows, csv_data.key_column)
+    if journal is not None:
+        csv_rows = journal.skip_done(csv_rows, csv_data.key_column)
+
+    if args.pipeline_size:
+        return prefetch_iter(
+            converter.iter_notion_rows(csv_rows), max_size=args.pipeline_size
+        )
+
+    # in streaming mode rows are converted lazily, as they are being uploaded
+    if args.stream:
+        return converter.iter_notion_rows(csv_rows)
+
+    return converter.convert_to_notion_rows(csv_rows)
+
+
+def upload_total(
+    csv_data: CSVData,
+    journal: Optional[UploadJournal],
+    sync_state: Optional[SyncState] = None,
+) -> int:
+    if sync_state is None:
+        skip_count = len(journal) if journal is not None else 0
+        return max(len(csv_data) - skip_count, 0)
+
+    # unchanged rows are only known after their fingerprints are checked
+    csv_rows: Iterable[CSVRowType] = sync_state.iter_changed(
+        csv_data, csv_data.key_column
+    )
+    if journal is not None:
+        csv_rows = journal.skip_done(csv_rows, csv_data.key_column)
 
-    converter = NotionRowConverter(notion_db, conversion_rules)
-    return converter.convert_to_notion_rows(csv_data)
+    return sum(1 for _ in csv_rows)
 
 
 def upload_rows(
-    notion_rows: List[NotionUploadRow],
+    notion_rows: Iterable[NotionUploadRow],
     client: NotionClientExtended,
     collection_id: str,
     is_merge: bool,
     max_threads: int,
+    total: Optional[int] = None,
+    batch_size: int = 1,
+    journal: Optional[UploadJournal] = None,
+    engine: str = "threads",
 ) -> None:
+    with tqdm(total=total, leave=False) as progress:
+        _upload_rows(
+            notion_rows,
+            client,
+            collection_id,
+            is_merge=is_merge,
+            max_threads=max_threads,
+            on_uploaded=progress.update,
+            batch_size=batch_size,
+            journal=journal,
+            engine=engine,
+        )
+
+
+def upload_rows_sharded(
+    args: Namespace,
+    csv_data: CSVData,
+    collection_id: str,
+    total: Optional[int] = None,
+    initializer: Optional[Callable[[], Any]] = None,
+    file_manifest: Optional[FileManifest] = None,
+    sync_state: Optional[SyncState] = None,
+    metadata_cache: Optional[MetadataCache] = None,
+) -> None:
+    """Convert and upload rows in `args.processes` worker processes"""
+
     worker = partial(
-        ThreadRowUploader(client, collection_id).worker,
-        is_merge=is_merge,
+        _upload_shard, args, csv_data, collection_id, file_manifest, sync_state
+    )
+
+    with tqdm(total=total, leave=False) as progress:
+        shard_results = process_shards(
+            worker,
+            args.processes,
+            on_progress=progress.update,
+            initializer=initializer,
+        )
+
+    # state collected by workers is saved by the parent process
+    for shard_result in shard_results:
+        file_hash_cache.update(shard_result.hashes)
+
+        if sync_state is not None and shard_result.sync_state is not None:
+            sync_state.update(shard_result.sync_state)
+
+        if metadata_cache is not None and shard_result.metadata_cache is not None:
+            metadata_cache.update(shard_result.metadata_cache)
+
+
+def _upload_shard(
+    args: Namespace,
+    csv_data: CSVData,
+    collection_id: str,
+    file_manifest: Optional[FileManifest],
+    sync_state: Optional[SyncState],
+    shard: Shard,
+) -> ShardResult:
+    if args.hash_cache:
+        file_hash_cache.load(args.hash_cache)
+
+    # files were hashed by the parent process already
+    if file_manifest is not None:
+        file_hash_cache.update(file_manifest.hashes)
+
+    client = make_notion_client(args)
+
+    if args.merge and args.merge_prefetch_keys:
+        prefetch_row_keys(
+            client,
+            collection_id,
+            shard.filter_rows(csv_data, csv_data.key_column),
+            csv_data.key_column,
+        )
+
+    # parent process has started the journal already
+    journal = make_upload_journal(args)
+
+    notion_db = NotionDB(client, collection_id)
+
+    notion_rows = convert_csv_to_notion_rows(
+        csv_data, notion_db, args, journal, shard, file_manifest, sync_state
     )
 
-    tdqm_iter = tqdm(
-        iterable=process_iter(worker, notion_rows, max_workers=max_threads),
-        total=len(notion_rows),
-        leave=False,
+    # rows may be converted all at once, so stop is checked again on upload
+    _upload_rows(
+        shard.until_stopped(notion_rows),
+        client,
+        collection_id,
+        is_merge=args.merge,
+        max_threads=args.max_threads,
+        on_uploaded=shard.report,
+        batch_size=args.batch_size,
+        journal=journal,
+        engine=args.engine,
+    )
+
+    # relation rows are loaded by workers only
+    metadata_cache: Optional[MetadataCache] = client.options.get("metadata_cache")
+    if metadata_cache is not None:
+        notion_db.update_metadata_cache(metadata_cache)
+
+    return ShardResult(file_hash_cache.hashes(), sync_state, metadata_cache)
+
+
+def _upload_rows(
+    notion_rows: Iterable[NotionUploadRow],
+    client: NotionClientExtended,
+    collection_id: str,
+    is_merge: bool,
+    max_threads: int,
+    on_uploaded: Callable[[int], Any],
+    batch_size: int = 1,
+    journal: Optional[UploadJournal] = None,
+    engine: str = "threads",
+) -> None:
+    _load_db_page(client, collection_id)
+
+    tasks = chunk_iter(notion_rows, batch_size)
+
+    if engine == "async":
+        AsyncRowUploader(client, collection_id, max_threads, journal).upload(
+            tasks, is_merge=is_merge, on_uploaded=on_uploaded
+        )
+        return
+
+    worker = partial(
+        ThreadRowUploader(client, collection_id, journal).worker,
+        is_merge=is_merge,
     )
 
-    # Consume iterator
-    list(tdqm_iter)
+    for uploaded_count in process_iter(
+        worker,
+        tasks,
+        max_workers=max_threads,
+        throttle=client.options.get("throttle"),
+    ):
+        on_uploaded(uploaded_count)
+
+
+def _load_db_page(client: NotionClientExtended, collection_id: str) -> None:
+    """DB page and its views can't be loaded later, inside row transactions"""
+
+    notion_db = NotionDB(client, collection_id)
+    db_page = client.get_block(notion_db.collection.get("parent_id"))
+
+    store = client._store  # noqa: WPS437
+    missing_views = [
+        view_id
+        for view_id in db_page.get("view_ids", [])
+        if store._get("collection_view", view_id) is Missing  # noqa: WPS437
+    ]
+    if missing_views:
+        client.refresh_records(collection_view=missing_views)
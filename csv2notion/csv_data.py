@@ -1,10 +1,11 @@
 import csv
 import logging
 from collections import Counter
+from itertools import islice
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-from csv2notion.notion_type_guess import guess_type_by_values
+from csv2notion.notion_type_guess import ColumnTypeGuesser
 from csv2notion.utils_exceptions import CriticalError
 
 CSVRowType = Dict[str, str]
@@ -20,9 +21,32 @@ def csv_read(file_path: Path, fail_on_duplicate_columns: bool) -> List[CSVRowTyp
         raise CriticalError(f"File {file_path} not found") from e
 
 
+def csv_read_header(file_path: Path, fail_on_duplicate_columns: bool) -> List[str]:
+    try:
+        with open(file_path, "r", encoding="utf-8-sig") as csv_file:
+            reader = _csv_reader(csv_file, fail_on_duplicate_columns)
+            return list(dict.fromkeys(reader.fieldnames or []))
+    except FileNotFoundError as e:
+        raise CriticalError(f"File {file_path} not found") from e
+
+
 def _csv_read_rows(
     csv_file: Iterable[str], fail_on_duplicate_columns: bool
 ) -> List[CSVRowType]:
+    reader = _csv_reader(csv_file, fail_on_duplicate_columns)
+
+    rows = list(reader)
+
+    if rows and None in rows[0]:
+        _warn_inconsistent_columns()
+        rows = [_drop_dict_columns(row, [None]) for row in rows]
+
+    return rows
+
+
+def _csv_reader(
+    csv_file: Iterable[str], fail_on_duplicate_columns: bool
+) -> "csv.DictReader[str]":
     reader = csv.DictReader(csv_file, restval="")
 
     if not reader.fieldnames:
@@ -37,16 +61,13 @@ def _csv_read_rows(
 
         logger.warning(message)
 
-    rows = list(reader)
+    return reader
 
-    if rows and None in rows[0]:
-        logger.warning(
-            "Inconsistent number of columns detected."
-            " Excess columns will be truncated."
-        )
-        rows = [_drop_dict_columns(row, [None]) for row in rows]
 
-    return rows
+def _warn_inconsistent_columns() -> None:
+    logger.warning(
+        "Inconsistent number of columns detected. Excess columns will be truncated."
+    )
 
 
 def _list_duplicates(lst: List[str]) -> List[str]:
@@ -65,8 +86,10 @@ class CSVData(Iterable[CSVRowType]):  # noqa:  WPS214
         csv_file: Path,
         column_types: Optional[List[str]] = None,
         fail_on_duplicate_columns: bool = False,
+        type_sample_rows: int = 0,
     ) -> None:
         self.csv_file = csv_file
+        self.type_sample_rows = type_sample_rows
         self.rows = csv_read(self.csv_file, fail_on_duplicate_columns)
         self.types = self._column_types(column_types)
 
@@ -78,11 +101,11 @@ class CSVData(Iterable[CSVRowType]):  # noqa:  WPS214
 
     @property
     def key_column(self) -> str:
-        return self.columns[-1]
+        return self.columns[0]
 
     @property
     def content_columns(self) -> List[str]:
-        return self.columns[1:-1]
+        return self.columns[1:]
 
     @property
     def columns(self) -> List[str]:
@@ -104,16 +127,121 @@ class CSVData(Iterable[CSVRowType]):  # noqa:  WPS214
     def drop_rows(self, *keys: str) -> None:
         self.rows = [row for row in self.rows if row[self.key_column] not in keys]
 
+    def replace_values(self, col_name: str, values: Set[str], replacement: str) -> None:
+        for row in self.rows:
+            if row[col_name] in values:
+                row[col_name] = replacement
+
     def _column_types(self, column_types: Optional[List[str]] = None) -> Dict[str, str]:
         if not column_types:
-            return {
-                key: guess_type_by_values(self.col_values(key))
-                for key in self.columns[0:-1]
-            }
+            return self._guess_column_types()
 
-        if len(column_types) != len(self.columns) - 1:
+        if len(column_types) != len(self.content_columns):
             raise CriticalError(
                 "Each column (except key) type must be defined in custom types list"
             )
 
         return {key: column_types[i] for i, key in enumerate(self.content_columns)}
+
+    def _guess_column_types(self) -> Dict[str, str]:
+        type_guesser = ColumnTypeGuesser(self.content_columns)
+
+        rows: Iterable[CSVRowType] = self
+        if self.type_sample_rows:
+            rows = islice(rows, self.type_sample_rows)
+
+        for row in rows:
+            type_guesser.add_row(row)
+
+            if type_guesser.is_resolved():
+                break
+
+        return type_guesser.result()
+
+
+class StreamingCSVData(CSVData):  # noqa:  WPS214
+    """CSV data that is read from disk on every pass instead of kept in memory.
+
+    Column and row drops are recorded and applied while iterating,
+    so the file itself is never modified and memory usage does not grow
+    with the number of rows.
+    """
+
+    def __init__(
+        self,
+        csv_file: Path,
+        column_types: Optional[List[str]] = None,
+        fail_on_duplicate_columns: bool = False,
+        type_sample_rows: int = 0,
+    ) -> None:
+        self.csv_file = csv_file
+        self.type_sample_rows = type_sample_rows
+
+        self._header = csv_read_header(self.csv_file, fail_on_duplicate_columns)
+        self._dropped_columns: Set[str] = set()
+        self._dropped_keys: Set[str] = set()
+        self._replacements: List[Tuple[str, Set[str], str]] = []
+        self._is_inconsistent_warned = False
+        self._len: Optional[int] = None
+
+        self.types = self._column_types(column_types)
+
+    def __len__(self) -> int:
+        if self._len is None:
+            self._len = sum(1 for _ in self)
+
+        return self._len
+
+    def __iter__(self) -> Iterator[CSVRowType]:
+        with open(self.csv_file, "r", encoding="utf-8-sig") as csv_file:
+            reader = csv.DictReader(csv_file, restval="")
+            row_count = 0
+
+            for row in reader:
+                processed_row = self._process_row(row)
+                if processed_row is not None:
+                    row_count += 1
+                    yield processed_row
+
+        # remember row count once the whole file was read
+        self._len = row_count
+
+    @property
+    def columns(self) -> List[str]:
+        if self._len == 0:
+            return []
+
+        return [col for col in self._header if col not in self._dropped_columns]
+
+    def col_values(self, col_name: str) -> List[str]:
+        return [row[col_name] for row in self]
+
+    def drop_columns(self, *columns: str) -> None:
+        self._dropped_columns.update(columns)
+        self.types = _drop_dict_columns(self.types, columns)
+
+    def drop_rows(self, *keys: str) -> None:
+        self._dropped_keys.update(keys)
+        self._len = None
+
+    def replace_values(self, col_name: str, values: Set[str], replacement: str) -> None:
+        self._replacements.append((col_name, set(values), replacement))
+
+    def _process_row(self, row: Dict[Any, Any]) -> Optional[CSVRowType]:
+        if None in row:
+            if not self._is_inconsistent_warned:
+                _warn_inconsistent_columns()
+                self._is_inconsistent_warned = True
+            row.pop(None)
+
+        if self._dropped_columns:
+            row = _drop_dict_columns(row, self._dropped_columns)
+
+        if self._dropped_keys and row[self.key_column] in self._dropped_keys:
+            return None
+
+        for col_name, values, replacement in self._replacements:
+            if row[col_name] in values:
+                row[col_name] = replacement
+
+        return row
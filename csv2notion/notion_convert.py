@@ -1,12 +1,13 @@
 import logging
+from dataclasses import dataclass
 from functools import partial
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from notion.user import User
 from notion.utils import InvalidNotionIdentifier, extract_id
 
-from csv2notion.csv_data import CSVData, CSVRowType
+from csv2notion.csv_data import CSVRowType
 from csv2notion.notion_convert_map import (
     map_checkbox,
     map_date,
@@ -16,6 +17,7 @@ from csv2notion.notion_convert_map import (
     map_url_or_file,
 )
 from csv2notion.notion_db import NotionDB
+from csv2notion.notion_file_manifest import FileManifest, is_banned_extension
 from csv2notion.notion_row import CollectionRowBlockExtended
 from csv2notion.notion_type_guess import is_email
 from csv2notion.notion_uploader import NotionUploadRow
@@ -25,38 +27,75 @@ from csv2notion.utils_str import split_str
 
 logger = logging.getLogger(__name__)
 
+ColumnConverter = Callable[[str], Any]
+
+# column types that can't have multiple values and are set as row properties
+PROPERTY_COLUMN_TYPES = ("created_time", "last_edited_time")
+
+
+@dataclass(frozen=True)
+class ColumnConversion(object):
+    column: str
+    converter: Optional[ColumnConverter]
+    is_mandatory: bool
+    property_name: Optional[str]
+
 
 class NotionRowConverter(object):  # noqa:  WPS214
-    def __init__(self, db: NotionDB, conversion_rules: ConversionRules):
+    def __init__(
+        self,
+        db: NotionDB,
+        conversion_rules: ConversionRules,
+        file_manifest: Optional[FileManifest] = None,
+        on_row_error: Optional[Callable[[CSVRowType], Any]] = None,
+    ):
         self.db = db
         self.rules = conversion_rules
+        self.file_manifest = file_manifest
+        self.on_row_error = on_row_error
 
         self._current_row = 0
+        self._has_row_errors = False
+        self._column_plan: Optional[List[ColumnConversion]] = None
 
-    def convert_to_notion_rows(self, csv_data: CSVData) -> List[NotionUploadRow]:
-        notion_rows = []
+    def convert_to_notion_rows(
+        self, csv_rows: Iterable[CSVRowType]
+    ) -> List[NotionUploadRow]:
+        return list(self.iter_notion_rows(csv_rows))
 
+    def iter_notion_rows(
+        self, csv_rows: Iterable[CSVRowType]
+    ) -> Iterator[NotionUploadRow]:
         # starting with 2nd row, because first is header
         self._current_row = 2
+        self._column_plan = None
+
+        for row in csv_rows:
+            self._has_row_errors = False
 
-        for row in csv_data:
             try:
-                notion_rows.append(self._convert_row(row))
+                notion_row = self._convert_row(row)
             except NotionError as e:
                 raise NotionError(f"CSV [{self._current_row}]: {e}")
             self._current_row += 1
 
-        return notion_rows
+            if self._has_row_errors and self.on_row_error is not None:
+                self.on_row_error(row)
+
+            yield notion_row
 
     def _error(self, error: str) -> None:
         logger.error(f"CSV [{self._current_row}]: {error}")
+        self._has_row_errors = True
 
         if self.rules.fail_on_conversion_error:
             raise NotionError("Error during conversion.")
 
     def _convert_row(self, row: CSVRowType) -> NotionUploadRow:
         properties = self._map_properties(row)
-        columns = self._map_columns(row)
+        columns, column_properties = self._map_columns(row)
+
+        properties.update(column_properties)
 
         return NotionUploadRow(columns=columns, properties=properties)
 
@@ -71,42 +110,39 @@ class NotionRowConverter(object):  # noqa:  WPS214
 
         properties["icon"] = self._map_icon(row)
 
-        properties["created_time"] = self._pop_column_type(row, "created_time")
-        properties["last_edited_time"] = self._pop_column_type(row, "last_edited_time")
-
         return {k: v for k, v in properties.items() if v is not None}
 
-    def _map_columns(self, row: CSVRowType) -> Dict[str, Any]:
+    def _map_columns(self, row: CSVRowType) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Some column types can't have multiple values (like created_time)
+        so they are set as row properties leaving only the last non-empty one"""
+
+        if self._column_plan is None:
+            self._column_plan = self._compile_column_plan(row)
+
         notion_row = {}
+        properties = {}
 
-        for col_key, col_value in row.items():
-            col_type = self.db.columns[col_key]["type"]
+        for conversion in self._column_plan:
+            col_value = self._map_column(conversion.converter, row[conversion.column])
 
-            notion_row[col_key] = self._map_column(col_key, col_value, col_type)
+            if conversion.is_mandatory and not col_value:
+                raise NotionError(f"Mandatory column '{conversion.column}' is empty")
 
-            self._raise_if_mandatory_empty(col_key, notion_row[col_key])
+            if conversion.property_name is None:
+                notion_row[conversion.column] = col_value
+            elif col_value is not None:
+                properties[conversion.property_name] = col_value
 
-        return notion_row
+        return notion_row, properties
 
     def _map_column(
-        self, col_key: str, col_value: str, value_type: str
+        self, converter: Optional[ColumnConverter], col_value: str
     ) -> Optional[Any]:
-        conversion_map: Dict[str, Callable[[str], Any]] = {
-            "relation": partial(self._map_relation, col_key),
-            "checkbox": map_checkbox,
-            "date": map_notion_date,
-            "created_time": map_date,
-            "last_edited_time": map_date,
-            "multi_select": split_str,
-            "number": map_number,
-            "file": self._map_file,
-            "person": self._map_person,
-        }
+        if converter is None:
+            return col_value
 
         try:
-            return conversion_map[value_type](col_value)
-        except KeyError:
-            return col_value
+            return converter(col_value)
         except TypeConversionError as e:
             if not col_value.strip():
                 return None
@@ -114,26 +150,45 @@ class NotionRowConverter(object):  # noqa:  WPS214
             self._error(str(e))
             return None
 
-    def _pop_column_type(self, row: CSVRowType, col_type_to_pop: str) -> Optional[Any]:
-        """Some column types can't have multiple values (like created_time)
-        so we pop them out of the row leaving only the last non-empty one"""
+    def _compile_column_plan(self, row: CSVRowType) -> List[ColumnConversion]:
+        """Resolve column types and converters once per run instead of per cell"""
+
+        conversion_map: Dict[str, ColumnConverter] = {
+            "checkbox": map_checkbox,
+            "date": map_notion_date,
+            "created_time": map_date,
+            "last_edited_time": map_date,
+            "multi_select": split_str,
+            "number": map_number,
+            "file": self._map_file,
+            "person": self._map_person,
+        }
 
-        last_col_value = None
+        column_plan = []
 
-        for col_key, col_value in list(row.items()):
+        for col_key in row.keys():
             col_type = self.db.columns[col_key]["type"]
 
-            if col_type == col_type_to_pop:
-                result_value = self._map_column(col_key, col_value, col_type)
+            if col_type == "relation":
+                converter: Optional[ColumnConverter] = partial(
+                    self._map_relation, col_key
+                )
+            else:
+                converter = conversion_map.get(col_type)
 
-                self._raise_if_mandatory_empty(col_key, result_value)
+            property_name = col_type if col_type in PROPERTY_COLUMN_TYPES else None
 
-                if result_value is not None:
-                    last_col_value = result_value
+            conversion = ColumnConversion(
+                column=col_key,
+                converter=converter,
+                is_mandatory=col_key in self.rules.mandatory_column,
+                property_name=property_name,
+            )
 
-                row.pop(col_key)
+            column_plan.append(conversion)
 
-        return last_col_value
+        # property columns are converted first, created_time before last_edited_time
+        return sorted(column_plan, key=_conversion_order)
 
     def _map_icon(self, row: CSVRowType) -> Optional[FileType]:
         icon: Optional[FileType] = None
@@ -212,7 +267,7 @@ class NotionRowConverter(object):  # noqa:  WPS214
         if ensured_path is None:
             return None
 
-        if _is_banned_extension(ensured_path):
+        if is_banned_extension(ensured_path):
             self._error(
                 f"File extension '*{ensured_path.suffix}' is not allowed"
                 f" to upload on Notion."
@@ -227,6 +282,10 @@ class NotionRowConverter(object):  # noqa:  WPS214
         if not path.is_absolute():
             path = search_path / path
 
+        # missing files were reported by manifest already
+        if self.file_manifest is not None:
+            return path if self.file_manifest.exists(path) else None
+
         if not path.exists():
             self._error(f"File {path.name} does not exist.")
             return None
@@ -255,19 +314,20 @@ class NotionRowConverter(object):  # noqa:  WPS214
     ) -> Optional[CollectionRowBlockExtended]:
         relation = self.db.relations[relation_column]
 
-        try:
-            return relation.rows[key]
-        except KeyError:
-            if self.rules.add_missing_relations:
-                return relation.add_row_key(key)
+        relation_row = relation.find_row(key)
+        if relation_row is not None:
+            return relation_row
 
-            self._error(
-                f"Value '{key}' for relation"
-                f" '{relation_column} [column] -> {relation.name} [DB]'"
-                f" is not a valid value."
-            )
+        if self.rules.add_missing_relations:
+            return relation.add_row_key(key)
 
-            return None
+        self._error(
+            f"Value '{key}' for relation"
+            f" '{relation_column} [column] -> {relation.name} [DB]'"
+            f" is not a valid value."
+        )
+
+        return None
 
     def _resolve_relation_by_url(
         self, relation_column: str, url: str
@@ -277,11 +337,10 @@ class NotionRowConverter(object):  # noqa:  WPS214
             return None
 
         relation = self.db.relations[relation_column]
-        relation_rows = relation.rows.values()
 
         try:
-            return next(r for r in relation_rows if r.id == block_id)
-        except StopIteration:
+            return relation.rows_by_id[block_id]
+        except KeyError:
             self._error(
                 f"Row with url '{url}' not found in relation"
                 f" '{relation_column} [column] -> {relation.name} [DB]'."
@@ -326,5 +385,8 @@ class NotionRowConverter(object):  # noqa:  WPS214
             raise NotionError(f"Mandatory column '{col_key}' is empty")
 
 
-def _is_banned_extension(file_path: Path) -> bool:
-    return file_path.suffix in {".exe", ".com", ".js"}
+def _conversion_order(conversion: ColumnConversion) -> int:
+    if conversion.property_name is None:
+        return len(PROPERTY_COLUMN_TYPES)
+
+    return PROPERTY_COLUMN_TYPES.index(conversion.property_name)
@@ -1,12 +1,16 @@
-from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import requests
+from notion.settings import API_BASE_URL
+from notion.store import Missing
 from notion.user import User
 from notion.utils import InvalidNotionIdentifier
 
 from csv2notion.csv_data import CSVData
 from csv2notion.notion_db_client import NotionClientExtended
-from csv2notion.notion_db_collection import CollectionExtended
+from csv2notion.notion_db_collection import CollectionExtended, LazyRowMap
+from csv2notion.notion_metadata_cache import MetadataCache
 from csv2notion.notion_row import CollectionRowBlockExtended
 from csv2notion.utils_db import make_status_column
 from csv2notion.utils_exceptions import NotionError
@@ -14,15 +18,26 @@ from csv2notion.utils_rand_id import rand_id_list
 
 
 class NotionDB(object):  # noqa: WPS214
-    def __init__(self, client: NotionClientExtended, collection_id: str):
+    def __init__(
+        self,
+        client: NotionClientExtended,
+        collection_id: str,
+        is_relation: bool = False,
+    ):
         self.client = client
         self.collection = CollectionExtended(self.client, collection_id)
+        self.is_relation = is_relation
 
         self._cache_columns: Dict[str, Dict[str, str]] = {}
         self._cache_relations: Dict[str, NotionDB] = {}
-        self._cache_rows: Dict[str, CollectionRowBlockExtended] = {}
+        self._cache_rows: Optional[LazyRowMap] = None
+        self._cache_rows_by_id: Optional[LazyRowMap] = None
         self._cache_users: Dict[str, User] = {}
 
+        # rows of relation DBs may come from metadata cache, instead of server
+        self._is_rows_cached = False
+        self._is_rows_fetched = False
+
     @property
     def name(self) -> str:
         return str(self.collection.name)
@@ -42,19 +57,33 @@ class NotionDB(object):  # noqa: WPS214
         return next(c["name"] for c in column_values if c["type"] == "title")
 
     @property
-    def rows(self) -> Dict[str, CollectionRowBlockExtended]:
-        if not self._cache_rows:
-            self._cache_rows = self.collection.get_unique_rows()
+    def rows(self) -> LazyRowMap:
+        if self._cache_rows is None:
+            cached_rows = self._get_cached_rows()
+            self._cache_rows = (
+                self._fetch_rows() if cached_rows is None else cached_rows
+            )
 
         return self._cache_rows
 
+    @property
+    def rows_by_id(self) -> LazyRowMap:
+        if self._cache_rows_by_id is None:
+            row_ids = self.rows.row_ids().values()
+            self._cache_rows_by_id = LazyRowMap(
+                self.client, {row_id: row_id for row_id in row_ids}
+            )
+
+        return self._cache_rows_by_id
+
     @property
     def relations(self) -> Dict[str, "NotionDB"]:
         if not self._cache_relations:
             relations = [c for c in self.columns.values() if c["type"] == "relation"]
 
             self._cache_relations = {
-                r["name"]: NotionDB(self.client, r["collection_id"]) for r in relations
+                r["name"]: NotionDB(self.client, r["collection_id"], is_relation=True)
+                for r in relations
             }
 
         return self._cache_relations
@@ -62,10 +91,22 @@ class NotionDB(object):  # noqa: WPS214
     @property
     def users(self) -> Dict[str, User]:
         if not self._cache_users:
-            self._cache_users = {u.email: u for u in self.client.current_space.users}
+            self._cache_users = {u.email: u for u in self._get_space_users()}
 
         return self._cache_users
 
+    def find_row(self, key: str) -> Optional[CollectionRowBlockExtended]:
+        """Row by key, rows from metadata cache are refetched if key is not there"""
+
+        row = self.rows.get(key)
+
+        if row is None and self._is_rows_cached:
+            self._is_rows_cached = False
+            self._cache_rows = self._fetch_rows()
+            row = self.rows.get(key)
+
+        return row
+
     def get_user_by_name(self, name: str) -> Optional[User]:
         name_match = (u for u in self.users.values() if u.name == name)
         return next(name_match, None)
@@ -94,24 +135,112 @@ class NotionDB(object):  # noqa: WPS214
         self.collection.add_column(column_name, column_type)
 
         self._cache_columns = {}
-        self._cache_rows = {}
+        self._cache_rows = None
+        self._cache_rows_by_id = None
+
+    def add_select_options(self, options: Dict[str, List[str]]) -> None:
+        self.collection.add_select_options(
+            {self.columns[col]["id"]: values for col, values in options.items()}
+        )
+
+        self._cache_columns = {}
 
     def add_row(
         self,
         properties: Optional[Dict[str, Any]] = None,
         columns: Optional[Dict[str, Any]] = None,
+        files: Optional[List[Path]] = None,
     ) -> CollectionRowBlockExtended:
-        new_row = self.collection.add_row_block(properties=properties, columns=columns)
+        new_row = self.collection.add_row_block(
+            properties=properties, columns=columns, files=files
+        )
 
         key = columns.get(self.key_column) if columns else None
         if key:
             self.rows[key] = new_row
 
+            if self._cache_rows_by_id is not None:
+                self._cache_rows_by_id[new_row.id] = new_row
+
         return new_row
 
     def add_row_key(self, key: str) -> CollectionRowBlockExtended:
         return self.add_row(columns={self.key_column: key})
 
+    def update_metadata_cache(self, metadata_cache: MetadataCache) -> None:
+        """Store metadata fetched in this run, to be reused by the next one"""
+
+        pointers = [("collection", self.collection.id)]
+        pointers += [("notion_user", u.id) for u in self._cache_users.values()]
+
+        for relation in self._cache_relations.values():
+            pointers.append(("collection", relation.collection.id))
+
+            if relation._cache_rows is not None:  # noqa: WPS437
+                row_ids = relation.rows.row_ids()
+                metadata_cache.add_rows(
+                    relation.collection.id,
+                    row_ids,
+                    relation.collection.count_rows(),
+                    is_fetched=relation._is_rows_fetched,  # noqa: WPS437
+                    row_versions=self._get_row_versions(row_ids.values()),
+                )
+
+        metadata_cache.add_records(self.client, pointers)
+
+    def _get_row_versions(self, row_ids: Iterable[str]) -> Dict[str, int]:
+        """Versions of rows loaded in this run, other rows are left out"""
+
+        store = self.client._store  # noqa: WPS437
+        row_versions = {}
+
+        for row_id in row_ids:
+            row_record = store._get("block", row_id)  # noqa: WPS437
+            if row_record is not Missing and row_record and "version" in row_record:
+                row_versions[row_id] = row_record["version"]
+
+        return row_versions
+
+    def _get_cached_rows(self) -> Optional[LazyRowMap]:
+        metadata_cache = self.client.options.get("metadata_cache")
+        if not self.is_relation or metadata_cache is None:
+            return None
+
+        row_ids = metadata_cache.get_row_ids(
+            self.collection.id, self.collection.count_rows()
+        )
+        if row_ids is None:
+            return None
+
+        self._is_rows_cached = True
+        return LazyRowMap(self.client, row_ids)
+
+    def _fetch_rows(self) -> LazyRowMap:
+        self._is_rows_fetched = True
+
+        # only rows with these keys are fetched, if known in advance
+        row_keys = self.client.options.get("row_keys", {})
+        return self.collection.get_unique_rows(row_keys.get(self.collection.id))
+
+    def _get_space_users(self) -> List[User]:
+        if self.client.options.get("metadata_cache") is None:
+            return list(self.client.current_space.users)
+
+        # users loaded from metadata cache are not fetched again
+        permissions = self.client.current_space.get("permissions", [])
+        user_ids = [p["user_id"] for p in permissions if "user_id" in p]
+
+        store = self.client._store  # noqa: WPS437
+        missing_ids = [
+            user_id
+            for user_id in user_ids
+            if store._get("notion_user", user_id) is Missing  # noqa: WPS437
+        ]
+        if missing_ids:
+            self.client.refresh_records(notion_user=missing_ids)
+
+        return [self.client.get_user(user_id) for user_id in user_ids]
+
 
 def get_collection_id(client: NotionClientExtended, notion_url: str) -> str:
     try:
@@ -199,9 +328,11 @@ def _schema_from_csv(
     return schema
 
 
-def get_notion_client(token: str, **options: Dict[str, Any]) -> NotionClientExtended:
+def get_notion_client(
+    token: str, api_base_url: str = API_BASE_URL, **options: Any
+) -> NotionClientExtended:
     try:
-        client = NotionClientExtended(token_v2=token)
+        client = NotionClientExtended(token_v2=token, api_base_url=api_base_url)
     except requests.exceptions.HTTPError as e:
         raise NotionError("Invalid Notion token") from e
 
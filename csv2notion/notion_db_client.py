@@ -1,23 +1,48 @@
-from copy import deepcopy
-from typing import Any, Dict, Optional
-
+import json
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Union
+from urllib.parse import urljoin
+
+import requests
 from notion.client import NotionClient, create_session
+from notion.operations import operation_update_last_edited
+from notion.settings import API_BASE_URL
 from notion.space import Space
 from notion.store import RecordStore
 from notion.user import User
 
 from csv2notion.notion_db_collection import CollectionExtended
+from csv2notion.notion_db_store import SharedRecordStore
+from csv2notion.utils_throttle import AdaptiveThrottle, backoff_delay, get_retry_after
+
+Operations = Union[Dict[str, Any], List[Dict[str, Any]]]
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitError(Exception):
+    def __init__(self, retry_after: Optional[float] = None) -> None:
+        super().__init__("Rate limited")
+        self.retry_after = retry_after
 
 
 class NotionClientExtended(NotionClient):
+    api_base_url = API_BASE_URL
+
     def __init__(
         self,
         *args: Any,
         old_client: Optional["NotionClientExtended"] = None,
         options: Optional[Dict[str, Any]] = None,
+        api_base_url: str = API_BASE_URL,
         **kwargs: Any,
     ):
         self.options = options or {}
+        self.api_base_url = api_base_url
+        self._batch_operations: Optional[List[Dict[str, Any]]] = None
+        self._deferred_transactions: Optional[List[List[Dict[str, Any]]]] = None
 
         if old_client is None:
             super().__init__(*args, **kwargs)
@@ -33,6 +58,50 @@ class NotionClientExtended(NotionClient):
         self._clone_user_info(old_client)
 
         self.options = old_client.options.copy()
+        self.api_base_url = old_client.api_base_url
+
+    def post(self, endpoint: str, data: Dict[str, Any]) -> requests.Response:
+        """Retry rate limited requests, waiting as long as server asked to"""
+
+        throttle: Optional[AdaptiveThrottle] = self.options.get("throttle")
+        attempt = 0
+
+        while True:
+            if throttle is not None:
+                throttle.wait()
+
+            try:
+                # SDK post keeps its client side request rate limit
+                return super().post(endpoint, data)  # type: ignore
+            except RateLimitError as e:
+                if throttle is None:
+                    time.sleep(backoff_delay(attempt, e.retry_after))
+                else:
+                    throttle.on_throttle(e.retry_after)
+
+            attempt += 1
+
+    def _post(self, endpoint: str, data: Dict[str, Any]) -> requests.Response:
+        url = urljoin(self.api_base_url, endpoint)
+        response: requests.Response = self.session.post(url, json=data)
+
+        if response.status_code == 400:
+            logger.error(
+                f"Got 400 error attempting to POST to {endpoint},"
+                f" with data: {json.dumps(data, indent=2)}"
+            )
+            raise requests.HTTPError(
+                response.json().get(
+                    "message", "There was an error (400) submitting the request."
+                ),
+                response=response,
+            )
+
+        if response.status_code == 429:
+            raise RateLimitError(get_retry_after(response))
+
+        response.raise_for_status()
+        return response
 
     def get_collection(
         self, collection_id: str, force_refresh: bool = False
@@ -42,15 +111,82 @@ class NotionClientExtended(NotionClient):
         )
         return CollectionExtended(self, collection_id) if coll else None
 
-    def _clone_store(self, old_client: NotionClient) -> RecordStore:
-        new_store = RecordStore(self)
-        old_store = old_client._store
+    @contextmanager
+    def batch_transactions(self) -> Iterator[None]:
+        """Send all transactions submitted inside the block as a single one
+
+        Unlike atomic transaction, operations are applied to the local store
+        right away, so records created inside the block can be used before
+        they are sent to the server.
+        """
+
+        self._batch_operations = []
+
+        try:
+            yield
+            operations = self._batch_operations
+        finally:
+            self._batch_operations = None
+
+        if operations:
+            self._send_transaction(operations)
+
+    @contextmanager
+    def defer_transactions(self) -> Iterator[List[List[Dict[str, Any]]]]:
+        """Collect transactions submitted inside the block instead of sending them
+
+        Operations are applied to the local store right away.
+        Caller is responsible for sending collected transactions in order.
+        """
 
-        new_store._values = deepcopy(old_store._values)
-        new_store._role = deepcopy(old_store._role)
-        new_store._collection_row_ids = deepcopy(old_store._collection_row_ids)
+        transactions: List[List[Dict[str, Any]]] = []
+        self._deferred_transactions = transactions
 
-        return new_store
+        try:
+            yield transactions
+        finally:
+            self._deferred_transactions = None
+
+    def submit_transaction(
+        self, operations: Operations, update_last_edited: bool = True
+    ) -> None:
+        is_collecting = (
+            self._batch_operations is not None
+            or self._deferred_transactions is not None
+        )
+
+        if not is_collecting or self.in_transaction():
+            super().submit_transaction(operations, update_last_edited)
+            return
+
+        if not operations:
+            return
+
+        if isinstance(operations, dict):
+            operations = [operations]
+
+        if update_last_edited:
+            updated_blocks = {op["id"] for op in operations if op["table"] == "block"}
+            operations += [
+                operation_update_last_edited(self.current_user.id, block_id)
+                for block_id in updated_blocks
+            ]
+
+        if self._batch_operations is None:
+            self._send_transaction(operations)
+        else:
+            self._batch_operations += operations
+
+        self._store.run_local_operations(operations)
+
+    def _send_transaction(self, operations: List[Dict[str, Any]]) -> None:
+        if self._deferred_transactions is None:
+            self.post("submitTransaction", {"operations": operations})
+        else:
+            self._deferred_transactions.append(operations)
+
+    def _clone_store(self, old_client: NotionClient) -> RecordStore:
+        return SharedRecordStore(self, old_client._store)
 
     def _clone_user_info(self, old_client: NotionClient) -> None:
         self.current_user = User(self, old_client.current_user.id)
@@ -1,12 +1,35 @@
 import random
-from typing import Any, Dict, List, Optional, Tuple, cast
+from pathlib import Path
+from typing import (
+    AbstractSet,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+    cast,
+)
 
-from notion.collection import Collection, NotionSelect
+from notion.block import Block
+from notion.client import NotionClient
+from notion.collection import CalendarView, Collection, NotionSelect
+from notion.markdown import notion_to_markdown
+from notion.operations import build_operation
+from notion.store import Missing
 
 from csv2notion.notion_row import CollectionRowBlockExtended
 from csv2notion.utils_db import make_status_column
 from csv2notion.utils_rand_id import rand_id_unique
 
+# number of titles to look up in a single query
+TITLE_QUERY_BATCH_SIZE = 100
+
+# max rows returned by a single title query, leaves room for duplicate titles
+TITLE_QUERY_LIMIT = 10000
+
 
 class CollectionExtended(Collection):
     def get_rows(self) -> List[CollectionRowBlockExtended]:  # noqa: WPS615
@@ -15,15 +38,59 @@ class CollectionExtended(Collection):
             for row in super().get_rows()
         ]
 
-    def get_unique_rows(self) -> Dict[str, CollectionRowBlockExtended]:
-        rows: Dict[str, CollectionRowBlockExtended] = {}
+    def get_row_ids(self) -> List[str]:
+        query_result = super().get_rows()
+        return list(query_result._block_ids)  # noqa: WPS437
+
+    def get_row_ids_by_titles(self, titles: Iterable[str]) -> List[str]:
+        """Fetch only rows with given titles, querying titles in batches
+
+        Title filter is not case sensitive on the server side,
+        so returned rows may have titles that differ in case.
+        """
+
+        titles = sorted(set(titles))
+        row_ids: Dict[str, None] = {}
+
+        for i in range(0, len(titles), TITLE_QUERY_BATCH_SIZE):
+            titles_batch = titles[i : i + TITLE_QUERY_BATCH_SIZE]
+            row_ids.update(dict.fromkeys(self._query_titles(titles_batch)))
+
+        # records missing from local store are fetched in one request
+        store = self._client._store  # noqa: WPS437
+        missing_ids = [
+            row_id
+            for row_id in row_ids
+            if store._get("block", row_id) is Missing  # noqa: WPS437
+        ]
+        if missing_ids:
+            self._client.refresh_records(block=missing_ids)
+
+        return list(row_ids)
+
+    def get_unique_rows(
+        self, titles: Optional[AbstractSet[str]] = None
+    ) -> "LazyRowMap":
+        """Map row titles to rows, only first row is kept if multiple have same title
+
+        Titles are read from raw records, row objects are created
+        only for rows that are actually accessed.
+        If titles are given, only rows with these titles are fetched.
+        """
+
+        if titles is None:
+            all_row_ids = self.get_row_ids()
+        else:
+            all_row_ids = self.get_row_ids_by_titles(titles)
 
-        # sort rows so that only first row is kept if multiple have same title
-        sorted_rows = sorted(self.get_rows(), key=lambda r: str(r.title))
+        row_ids: Dict[str, str] = {}
 
-        for row in sorted_rows:
-            rows.setdefault(row.title, row)
-        return rows
+        for row_id in all_row_ids:
+            row_title = self._get_row_title(row_id)
+            if titles is None or row_title in titles:
+                row_ids.setdefault(row_title, row_id)
+
+        return LazyRowMap(self._client, row_ids)
 
     def add_row_block(
         self,
@@ -31,18 +98,68 @@ class CollectionExtended(Collection):
         row_class: Optional[type] = None,
         properties: Optional[Dict[str, Any]] = None,
         columns: Optional[Dict[str, Any]] = None,
+        files: Optional[List[Path]] = None,
     ) -> CollectionRowBlockExtended:
         row_class = row_class or CollectionRowBlockExtended
+        prefetched_rows: List[CollectionRowBlockExtended] = []
+
+        if files:
+            row_class = _prefetching_row_class(row_class, files, prefetched_rows)
 
-        new_row = super().add_row_block(
-            update_views=update_views,
-            row_class=row_class,
-            properties=properties,
-            columns=columns,
-        )
+        try:
+            new_row = self._add_row_block(
+                row_class, properties or {}, columns or {}, update_views
+            )
+        finally:
+            # also drops uploads of a row whose setters failed
+            for prefetched_row in prefetched_rows:
+                prefetched_row.release_files()
 
         return cast(CollectionRowBlockExtended, new_row)
 
+    def _add_row_block(
+        self,
+        row_class: Any,
+        properties: Dict[str, Any],
+        columns: Dict[str, Any],
+        update_views: bool,
+    ) -> Block:
+        """Same as SDK add_row_block, but row is appended to views' page_sort
+
+        SDK sets the whole page_sort list, so rows added concurrently
+        overwrite each other there, unless transactions are sent one by one.
+        """
+
+        row_id = self._client.create_record("block", self, type="page")
+        row = row_class(self._client, row_id)
+
+        with self._client.as_atomic_transaction():
+            for prop, prop_val in properties.items():
+                setattr(row, prop, prop_val)
+
+            for col, col_val in columns.items():
+                setattr(row.columns, col, col_val)
+
+            if update_views:
+                self._add_row_to_views(row_id)
+
+        return row
+
+    def _add_row_to_views(self, row_id: str) -> None:
+        for view in self.parent.views:
+            if view is None or isinstance(view, CalendarView):
+                continue
+
+            self._client.submit_transaction(
+                build_operation(
+                    id=view.id,
+                    path=["page_sort"],
+                    args={"id": row_id},
+                    command="listAfter",
+                    table="collection_view",
+                )
+            )
+
     def add_column(self, column_name: str, column_type: str) -> None:
         schema_raw = self.get("schema")
         new_id = rand_id_unique(4, schema_raw)
@@ -53,11 +170,32 @@ class CollectionExtended(Collection):
 
         self.set("schema", schema_raw)
 
+    def add_select_options(self, options: Dict[str, List[str]]) -> None:
+        """Add missing options to select columns (by id) in a single schema update"""
+
+        schema_raw = self.get("schema")
+        schema_update = False
+
+        for prop_id, values in options.items():
+            prop_update, _ = self.check_schema_select_options(
+                schema_raw[prop_id], values
+            )
+            schema_update = schema_update or prop_update
+
+        if schema_update:
+            self.set("schema", schema_raw)
+
     def has_duplicates(self) -> bool:
-        row_titles = [row.title for row in self.get_rows()]
+        row_titles = [self._get_row_title(row_id) for row_id in self.get_row_ids()]
         return len(row_titles) != len(set(row_titles))
 
     def is_accessible(self) -> bool:
+        metadata_cache = self._client.options.get("metadata_cache")
+        if metadata_cache is not None and metadata_cache.is_validated(
+            "collection", self.id
+        ):
+            return True
+
         rec = self._client.get_record_data("collection", self.id, force_refresh=True)
         return rec is not None
 
@@ -83,6 +221,135 @@ class CollectionExtended(Collection):
                 prop_options.append(NotionSelect(v, color).to_dict())
         return schema_update, prop
 
+    def _get_row_title(self, row_id: str) -> str:
+        row_record = self._client.get_record_data("block", row_id) or {}
+        row_title = row_record.get("properties", {}).get("title")
+
+        return str(notion_to_markdown(row_title or [[""]]))
+
+    def count_rows(self) -> int:
+        reducers = {
+            "count": {
+                "type": "aggregation",
+                "aggregation": {"property": "title", "aggregator": "count"},
+            },
+        }
+
+        response = self._query(reducers)
+
+        reducer_results = response["result"]["reducerResults"]
+        return int(reducer_results["count"]["aggregationResult"]["value"])
+
+    def _query_titles(self, titles: List[str]) -> List[str]:
+        reducers = {
+            "collection_group_results": {
+                "type": "results",
+                "limit": TITLE_QUERY_LIMIT,
+            },
+        }
+
+        response = self._query(reducers, _make_title_filter(titles))
+        self._client._store.store_recordmap(response["recordMap"])  # noqa: WPS437
+
+        reducer_results = response["result"]["reducerResults"]
+        return list(reducer_results["collection_group_results"]["blockIds"])
+
+    def _query(
+        self, reducers: Dict[str, Any], query_filter: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        space_id = self._client.current_space.id
+        collection_view = self._get_a_collection_view()
+
+        loader: Dict[str, Any] = {
+            "type": "reducer",
+            "reducers": reducers,
+            "searchQuery": "",
+        }
+        if query_filter is not None:
+            loader["filter"] = query_filter
+
+        query = {
+            "collection": {"id": self.id, "spaceId": space_id},
+            "collectionView": {"id": collection_view.id, "spaceId": space_id},
+            "loader": loader,
+        }
+
+        response: Dict[str, Any] = self._client.post("queryCollection", query).json()
+        return response
+
+
+class LazyRowMap(MutableMapping[str, CollectionRowBlockExtended]):
+    """Rows keyed by title, row objects are created on first access"""
+
+    def __init__(self, client: NotionClient, row_ids: Dict[str, str]) -> None:
+        self._client = client
+        self._row_ids = row_ids
+        self._rows: Dict[str, CollectionRowBlockExtended] = {}
+
+    def __getitem__(self, key: str) -> CollectionRowBlockExtended:
+        row = self._rows.get(key)
+
+        if row is None:
+            row = CollectionRowBlockExtended(self._client, self._row_ids[key])
+            self._rows[key] = row
+
+        return row
+
+    def __setitem__(self, key: str, row: CollectionRowBlockExtended) -> None:
+        self._row_ids[key] = row.id
+        self._rows[key] = row
+
+    def __delitem__(self, key: str) -> None:
+        del self._row_ids[key]  # noqa: WPS420
+        self._rows.pop(key, None)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._row_ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._row_ids)
+
+    def __len__(self) -> int:
+        return len(self._row_ids)
+
+    def row_ids(self) -> Dict[str, str]:
+        return dict(self._row_ids)
+
+
+def _make_title_filter(titles: List[str]) -> Dict[str, Any]:
+    return {
+        "operator": "or",
+        "filters": [
+            {
+                "property": "title",
+                "filter": {
+                    "operator": "string_is",
+                    "value": {"type": "exact", "value": title},
+                },
+            }
+            for title in titles
+        ],
+    }
+
 
 def _get_random_select_color() -> str:
     return str(random.choice(NotionSelect.valid_colors))  # noqa: S311
+
+
+def _prefetching_row_class(
+    row_class: type, files: List[Path], prefetched_rows: List[Any]
+) -> Any:
+    """Row factory that starts uploading row files as soon as the row is created
+
+    SDK sets row properties one by one right after creating the row,
+    so files are uploaded in background instead of waiting for their setters.
+    Created rows are added to `prefetched_rows` to release unused uploads later.
+    """
+
+    def make_row(client: NotionClient, row_id: str) -> Block:
+        row = row_class(client, row_id)
+        row.prefetch_files(files)
+        prefetched_rows.append(row)
+        return row
+
+    return make_row
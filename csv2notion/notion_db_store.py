@@ -0,0 +1,58 @@
+from copy import deepcopy
+from typing import Any, List
+
+from notion.store import Missing, RecordStore
+
+
+class SharedRecordStore(RecordStore):
+    """Record store that reads through to a parent store.
+
+    Records are copied from the parent one at a time, on first access,
+    so a worker client only holds the records it actually touches
+    and its own writes never leak into the parent store.
+    """
+
+    def __init__(self, client: Any, parent_store: RecordStore) -> None:
+        super().__init__(client)
+
+        self._parent_store = parent_store
+
+    def _get(self, table: str, record_id: str) -> Any:
+        record = super()._get(table, record_id)
+
+        if record is Missing:
+            record = self._copy_from_parent(table, record_id)
+
+        return record
+
+    def get_collection_rows(self, collection_id: str) -> List[str]:
+        if collection_id in self._collection_row_ids:
+            return super().get_collection_rows(collection_id)  # type: ignore
+
+        return self._parent_store.get_collection_rows(collection_id)  # type: ignore
+
+    def run_local_operation(
+        self, table: str, id: str, path: Any, command: str, args: Any  # noqa: A002
+    ) -> None:
+        # make sure the record is copied before it is modified locally
+        self._get(table, id)
+
+        super().run_local_operation(table, id, path, command, args)
+
+    def _copy_from_parent(self, table: str, record_id: str) -> Any:
+        parent_store = self._parent_store
+
+        record = parent_store._get(table, record_id)
+        if record is Missing:
+            return Missing
+
+        with parent_store._mutex:
+            record = deepcopy(record)
+            role = parent_store._role[table].get(record_id)
+
+        with self._mutex:
+            self._values[table][record_id] = record
+            if role:
+                self._role[table][record_id] = role
+
+        return record
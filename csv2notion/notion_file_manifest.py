@@ -0,0 +1,158 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from csv2notion.csv_data import CSVData, CSVRowType
+from csv2notion.notion_convert_map import map_icon, map_url_or_file
+from csv2notion.notion_db import NotionDB
+from csv2notion.utils_exceptions import NotionError
+from csv2notion.utils_file import FileKey, file_hash_cache
+from csv2notion.utils_static import ConversionRules, FileType
+from csv2notion.utils_str import split_str
+
+BANNED_EXTENSIONS = frozenset((".exe", ".com", ".js"))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FileManifest(object):
+    """Local files referenced by CSV, checked and hashed once before upload"""
+
+    found: Set[Path] = field(default_factory=set)
+    missing: Set[Path] = field(default_factory=set)
+    banned: Set[Path] = field(default_factory=set)
+
+    # file hashes, for worker processes to fill their hash cache
+    hashes: Dict[FileKey, str] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.found)
+
+    def exists(self, file_path: Path) -> bool:
+        return file_path in self.found
+
+
+@dataclass(frozen=True)
+class CSVFilePath(object):
+    path: Path
+    is_file_column: bool
+
+
+def build_file_manifest(
+    csv_data: CSVData,
+    notion_db: NotionDB,
+    rules: ConversionRules,
+    max_workers: Optional[int] = None,
+) -> FileManifest:
+    """Resolve, stat and hash every local file referenced by CSV
+
+    Files are hashed in parallel into `file_hash_cache`,
+    so they are not read again on upload.
+    Missing and banned files are reported all at once.
+    """
+
+    manifest = FileManifest()
+
+    for csv_path in collect_file_paths(csv_data, notion_db, rules):
+        if csv_path.is_file_column and is_banned_extension(csv_path.path):
+            manifest.banned.add(csv_path.path)
+        else:
+            manifest.found.add(csv_path.path)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        file_paths = list(manifest.found)
+        is_hashed = executor.map(_hash_file, file_paths)
+
+        for file_path, file_is_hashed in zip(file_paths, is_hashed):
+            if not file_is_hashed:
+                manifest.found.remove(file_path)
+                manifest.missing.add(file_path)
+
+    manifest.hashes = file_hash_cache.hashes()
+
+    _report_errors(manifest, rules)
+
+    return manifest
+
+
+def collect_file_paths(
+    csv_data: CSVData, notion_db: NotionDB, rules: ConversionRules
+) -> Iterator[CSVFilePath]:
+    """Local file paths of image, icon and file columns, as converter sees them"""
+
+    file_columns = get_file_columns(csv_data, notion_db)
+
+    for row in csv_data:
+        yield from row_file_paths(row, file_columns, rules)
+
+
+def get_file_columns(csv_data: CSVData, notion_db: NotionDB) -> List[str]:
+    return [
+        col
+        for col in csv_data.content_columns
+        if notion_db.columns.get(col, {}).get("type") == "file"
+    ]
+
+
+def row_file_paths(
+    row: CSVRowType, file_columns: Iterable[str], rules: ConversionRules
+) -> Iterator[CSVFilePath]:
+    if rules.image_column:
+        image = _cell_value(row, rules.image_column)
+        images = [map_url_or_file(image)] if image else []
+        yield from _local_paths(images, rules, is_file_column=False)
+
+    if rules.icon_column:
+        icon = _cell_value(row, rules.icon_column)
+        icons = [map_icon(icon)] if icon else []
+        yield from _local_paths(icons, rules, is_file_column=False)
+
+    for col in file_columns:
+        files = [map_url_or_file(v) for v in split_str(row[col])]
+        yield from _local_paths(files, rules, is_file_column=True)
+
+
+def is_banned_extension(file_path: Path) -> bool:
+    return file_path.suffix in BANNED_EXTENSIONS
+
+
+def _cell_value(row: CSVRowType, column: str) -> str:
+    return row.get(column, "").strip()
+
+
+def _local_paths(
+    files: Iterable[FileType], rules: ConversionRules, is_file_column: bool
+) -> List[CSVFilePath]:
+    return [
+        CSVFilePath(rules.files_search_path / f, is_file_column)
+        for f in files
+        if isinstance(f, Path)
+    ]
+
+
+def _hash_file(file_path: Path) -> bool:
+    try:
+        file_hash_cache.get_sha256(file_path)
+    except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+        return False
+
+    return True
+
+
+def _report_errors(manifest: FileManifest, rules: ConversionRules) -> None:
+    if manifest.missing:
+        missing_names = ", ".join(sorted(p.name for p in manifest.missing))
+        logger.error(f"Files do not exist: {missing_names}")
+
+    if manifest.banned:
+        banned_names = ", ".join(sorted(p.name for p in manifest.banned))
+        logger.error(
+            f"File extensions are not allowed to upload on Notion: {banned_names}"
+        )
+
+    has_errors = manifest.missing or manifest.banned
+    if has_errors and rules.fail_on_conversion_error:
+        raise NotionError("Error during conversion.")
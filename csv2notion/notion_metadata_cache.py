@@ -0,0 +1,218 @@
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from notion.client import NotionClient
+from notion.store import Missing
+
+CACHE_VERSION = 2
+
+DEFAULT_TTL = 3600
+
+# tables of records kept in cache
+CACHED_TABLES = ("collection", "notion_user")
+
+RecordPointer = Tuple[str, str]
+
+logger = logging.getLogger(__name__)
+
+
+class MetadataCache(object):  # noqa: WPS214
+    """Notion DB metadata kept between runs
+
+    Keeps collection records (schema), space users and row keys
+    of relation DBs. Records and rows behind cached row keys are revalidated
+    by version in a single request when loaded, row keys of a DB are dropped
+    if any of its rows changed. Row keys are also revalidated by DB row count.
+    Entries older than `ttl` seconds are dropped.
+    """
+
+    def __init__(self, cache_file: Path, ttl: float = DEFAULT_TTL) -> None:
+        self.cache_file = cache_file
+        self.ttl = ttl
+
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._validated: Set[RecordPointer] = set()
+
+        self._load(cache_file)
+
+    def __len__(self) -> int:
+        return len(self._records) + len(self._rows)
+
+    def preload(self, client: NotionClient) -> None:
+        """Put still valid cached records into client store"""
+
+        pointers = [_parse_pointer(key) for key in self._records]
+
+        versions = [
+            (table, record_id, self._records[key]["value"].get("version", -1))
+            for key, (table, record_id) in zip(self._records, pointers)
+        ]
+        versions += [
+            ("block", row_id, row_version)
+            for rows_entry in self._rows.values()
+            for row_id, row_version in rows_entry["versions"].items()
+        ]
+        if not versions:
+            return
+
+        sync_requests = [
+            {"pointer": {"table": table, "id": record_id}, "version": version}
+            for table, record_id, version in versions
+        ]
+
+        response = client.post("syncRecordValues", {"requests": sync_requests}).json()
+        updated_records = response.get("recordMap", {})
+
+        for table, record_id in pointers:
+            record = self._records[_pointer_key(table, record_id)]
+            updated = updated_records.get(table, {}).get(record_id)
+
+            if updated is not None:
+                record = {"value": updated.get("value"), "role": updated.get("role")}
+
+            # no longer accessible, leave it for SDK to fetch
+            if not record["value"] or record["role"] in {None, "none"}:
+                continue
+
+            client._store._update_record(  # noqa: WPS437
+                table, record_id, value=record["value"], role=record["role"]
+            )
+            self._validated.add((table, record_id))
+
+        self._drop_changed_rows(updated_records.get("block", {}).keys())
+
+        logger.info(f"Loaded {len(self._validated)} records from metadata cache")
+
+    def is_validated(self, table: str, record_id: str) -> bool:
+        """Record was loaded from cache and confirmed by server in this run"""
+
+        return (table, record_id) in self._validated
+
+    def get_row_ids(
+        self, collection_id: str, rows_count: int
+    ) -> Optional[Dict[str, str]]:
+        rows_entry = self._rows.get(collection_id)
+
+        if rows_entry is None or rows_entry["count"] != rows_count:
+            return None
+
+        return dict(rows_entry["rows"])
+
+    def add_records(self, client: NotionClient, pointers: List[RecordPointer]) -> None:
+        now = time.time()
+
+        for table, record_id in pointers:
+            value = client._store._get(table, record_id)  # noqa: WPS437
+            if value is Missing or not value:
+                continue
+
+            self._records[_pointer_key(table, record_id)] = {
+                "time": now,
+                "value": value,
+                "role": client._store._role[table].get(record_id),  # noqa: WPS437
+            }
+
+    def add_rows(
+        self,
+        collection_id: str,
+        row_ids: Dict[str, str],
+        rows_count: int,
+        is_fetched: bool,
+        row_versions: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """Keep row keys of relation DB, with versions of rows they point to
+
+        Rows of unknown version are treated as changed on next load.
+        """
+
+        rows_entry = self._rows.get(collection_id)
+        known_versions = dict(rows_entry["versions"]) if rows_entry else {}
+        known_versions.update(row_versions or {})
+
+        # row titles may change without changing row count, keep time of full fetch
+        if is_fetched or rows_entry is None:
+            rows_time = time.time()
+        else:
+            rows_time = rows_entry["time"]
+
+        self._rows[collection_id] = {
+            "time": rows_time,
+            "count": rows_count,
+            "rows": row_ids,
+            "versions": {
+                row_id: known_versions.get(row_id, -1) for row_id in row_ids.values()
+            },
+        }
+
+    def update(self, shard_cache: "MetadataCache") -> None:
+        """Add entries collected by worker process"""
+
+        self._records.update(shard_cache._records)  # noqa: WPS437
+
+        for collection_id, rows_entry in shard_cache._rows.items():  # noqa: WPS437
+            current_entry = self._rows.get(collection_id)
+
+            # workers may have added rows, keep the most complete row keys
+            if current_entry is None or rows_entry["count"] > current_entry["count"]:
+                self._rows[collection_id] = rows_entry
+
+    def _drop_changed_rows(self, changed_ids: Iterable[str]) -> None:
+        changed_ids = set(changed_ids)
+
+        for collection_id, rows_entry in list(self._rows.items()):
+            if changed_ids & rows_entry["versions"].keys():
+                logger.info("Rows of relation DB changed, row keys will be refetched")
+                self._rows.pop(collection_id)
+
+    def save(self) -> None:
+        cache_data = {
+            "version": CACHE_VERSION,
+            "records": self._records,
+            "rows": self._rows,
+        }
+
+        with open(self.cache_file, "w", encoding="utf-8") as f:
+            json.dump(cache_data, f)
+
+    def _load(self, cache_file: Path) -> None:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cache_data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"Metadata cache file {cache_file} is corrupted, ignoring")
+            return
+
+        if (
+            not isinstance(cache_data, dict)
+            or cache_data.get("version") != CACHE_VERSION
+        ):
+            logger.warning(f"Metadata cache file {cache_file} is outdated, ignoring")
+            return
+
+        expire_time = time.time() - self.ttl
+
+        self._records = {
+            key: entry
+            for key, entry in cache_data.get("records", {}).items()
+            if entry["time"] > expire_time and _parse_pointer(key)[0] in CACHED_TABLES
+        }
+        self._rows = {
+            key: entry
+            for key, entry in cache_data.get("rows", {}).items()
+            if entry["time"] > expire_time
+        }
+
+
+def _pointer_key(table: str, record_id: str) -> str:
+    return f"{table}:{record_id}"
+
+
+def _parse_pointer(key: str) -> RecordPointer:
+    table, record_id = key.split(":", 1)
+    return table, record_id
@@ -5,6 +5,7 @@ from csv2notion.csv_data import CSVData
 from csv2notion.notion_db import NotionDB
 from csv2notion.utils_exceptions import NotionError
 from csv2notion.utils_static import UNSETTABLE_TYPES, ConversionRules
+from csv2notion.utils_str import split_str
 
 logger = logging.getLogger(__name__)
 
@@ -38,9 +39,31 @@ class NotionPreparator(object):  # noqa: WPS214
 
         steps += [self._validate_columns_left]
 
+        if self.rules.register_select_options:
+            steps += [self._register_select_options]
+
         for step in steps:
             step()
 
+    def add_missing_relations(self) -> None:
+        """Add missing relation rows upfront, so rows don't add them"""
+
+        for relation_column, relation in self._present_relations().items():
+            missing_keys = [
+                key
+                for key in self._get_relation_keys(relation_column)
+                if relation.find_row(key) is None
+            ]
+
+            for key in missing_keys:
+                relation.add_row_key(key)
+
+            if missing_keys:
+                logger.info(
+                    f"Added {len(missing_keys)} missing rows"
+                    f" into '{relation.name}' relation DB"
+                )
+
     def _validate_image_column(self) -> None:
         if self.rules.image_column is None:
             return
@@ -155,9 +178,15 @@ class NotionPreparator(object):  # noqa: WPS214
             logger.warning(warn_text)
             logger.warning("These values will be replaced with default status")
 
-            for row in self.csv.rows:
-                if row[s_column] in wrong_values:
-                    row[s_column] = ""
+            self.csv.replace_values(s_column, wrong_values, "")
+
+    def _register_select_options(self) -> None:
+        """Add all new select options upfront, so rows don't update schema"""
+
+        select_values = self._get_select_values()
+
+        if any(select_values.values()):
+            self.db.add_select_options(select_values)
 
     def _validate_relations_duplicates(self) -> None:
         for relation_key, relation in self._present_relations().items():
@@ -237,6 +266,35 @@ class NotionPreparator(object):  # noqa: WPS214
 
         return csv_keys - db_keys
 
+    def _get_relation_keys(self, relation_column: str) -> List[str]:
+        relation_keys: Dict[str, None] = {}
+
+        for row in self.csv:
+            for value in split_str(row[relation_column]):
+                if not value.startswith("https://www.notion.so/"):
+                    relation_keys[value] = None
+
+        return list(relation_keys)
+
+    def _get_select_values(self) -> Dict[str, List[str]]:
+        select_columns = [
+            k
+            for k in self._present_columns()
+            if self.db.columns[k]["type"] in {"select", "multi_select"}
+        ]
+
+        select_values: Dict[str, Dict[str, None]] = {k: {} for k in select_columns}
+
+        for row in self.csv:
+            for column in select_columns:
+                if self.db.columns[column]["type"] == "multi_select":
+                    values = split_str(row[column])
+                else:
+                    values = [row[column]] if row[column] else []
+                select_values[column].update(dict.fromkeys(values))
+
+        return {k: list(v) for k, v in select_values.items()}
+
     def _get_wrong_status_values(self, column: str) -> Set[str]:
         col_values = set(self.csv.col_values(column))
         db_available_values = {
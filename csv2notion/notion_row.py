@@ -1,7 +1,7 @@
 from datetime import datetime
 from itertools import starmap
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from cached_property import cached_property
 from notion.collection import CollectionRowBlock
@@ -115,16 +115,81 @@ class CollectionRowBlockExtended(CollectionRowBlock):  # noqa: WPS214
         if self._client.in_transaction():
             raise RuntimeError("Cannot set last_edited_time during atomic transaction")
 
+        new_time = int(time.timestamp() * 1000)
+        if self._is_skip_unchanged() and self.get("last_edited_time") == new_time:
+            return
+
         self._client.submit_transaction(
             build_operation(
                 id=self.id,
                 path="last_edited_time",
-                args=int(time.timestamp() * 1000),
+                args=new_time,
                 table=self._table,
             ),
             update_last_edited=False,
         )
 
+    def update(
+        self,
+        properties: Optional[Dict[str, Any]] = None,
+        columns: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if self._is_skip_unchanged():
+            properties = {
+                p: p_val
+                for p, p_val in (properties or {}).items()
+                if p != "created_time" or self._is_created_time_changed(p_val)
+            }
+            columns = {
+                c: c_val
+                for c, c_val in (columns or {}).items()
+                if self.is_property_changed(c, c_val)
+            }
+
+        try:
+            super().update(properties=properties, columns=columns)
+        finally:
+            self.release_files()
+
+    def prefetch_files(self, files: Iterable[FileType]) -> None:
+        """Start uploading local files in background, if upload pool is enabled"""
+
+        upload_pool = self._client.options.get("upload_pool")
+
+        if upload_pool is not None:
+            upload_pool.prefetch(self, [f for f in files if isinstance(f, Path)])
+
+    def release_files(self) -> None:
+        """Drop background uploads that row setters did not use"""
+
+        upload_pool = self._client.options.get("upload_pool")
+
+        if upload_pool is not None:
+            upload_pool.release(self)
+
+    def is_property_changed(self, identifier: str, new_value: Any) -> bool:
+        prop = self.collection.get_schema_property(identifier)
+        if prop is None:
+            return True
+
+        if prop["type"] == "file":
+            return self._is_file_column_changed(prop["id"], new_value)
+
+        try:
+            path, notion_value = self._convert_python_to_notion(
+                new_value, prop, identifier=identifier
+            )
+        except (TypeError, ValueError):
+            # e.g. select option that is not in schema yet
+            return True
+
+        current_value = self.get(path)
+
+        if _is_empty_notion_value(current_value):
+            return not _is_empty_notion_value(notion_value)
+
+        return bool(current_value != notion_value)
+
     def set_property(self, identifier: str, new_value: Any) -> None:
         prop = self.collection.get_schema_property(identifier)
         if prop is None:
@@ -203,6 +268,8 @@ class CollectionRowBlockExtended(CollectionRowBlock):  # noqa: WPS214
         column_files_meta: List[Meta] = []
         column_files_urls: NamedURLs = {}
 
+        self.prefetch_files(files)
+
         for filetype in files:
             file_url, file_meta = upload_filetype(self, filetype)
 
@@ -227,6 +294,12 @@ class CollectionRowBlockExtended(CollectionRowBlock):  # noqa: WPS214
 
         return any(starmap(is_meta_different, zip(files, files_url, files_meta)))
 
+    def _is_created_time_changed(self, time: datetime) -> bool:
+        return bool(self.get("created_time") != int(time.timestamp() * 1000))
+
+    def _is_skip_unchanged(self) -> bool:
+        return self._client.options.get("is_merge_skip_unchanged") is True
+
     def _is_meta_changed(
         self,
         meta_parameter: str,
@@ -243,3 +316,7 @@ class CollectionRowBlockExtended(CollectionRowBlock):  # noqa: WPS214
 
 def get_filetype_name(filetype: FileType) -> str:
     return filetype.name if isinstance(filetype, Path) else filetype
+
+
+def _is_empty_notion_value(notion_value: Any) -> bool:
+    return notion_value in (None, "", [], [[""]])
@@ -1,20 +1,114 @@
+import logging
 import mimetypes
-import re
+import time
+from functools import partial
 from pathlib import Path
-from typing import Dict, Optional, Tuple
+from typing import Any, BinaryIO, Dict, Optional, Tuple
 
 import requests
 from notion.block import Block
 
+from csv2notion.notion_upload_cache import UploadCache
 from csv2notion.utils_exceptions import NotionError
 from csv2notion.utils_file import get_file_sha256
 from csv2notion.utils_static import FileType
+from csv2notion.utils_str import get_file_id
+from csv2notion.utils_throttle import (
+    RETRY_STATUSES,
+    AdaptiveThrottle,
+    backoff_delay,
+    get_retry_after,
+)
+
+MAX_PUT_ATTEMPTS = 5
+
+# signed URL takes a single PUT, so a stalled transfer can only be restarted
+PUT_CONNECT_TIMEOUT = 30
+PUT_STALL_TIMEOUT = 120
+
+# files at least this big report upload progress
+LARGE_FILE_SIZE = 64 * 1024 * 1024
+PROGRESS_LOG_INTERVAL = 10.0
 
 Meta = Dict[str, str]
 
+logger = logging.getLogger(__name__)
+
+
+class FileUploadBody(object):
+    """File streamed as PUT body, with progress and throughput reporting
+
+    Has a length, so it is sent with Content-Length as S3 requires,
+    and read in blocks, so it is never loaded into memory as a whole.
+    """
+
+    def __init__(self, file_path: Path) -> None:
+        self.file_path = file_path
+        self.size = file_path.stat().st_size
+        self.sent = 0
+
+        self._file: Optional[BinaryIO] = None
+        self._time_start = time.monotonic()
+        self._time_logged = self._time_start
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self) -> "FileUploadBody":
+        self._file = open(self.file_path, "rb")
+        self._time_start = time.monotonic()
+        self._time_logged = self._time_start
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    def read(self, size: int = -1) -> bytes:
+        if self._file is None:
+            raise ValueError("File is not open")
+
+        chunk = self._file.read(size)
+        self.sent += len(chunk)
+
+        if self.size >= LARGE_FILE_SIZE:
+            self._log_progress()
+
+        return chunk
+
+    def throughput(self) -> float:
+        """Bytes per second sent so far"""
+
+        return self.sent / max(time.monotonic() - self._time_start, 1e-6)
+
+    def log_done(self) -> None:
+        elapsed = time.monotonic() - self._time_start
+
+        logger.debug(
+            f"Uploaded {self.file_path.name} ({_format_size(self.size)})"
+            f" in {elapsed:.1f}s, {_format_size(self.throughput())}/s"
+        )
+
+    def _log_progress(self) -> None:
+        now = time.monotonic()
+        if now - self._time_logged < PROGRESS_LOG_INTERVAL:
+            return
+
+        self._time_logged = now
+
+        logger.info(
+            f"Uploading {self.file_path.name}:"
+            f" {self.sent * 100 // self.size}% of {_format_size(self.size)},"
+            f" {_format_size(self.throughput())}/s"
+        )
+
 
 def upload_filetype(parent: Block, filetype: FileType) -> Tuple[str, Meta]:
-    if isinstance(filetype, Path):
+    upload_pool = parent._client.options.get("upload_pool")
+
+    if isinstance(filetype, Path) and upload_pool is not None:
+        url, meta = upload_pool.upload(parent, filetype)
+    elif isinstance(filetype, Path):
         url, meta = upload_file(parent, filetype)
     else:
         url = filetype
@@ -24,19 +118,35 @@ def upload_filetype(parent: Block, filetype: FileType) -> Tuple[str, Meta]:
 
 
 def upload_file(block: Block, file_path: Path) -> Tuple[str, Meta]:
-    file_url = _upload_file(block, file_path)
+    upload_cache: Optional[UploadCache] = block._client.options.get("upload_cache")
 
-    file_id = get_file_id(file_url)
-    if file_id is None:
-        raise NotionError(f"Could not upload file {file_path}")
+    if upload_cache is None:
+        file_url = _upload_file_checked(block, file_path)
+        file_sha256 = get_file_sha256(file_path)
+    else:
+        # files uploaded to another workspace are not accessible from this one
+        space_id = block.space_info["spaceId"]
+        file_sha256 = get_file_sha256(file_path)
+        file_url = upload_cache.get_or_upload(
+            space_id, file_sha256, partial(_upload_file_checked, block, file_path)
+        )
 
     return file_url, {
         "type": "file",
-        "file_id": file_id,
-        "sha256": get_file_sha256(file_path),
+        "file_id": str(get_file_id(file_url)),
+        "sha256": file_sha256,
     }
 
 
+def _upload_file_checked(block: Block, file_path: Path) -> str:
+    file_url = _upload_file(block, file_path)
+
+    if get_file_id(file_url) is None:
+        raise NotionError(f"Could not upload file {file_path}")
+
+    return file_url
+
+
 def _upload_file(block: Block, file_path: Path) -> str:
     file_mime = mimetypes.guess_type(file_path.name)[0] or "application/octet-stream"
 
@@ -53,26 +163,53 @@ def _upload_file(block: Block, file_path: Path) -> str:
 
     upload_data = block._client.post("getUploadFileUrl", post_data).json()
 
-    with open(file_path, "rb") as f:
-        requests.put(
-            upload_data["signedPutUrl"],
-            data=f,
-            headers={"Content-type": file_mime},
-        ).raise_for_status()
+    throttle = block._client.options.get("throttle")
+
+    _put_file(upload_data["signedPutUrl"], file_path, file_mime, throttle)
 
     return str(upload_data.get("url", ""))
 
 
-def get_file_id(image_url: str) -> Optional[str]:
-    # aws_host/space_id/file_id/filename
-    aws_re = r"^https://(.*?\.amazonaws\.com)/([a-f0-9\-]+)/([a-f0-9\-]+)/(.*?)$"
+def _put_file(
+    url: str,
+    file_path: Path,
+    file_mime: str,
+    throttle: Optional[AdaptiveThrottle] = None,
+) -> None:
+    """PUT is idempotent, so it is retried on network errors and overload"""
+
+    for attempt in range(MAX_PUT_ATTEMPTS):
+        if throttle is not None:
+            throttle.wait()
 
-    aws_match = re.search(aws_re, image_url)
+        try:
+            with FileUploadBody(file_path) as upload_body:
+                response = requests.put(
+                    url,
+                    data=upload_body,
+                    headers={"Content-type": file_mime},
+                    timeout=(PUT_CONNECT_TIMEOUT, PUT_STALL_TIMEOUT),
+                )
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == MAX_PUT_ATTEMPTS - 1:
+                raise
+            logger.warning(f"Upload of {file_path.name} failed, retrying: {e}")
+            time.sleep(backoff_delay(attempt))
+            continue
 
-    if aws_match:
-        return aws_match.group(3)
+        if response.status_code not in RETRY_STATUSES:
+            break
 
-    return None
+        retry_after = get_retry_after(response)
+
+        if throttle is None:
+            time.sleep(backoff_delay(attempt, retry_after))
+        else:
+            throttle.on_throttle(retry_after)
+
+    response.raise_for_status()
+
+    upload_body.log_done()
 
 
 def is_meta_different(
@@ -100,3 +237,7 @@ def _is_file_meta_different(image: Path, image_url: str, image_meta: Meta) -> bo
         return True
 
     return image_meta["sha256"] != get_file_sha256(image)
+
+
+def _format_size(size: float) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import logging
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from csv2notion.csv_data import CSVData, CSVRowType
+from csv2notion.notion_db import NotionDB
+from csv2notion.notion_file_manifest import get_file_columns, row_file_paths
+from csv2notion.utils_static import ConversionRules
+from csv2notion.version import __version__
+
+STATE_VERSION = 1
+
+# fingerprint of rows uploaded on every run: keys found in CSV more than once
+# and rows that had conversion errors
+UNSYNCED = ""
+
+logger = logging.getLogger(__name__)
+
+
+class SyncState(object):  # noqa: WPS230
+    """Fingerprints of rows merged into Notion DB, used to skip unchanged rows
+
+    Row fingerprint covers CSV values of the row, size and modification time
+    of local files it references. All fingerprints are dropped if the DB,
+    its columns or conversion settings change.
+    """
+
+    def __init__(self, state_file: Path) -> None:
+        self.state_file = state_file
+        self.skipped = 0
+
+        self._collection_id: Optional[str] = None
+        self._settings: Optional[str] = None
+        self._fingerprints: Dict[str, str] = {}
+        self._new_fingerprints: Dict[str, str] = {}
+
+        self._file_columns: List[str] = []
+        self._rules: Optional[ConversionRules] = None
+
+        self._load(state_file)
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+    def start(
+        self,
+        collection_id: str,
+        csv_data: CSVData,
+        notion_db: NotionDB,
+        rules: ConversionRules,
+    ) -> None:
+        """Keep fingerprints if they were made with the same DB and settings"""
+
+        settings = settings_fingerprint(notion_db, rules)
+
+        is_same_db = self._collection_id == collection_id
+        is_same_settings = self._settings == settings
+
+        if self._fingerprints and not (is_same_db and is_same_settings):
+            logger.info(
+                "Database or conversion settings changed since last sync,"
+                " checking all rows"
+            )
+            self._fingerprints = {}
+
+        self._collection_id = collection_id
+        self._settings = settings
+
+        self._file_columns = get_file_columns(csv_data, notion_db)
+        self._rules = rules
+
+    def skip_unchanged(
+        self, rows: Iterable[CSVRowType], key_column: str
+    ) -> Iterator[CSVRowType]:
+        """Skip rows with the same fingerprint as on last sync
+
+        Fingerprints of all rows are kept to be saved after upload.
+        """
+
+        for row, is_unchanged in self._check_rows(
+            rows, key_column, self._new_fingerprints
+        ):
+            if is_unchanged:
+                self.skipped += 1
+                continue
+
+            yield row
+
+    def iter_changed(
+        self, rows: Iterable[CSVRowType], key_column: str
+    ) -> Iterator[CSVRowType]:
+        """Rows that `skip_unchanged` would yield, without keeping fingerprints"""
+
+        for row, is_unchanged in self._check_rows(rows, key_column, {}):
+            if not is_unchanged:
+                yield row
+
+    def discard_row(self, row: CSVRowType, key_column: str) -> None:
+        """Check row again on next run, e.g. when it had conversion errors"""
+
+        self._new_fingerprints[row[key_column]] = UNSYNCED
+
+    def update(self, shard_state: "SyncState") -> None:
+        """Add fingerprints of rows processed by worker process"""
+
+        self._new_fingerprints.update(shard_state._new_fingerprints)  # noqa: WPS437
+        self.skipped += shard_state.skipped
+
+    def save(self) -> None:
+        state_data = {
+            "version": STATE_VERSION,
+            "collection_id": self._collection_id,
+            "settings": self._settings,
+            "rows": self._new_fingerprints,
+        }
+
+        with open(self.state_file, "w", encoding="utf-8") as f:
+            json.dump(state_data, f)
+
+    def _check_rows(
+        self,
+        rows: Iterable[CSVRowType],
+        key_column: str,
+        new_fingerprints: Dict[str, str],
+    ) -> Iterator[Tuple[CSVRowType, bool]]:
+        for row in rows:
+            key = row[key_column]
+
+            if key in new_fingerprints:
+                new_fingerprints[key] = UNSYNCED
+                yield row, False
+                continue
+
+            fingerprint = self._row_fingerprint(row)
+            new_fingerprints[key] = fingerprint
+
+            yield row, self._fingerprints.get(key) == fingerprint
+
+    def _row_fingerprint(self, row: CSVRowType) -> str:
+        if self._rules is None:
+            raise RuntimeError("Sync state is not started")
+
+        row_files = [
+            _file_stat(csv_path.path)
+            for csv_path in row_file_paths(row, self._file_columns, self._rules)
+        ]
+
+        return _sha256([row, row_files])
+
+    def _load(self, state_file: Path) -> None:
+        try:
+            with open(state_file, "r", encoding="utf-8") as f:
+                state_data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"Sync state file {state_file} is corrupted, ignoring")
+            return
+
+        if (
+            not isinstance(state_data, dict)
+            or state_data.get("version") != STATE_VERSION
+        ):
+            logger.warning(f"Sync state file {state_file} is outdated, ignoring")
+            return
+
+        self._collection_id = state_data.get("collection_id")
+        self._settings = state_data.get("settings")
+        self._fingerprints = state_data.get("rows", {})
+
+
+def settings_fingerprint(notion_db: NotionDB, rules: ConversionRules) -> str:
+    """Fingerprint of everything besides row itself that affects row conversion"""
+
+    columns = sorted(
+        [name, col["type"], col.get("collection_id")]
+        for name, col in notion_db.columns.items()
+    )
+
+    return _sha256({"version": __version__, "rules": asdict(rules), "columns": columns})
+
+
+def _file_stat(file_path: Path) -> List[object]:
+    try:
+        file_stat = file_path.stat()
+    except OSError:
+        return [str(file_path), None, None]
+
+    return [str(file_path), file_stat.st_size, file_stat.st_mtime_ns]
+
+
+def _sha256(fingerprint_data: object) -> str:
+    fingerprint_json = json.dumps(fingerprint_data, sort_keys=True, default=str)
+    return hashlib.sha256(fingerprint_json.encode("utf-8")).hexdigest()
@@ -1,26 +1,11 @@
 import math
 import re
-from typing import List
+from typing import Callable, Dict, Iterable, List
 
+TypeMatcher = Callable[[str], bool]
 
-def guess_type_by_values(values_str: List[str]) -> str:
-    unique_values = set(filter(None, values_str))
-
-    match_map = {
-        "text": is_empty,
-        "checkbox": is_checkbox,
-        "number": is_number,
-        "url": is_url,
-        "email": is_email,
-    }
-
-    matches = (
-        value_type
-        for value_type, match_func in match_map.items()
-        if all(map(match_func, unique_values))
-    )
-
-    return next(matches, "text")
+URL_RE = re.compile("^https?://")
+EMAIL_RE = re.compile(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$")
 
 
 def is_number(s: str) -> bool:
@@ -31,11 +16,11 @@ def is_number(s: str) -> bool:
 
 
 def is_url(s: str) -> bool:
-    return re.match("^https?://", s) is not None
+    return URL_RE.match(s) is not None
 
 
 def is_email(s: str) -> bool:
-    return re.match(r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$", s) is not None
+    return EMAIL_RE.match(s) is not None
 
 
 def is_checkbox(s: str) -> bool:
@@ -44,3 +29,90 @@ def is_checkbox(s: str) -> bool:
 
 def is_empty(s: str) -> bool:
     return not s.strip()
+
+
+TYPE_MATCHERS: Dict[str, TypeMatcher] = {
+    "text": is_empty,
+    "checkbox": is_checkbox,
+    "number": is_number,
+    "url": is_url,
+    "email": is_email,
+}
+
+
+def guess_type_by_values(values_str: Iterable[str]) -> str:
+    type_guess = TypeGuess()
+
+    for value in set(values_str):
+        type_guess.add_value(value)
+
+        if type_guess.is_resolved():
+            break
+
+    return type_guess.result()
+
+
+class TypeGuess(object):
+    """Type candidates of a single column, narrowed down value by value"""
+
+    def __init__(self) -> None:
+        self.candidates = list(TYPE_MATCHERS.items())
+        self._last_value = ""
+
+    def add_value(self, value: str) -> None:
+        if not value or value == self._last_value:
+            return
+
+        self._last_value = value
+
+        for _, match_func in self.candidates:
+            if not match_func(value):
+                self._eliminate(value)
+                return
+
+    def is_resolved(self) -> bool:
+        return not self.candidates
+
+    def result(self) -> str:
+        return self.candidates[0][0] if self.candidates else "text"
+
+    def _eliminate(self, value: str) -> None:
+        self.candidates = [
+            (value_type, match_func)
+            for value_type, match_func in self.candidates
+            if match_func(value)
+        ]
+
+
+class ColumnTypeGuesser(object):
+    """Guess types of all columns in a single pass over rows
+
+    Columns that can only be text are not checked anymore,
+    so wide text-heavy tables are processed quickly.
+    """
+
+    def __init__(self, columns: List[str]) -> None:
+        self._columns = {col: TypeGuess() for col in columns}
+        self._unresolved = list(self._columns.items())
+
+    def add_row(self, row: Dict[str, str]) -> None:
+        is_any_resolved = False
+
+        for col, type_guess in self._unresolved:
+            type_guess.add_value(row[col])
+
+            if not type_guess.candidates:
+                is_any_resolved = True
+
+        if is_any_resolved:
+            self._unresolved = [
+                (col, type_guess)
+                for col, type_guess in self._unresolved
+                if not type_guess.is_resolved()
+            ]
+
+    def is_resolved(self) -> bool:
+        return not self._unresolved
+
+    def result(self) -> Dict[str, str]:
+        return {col: type_guess.result() for col, type_guess in self._columns.items()}
@@ -0,0 +1,100 @@
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from csv2notion.utils_str import get_file_id
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str]
+
+
+class UploadCache(object):
+    """Notion URLs of uploaded files, keyed by workspace ID and file SHA-256
+
+    If `cache_file` is provided, known URLs are loaded from it
+    and every new upload is appended to it right away.
+    URLs are only reused within the workspace they were uploaded to.
+    """
+
+    def __init__(self, cache_file: Optional[Path] = None) -> None:
+        self.cache_file = cache_file
+
+        self._urls: Dict[CacheKey, str] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[CacheKey, threading.Lock] = {}
+
+        if self.cache_file is not None:
+            self._load(self.cache_file)
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def get(self, space_id: str, file_sha256: str) -> Optional[str]:
+        return self._urls.get((space_id, file_sha256))
+
+    def get_or_upload(
+        self, space_id: str, file_sha256: str, upload: Callable[[], str]
+    ) -> str:
+        """Return cached URL or call `upload` once, even if called from many threads"""
+
+        cache_key = (space_id, file_sha256)
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(cache_key, threading.Lock())
+
+        with key_lock:
+            file_url = self._urls.get(cache_key)
+            if file_url is None:
+                file_url = upload()
+                self._add(cache_key, file_url)
+
+        return file_url
+
+    def _add(self, cache_key: CacheKey, file_url: str) -> None:
+        space_id, file_sha256 = cache_key
+
+        with self._lock:
+            self._urls[cache_key] = file_url
+
+            if self.cache_file is not None:
+                with open(self.cache_file, "a", encoding="utf-8") as f:
+                    cache_entry = {
+                        "space_id": space_id,
+                        "sha256": file_sha256,
+                        "url": file_url,
+                    }
+                    f.write(json.dumps(cache_entry))
+                    f.write("\n")
+
+    def _load(self, cache_file: Path) -> None:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cache_lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        for line in cache_lines:
+            try:
+                cache_entry = json.loads(line)
+                space_id = cache_entry["space_id"]
+                file_sha256, file_url = cache_entry["sha256"], cache_entry["url"]
+            except (ValueError, KeyError, TypeError):
+                space_id, file_sha256, file_url = None, None, None
+
+            # URL of a failed upload would be reused for every file with that hash
+            if not _is_valid_entry(space_id, file_sha256, file_url):
+                logger.warning(f"Skipping bad upload cache entry: {line.strip()}")
+                continue
+
+            self._urls[(space_id, file_sha256)] = file_url
+
+
+def _is_valid_entry(space_id: Any, file_sha256: Any, file_url: Any) -> bool:
+    entry_values = (space_id, file_sha256, file_url)
+    if not all(isinstance(entry_value, str) for entry_value in entry_values):
+        return False
+
+    return get_file_id(file_url) is not None
@@ -0,0 +1,104 @@
+import json
+import logging
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from csv2notion.csv_data import CSVRowType
+
+logger = logging.getLogger(__name__)
+
+
+class UploadJournal(object):
+    """Append-only log of uploaded rows, used to resume interrupted uploads
+
+    First line of the journal holds the collection id, every next line
+    holds the key of an uploaded row and the id of the resulting block.
+    """
+
+    def __init__(self, journal_file: Path) -> None:
+        self.journal_file = journal_file
+        self.collection_id: Optional[str] = None
+
+        self._done_keys: "Counter[str]" = Counter()
+        self._lock = threading.Lock()
+
+        self._load(self.journal_file)
+
+    def __len__(self) -> int:
+        return sum(self._done_keys.values())
+
+    def start(self, collection_id: str) -> None:
+        """Continue the journal if it belongs to the collection, start over otherwise"""
+
+        if self.collection_id == collection_id:
+            return
+
+        if self.collection_id is not None:
+            logger.warning(
+                f"Upload journal {self.journal_file} belongs to another database,"
+                f" starting over"
+            )
+
+        self.collection_id = collection_id
+        self._done_keys.clear()
+
+        with open(self.journal_file, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"collection_id": collection_id}))
+            f.write("\n")
+
+    def add(self, uploaded_rows: List[Tuple[str, str]]) -> None:
+        with self._lock:
+            with open(self.journal_file, "a", encoding="utf-8") as f:
+                for key, block_id in uploaded_rows:
+                    f.write(json.dumps({"key": key, "id": block_id}))
+                    f.write("\n")
+
+    def skip_done(
+        self, rows: Iterable[CSVRowType], key_column: str
+    ) -> Iterator[CSVRowType]:
+        """Skip rows recorded in the journal
+
+        Rows with the same key are skipped as many times
+        as this key was recorded in the journal.
+        """
+
+        skip_keys = self._done_keys.copy()
+
+        for row in rows:
+            key = row[key_column]
+
+            if skip_keys[key] > 0:
+                skip_keys[key] -= 1
+                continue
+
+            yield row
+
+    def remove(self) -> None:
+        try:
+            self.journal_file.unlink()
+        except FileNotFoundError:
+            return
+
+    def _load(self, journal_file: Path) -> None:
+        try:
+            with open(journal_file, "r", encoding="utf-8") as f:
+                journal_lines = f.readlines()
+        except FileNotFoundError:
+            return
+
+        if not journal_lines:
+            return
+
+        try:
+            self.collection_id = json.loads(journal_lines[0])["collection_id"]
+        except (ValueError, KeyError, TypeError):
+            logger.warning(f"Upload journal {journal_file} is corrupted, ignoring")
+            return
+
+        for line in journal_lines[1:]:
+            try:
+                self._done_keys[json.loads(line)["key"]] += 1
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Skipping bad upload journal entry: {line.strip()}")
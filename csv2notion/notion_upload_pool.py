@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from notion.block import Block
+
+from csv2notion.notion_row_upload_file import Meta, upload_file
+
+# total size of files being uploaded at once, larger files are uploaded alone
+MAX_IN_FLIGHT_BYTES = 64 * 1024 * 1024
+
+
+class FileUploadPool(object):
+    """Upload files in background threads shared by all row workers
+
+    Files of a row are submitted as soon as the row exists on the server,
+    so they are uploaded concurrently (together with files of other rows)
+    while the row setters wait only for the results they need.
+    Uploads left unrequested are dropped by `release` once the row is done.
+    """
+
+    def __init__(
+        self, max_workers: int, max_in_flight_bytes: int = MAX_IN_FLIGHT_BYTES
+    ) -> None:
+        self.max_in_flight_bytes = max_in_flight_bytes
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="file_upload"
+        )
+        self._lock = threading.Lock()
+        self._futures: Dict[str, Dict[Path, "Future[Tuple[str, Meta]]"]] = {}
+
+        self._budget = threading.Condition()
+        self._in_flight_bytes = 0
+
+    def prefetch(self, block: Block, files: Iterable[Path]) -> None:
+        # biggest files first, so they do not hold the row up at the end
+        for file_path in sorted(set(files), key=_file_size, reverse=True):
+            with self._lock:
+                row_futures = self._futures.setdefault(block.id, {})
+                if file_path not in row_futures:
+                    row_futures[file_path] = self._executor.submit(
+                        self._upload, block, file_path
+                    )
+
+    def upload(self, block: Block, file_path: Path) -> Tuple[str, Meta]:
+        with self._lock:
+            future = self._futures.get(block.id, {}).pop(file_path, None)
+
+        if future is None:
+            return self._upload(block, file_path)
+
+        return future.result()
+
+    def release(self, block: Block) -> None:
+        """Drop uploads of the block that were prefetched but never requested"""
+
+        with self._lock:
+            row_futures = self._futures.pop(block.id, {})
+
+        for future in row_futures.values():
+            future.cancel()
+
+    def _upload(self, block: Block, file_path: Path) -> Tuple[str, Meta]:
+        file_size = min(_file_size(file_path), self.max_in_flight_bytes)
+
+        with self._budget:
+            self._budget.wait_for(
+                lambda: self._in_flight_bytes + file_size <= self.max_in_flight_bytes
+            )
+            self._in_flight_bytes += file_size
+
+        try:
+            return upload_file(block, file_path)
+        finally:
+            with self._budget:
+                self._in_flight_bytes -= file_size
+                self._budget.notify_all()
+
+
+def _file_size(file_path: Path) -> int:
+    try:
+        return file_path.stat().st_size
+    except OSError:
+        # missing file will fail on upload, with a proper error
+        return 0
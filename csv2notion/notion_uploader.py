@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Dict, List, Set, Tuple
 
 from csv2notion.notion_db import NotionDB
 from csv2notion.notion_row import CollectionRowBlockExtended
@@ -13,23 +14,94 @@ class NotionUploadRow(object):
     def key(self) -> str:
         return str(list(self.columns.values())[0])
 
+    def has_files(self) -> bool:
+        return bool(self.files())
+
+    def files(self) -> List[Path]:
+        values = list(self.properties.values())
+        for col_value in self.columns.values():
+            if isinstance(col_value, list):
+                values.extend(col_value)
+
+        return [v for v in values if isinstance(v, Path)]
+
 
 class NotionRowUploader(object):
     def __init__(self, db: NotionDB):
         self.db = db
 
-    def upload_row(self, row: NotionUploadRow, is_merge: bool) -> None:
+    def upload_row(
+        self, row: NotionUploadRow, is_merge: bool
+    ) -> CollectionRowBlockExtended:
+        row_files = row.files()
         post_properties = _extract_post_properties(row.properties)
 
-        db_row = self._get_db_row(row, is_merge)
+        db_row = self._get_db_row(row, is_merge, row_files)
+
+        _set_post_properties(db_row, post_properties)
+
+        return db_row
+
+    def upload_rows(
+        self, rows: List[NotionUploadRow], is_merge: bool
+    ) -> List[CollectionRowBlockExtended]:
+        """Upload rows, returning resulting DB rows in the same order"""
+
+        batch_rows, single_rows = self._split_batch(rows, is_merge)
+
+        db_rows = dict(zip(map(id, batch_rows), self._add_rows_batch(batch_rows)))
+
+        for row in single_rows:
+            db_rows[id(row)] = self.upload_row(row, is_merge)
+
+        return [db_rows[id(row)] for row in rows]
 
-        # these need to be updated after
-        # because they can't be updated in atomic transaction
-        for prop, prop_val in post_properties.items():
-            setattr(db_row, prop, prop_val)
+    def _split_batch(
+        self, rows: List[NotionUploadRow], is_merge: bool
+    ) -> Tuple[List[NotionUploadRow], List[NotionUploadRow]]:
+        """Pick rows that can be created together in a single transaction
+
+        Rows that update existing DB rows (including rows with a key
+        that repeats inside the batch) are merged one by one after the batch.
+        Rows with local files are also left out, since files can only be
+        uploaded for rows that already exist on the server.
+        """
+
+        batch_rows: List[NotionUploadRow] = []
+        single_rows: List[NotionUploadRow] = []
+        batch_keys: Set[str] = set()
+
+        for row in rows:
+            is_existing = is_merge and (
+                row.key() in batch_keys or row.key() in self.db.rows
+            )
+
+            if is_existing or row.has_files():
+                single_rows.append(row)
+            else:
+                batch_rows.append(row)
+                batch_keys.add(row.key())
+
+        return batch_rows, single_rows
+
+    def _add_rows_batch(
+        self, rows: List[NotionUploadRow]
+    ) -> List[CollectionRowBlockExtended]:
+        post_rows = []
+
+        with self.db.client.batch_transactions():
+            for row in rows:
+                post_properties = _extract_post_properties(row.properties)
+                db_row = self.db.add_row(properties=row.properties, columns=row.columns)
+                post_rows.append((db_row, post_properties))
+
+        for db_row, post_properties in post_rows:
+            _set_post_properties(db_row, post_properties)
+
+        return [db_row for db_row, _ in post_rows]
 
     def _get_db_row(
-        self, row: NotionUploadRow, is_merge: bool
+        self, row: NotionUploadRow, is_merge: bool, row_files: List[Path]
     ) -> CollectionRowBlockExtended:
         existing_row = self.db.rows.get(row.key()) if is_merge else None
 
@@ -37,7 +109,10 @@ class NotionRowUploader(object):
             cur_row = existing_row
             cur_row.update(properties=row.properties, columns=row.columns)
         else:
-            cur_row = self.db.add_row(properties=row.properties, columns=row.columns)
+            # existing rows upload only changed files, so only new rows prefetch
+            cur_row = self.db.add_row(
+                properties=row.properties, columns=row.columns, files=row_files
+            )
 
         return cur_row
 
@@ -48,3 +123,12 @@ def _extract_post_properties(properties: Dict[str, Any]) -> Dict[str, Any]:
         for p in properties.copy()
         if p in {"cover_block", "cover_block_caption", "last_edited_time"}
     }
+
+
+def _set_post_properties(
+    db_row: CollectionRowBlockExtended, post_properties: Dict[str, Any]
+) -> None:
+    # these need to be updated after
+    # because they can't be updated in atomic transaction
+    for prop, prop_val in post_properties.items():
+        setattr(db_row, prop, prop_val)
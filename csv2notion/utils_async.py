@@ -0,0 +1,203 @@
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from notion.utils_ssl import HTTPAdapterTLS
+
+from csv2notion.notion_db import NotionDB
+from csv2notion.notion_db_client import NotionClientExtended
+from csv2notion.notion_row import CollectionRowBlockExtended
+from csv2notion.notion_upload_journal import UploadJournal
+from csv2notion.notion_uploader import NotionRowUploader, NotionUploadRow
+from csv2notion.utils_threading import ThreadRowUploader
+from csv2notion.utils_throttle import AdaptiveThrottle
+
+# these properties can only be set for rows that already exist on the server
+SERVER_ROW_PROPERTIES = frozenset(("cover_block", "cover_block_caption"))
+
+# records shared by all rows, values set in them (e.g. schema options)
+# replace whole lists, so such writes must reach the server in order;
+# rows are appended to views with list operations, which need no ordering
+SHARED_TABLES = frozenset(("collection", "collection_view"))
+SHARED_WRITE_COMMANDS = frozenset(("set", "update"))
+
+
+class AsyncRowUploader(object):  # noqa: WPS214
+    """Upload rows from an asyncio event loop using a single local store
+
+    Rows are applied to the local store and turned into transactions
+    in the event loop thread, only sending transactions is done concurrently,
+    sharing one connection pool.
+
+    Transactions touching the same row key or setting values in any shared
+    record (collection or its views) are sent in the order they were made.
+
+    Rows with local files or cover blocks need their DB row to exist
+    on the server first, so they are uploaded by thread workers instead.
+    """
+
+    def __init__(
+        self,
+        client: NotionClientExtended,
+        collection_id: str,
+        max_in_flight: int,
+        journal: Optional[UploadJournal] = None,
+    ) -> None:
+        self.client = NotionClientExtended(old_client=client)
+        _resize_connection_pool(self.client, max_in_flight)
+
+        self.uploader = NotionRowUploader(NotionDB(self.client, collection_id))
+        self.thread_uploader = ThreadRowUploader(client, collection_id, journal)
+
+        self.max_in_flight = max_in_flight
+        self.journal = journal
+        self.throttle: Optional[AdaptiveThrottle] = client.options.get("throttle")
+
+        self._key_tasks: Dict[str, "asyncio.Future[int]"] = {}
+        self._shared_task: Optional["asyncio.Future[int]"] = None
+
+    def upload(
+        self,
+        tasks: Iterable[List[NotionUploadRow]],
+        is_merge: bool,
+        on_uploaded: Callable[[int], Any],
+    ) -> None:
+        asyncio.run(self._upload_all(tasks, is_merge, on_uploaded))
+
+    async def _upload_all(
+        self,
+        tasks: Iterable[List[NotionUploadRow]],
+        is_merge: bool,
+        on_uploaded: Callable[[int], Any],
+    ) -> None:
+        in_flight: Set["asyncio.Future[int]"] = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            for rows in tasks:
+                while len(in_flight) >= self._in_flight_limit():
+                    in_flight = await self._collect(in_flight, on_uploaded)
+
+                in_flight.add(
+                    asyncio.ensure_future(self._upload(executor, rows, is_merge))
+                )
+
+            while in_flight:
+                in_flight = await self._collect(in_flight, on_uploaded)
+
+    async def _collect(
+        self, in_flight: Set["asyncio.Future[int]"], on_uploaded: Callable[[int], Any]
+    ) -> Set["asyncio.Future[int]"]:
+        done, pending = await asyncio.wait(
+            in_flight, return_when=asyncio.FIRST_COMPLETED
+        )
+
+        for task in done:
+            on_uploaded(task.result())
+
+            if self.throttle is not None:
+                self.throttle.on_success()
+
+        return pending
+
+    async def _upload(
+        self, executor: Executor, rows: List[NotionUploadRow], is_merge: bool
+    ) -> int:
+        loop = asyncio.get_running_loop()
+
+        # rows with the same key must reach the server in the same order
+        previous_tasks = self._register_keys(rows)
+
+        try:
+            if not all(map(_is_local_only, rows)):
+                await asyncio.gather(*previous_tasks)
+                upload = partial(self.thread_uploader.worker, rows, is_merge=is_merge)
+                return await loop.run_in_executor(executor, upload)
+
+            with self.client.defer_transactions() as transactions:
+                db_rows = self._upload_local(rows, is_merge)
+
+            if _is_shared(transactions):
+                previous_tasks |= self._register_shared()
+
+            await asyncio.gather(*previous_tasks)
+
+            for operations in transactions:
+                send = partial(
+                    self.client.post, "submitTransaction", {"operations": operations}
+                )
+                await loop.run_in_executor(executor, send)
+        finally:
+            self._unregister_keys(rows)
+            self._unregister_shared()
+
+        if self.journal is not None:
+            self.journal.add([(r.key(), db_r.id) for r, db_r in zip(rows, db_rows)])
+
+        return len(rows)
+
+    def _upload_local(
+        self, rows: List[NotionUploadRow], is_merge: bool
+    ) -> List[CollectionRowBlockExtended]:
+        if len(rows) == 1:
+            return [self.uploader.upload_row(rows[0], is_merge=is_merge)]
+
+        return self.uploader.upload_rows(rows, is_merge=is_merge)
+
+    def _register_keys(self, rows: List[NotionUploadRow]) -> Set["asyncio.Future[int]"]:
+        current_task = asyncio.current_task()
+        previous_tasks = set()
+
+        for row in rows:
+            previous_task = self._key_tasks.get(row.key())
+            if previous_task is not None and previous_task is not current_task:
+                previous_tasks.add(previous_task)
+
+            if current_task is not None:
+                self._key_tasks[row.key()] = current_task
+
+        return previous_tasks
+
+    def _unregister_keys(self, rows: List[NotionUploadRow]) -> None:
+        current_task = asyncio.current_task()
+
+        for row in rows:
+            if self._key_tasks.get(row.key()) is current_task:
+                self._key_tasks.pop(row.key())
+
+    def _register_shared(self) -> Set["asyncio.Future[int]"]:
+        previous_task = self._shared_task
+        self._shared_task = asyncio.current_task()
+
+        return {previous_task} if previous_task is not None else set()
+
+    def _unregister_shared(self) -> None:
+        if self._shared_task is asyncio.current_task():
+            self._shared_task = None
+
+    def _in_flight_limit(self) -> int:
+        if self.throttle is None:
+            return self.max_in_flight
+
+        return min(self.throttle.limit, self.max_in_flight)
+
+
+def _is_local_only(row: NotionUploadRow) -> bool:
+    return not row.has_files() and not SERVER_ROW_PROPERTIES & row.properties.keys()
+
+
+def _is_shared(transactions: List[List[Dict[str, Any]]]) -> bool:
+    return any(
+        op["table"] in SHARED_TABLES and op["command"] in SHARED_WRITE_COMMANDS
+        for operations in transactions
+        for op in operations
+    )
+
+
+def _resize_connection_pool(client: NotionClientExtended, pool_size: int) -> None:
+    adapter = client.session.get_adapter("https://")
+
+    client.session.mount(
+        "https://",
+        HTTPAdapterTLS(max_retries=adapter.max_retries, pool_maxsize=pool_size),
+    )
@@ -1,12 +1,112 @@
 import hashlib
+import json
+import logging
+import mmap
+import threading
 from pathlib import Path
+from typing import Dict, Tuple
+
+HASH_CHUNK_SIZE = 1024 * 1024
+HASH_MMAP_MIN_SIZE = 64 * 1024 * 1024
+
+FileKey = Tuple[str, int, int]
+
+logger = logging.getLogger(__name__)
+
+
+class FileHashCache(object):
+    """SHA-256 of files, keyed by (path, size, mtime_ns)
+
+    File is rehashed only if it was modified since it was last hashed.
+    """
+
+    def __init__(self) -> None:
+        self._hashes: Dict[FileKey, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def get_sha256(self, file_path: Path) -> str:
+        file_key = _get_file_key(file_path)
+
+        with self._lock:
+            file_hash = self._hashes.get(file_key)
+
+        if file_hash is None:
+            file_hash = compute_file_sha256(file_path)
+
+            with self._lock:
+                self._hashes[file_key] = file_hash
+
+        return file_hash
+
+    def hashes(self) -> Dict[FileKey, str]:
+        with self._lock:
+            return dict(self._hashes)
+
+    def update(self, hashes: Dict[FileKey, str]) -> None:
+        with self._lock:
+            self._hashes.update(hashes)
+
+    def load(self, cache_file: Path) -> None:
+        try:
+            with open(cache_file, "r", encoding="utf-8") as f:
+                cache_entries = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            logger.warning(f"Hash cache file {cache_file} is corrupted, ignoring")
+            return
+
+        try:
+            loaded_hashes = {
+                (path, size, mtime_ns): file_hash
+                for path, size, mtime_ns, file_hash in cache_entries
+            }
+        except (TypeError, ValueError):
+            logger.warning(f"Hash cache file {cache_file} is corrupted, ignoring")
+            return
+
+        self.update(loaded_hashes)
+
+    def save(self, cache_file: Path) -> None:
+        with self._lock:
+            cache_entries = [
+                [*key, file_hash] for key, file_hash in self._hashes.items()
+            ]
+
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(cache_entries, f)
+
+
+file_hash_cache = FileHashCache()
 
 
 def get_file_sha256(file_path: Path) -> str:
+    return file_hash_cache.get_sha256(file_path)
+
+
+def compute_file_sha256(file_path: Path) -> str:
     hash_sha256 = hashlib.sha256()
-    chunk_size = 4096
+
+    file_size = _get_file_size(file_path)
 
     with open(file_path, "rb") as f:
-        for chunk in iter(lambda: f.read(chunk_size), b""):  # noqa: WPS426
-            hash_sha256.update(chunk)
+        if file_size and file_size >= HASH_MMAP_MIN_SIZE:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                hash_sha256.update(mm)
+        else:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):  # noqa: WPS426
+                hash_sha256.update(chunk)
+
     return hash_sha256.hexdigest()
+
+
+def _get_file_key(file_path: Path) -> FileKey:
+    file_stat = file_path.stat()
+    return str(file_path.resolve()), file_stat.st_size, file_stat.st_mtime_ns
+
+
+def _get_file_size(file_path: Path) -> int:
+    return file_path.stat().st_size
@@ -0,0 +1,134 @@
+import multiprocessing
+import queue
+import zlib
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set, TypeVar
+
+from csv2notion.csv_data import CSVRowType
+
+R = TypeVar("R")
+T = TypeVar("T")
+
+PROGRESS_POLL_INTERVAL = 0.1
+
+
+class Shard(object):
+    """Part of CSV rows handled by a single worker process
+
+    Rows are assigned to shards by key, so rows with the same key
+    are always uploaded by the same process, in CSV order.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        count: int,
+        progress: "queue.Queue[int]",
+        stop_event: Any,
+    ) -> None:
+        self.index = index
+        self.count = count
+
+        self._progress = progress
+        self._stop_event = stop_event
+        self._is_stopped = False
+
+    def owns(self, key: str) -> bool:
+        return key_shard(key, self.count) == self.index
+
+    def filter_rows(
+        self, rows: Iterable[CSVRowType], key_column: str
+    ) -> Iterator[CSVRowType]:
+        for row in rows:
+            if self._is_stopped:
+                return
+
+            if self.owns(row[key_column]):
+                yield row
+
+    def until_stopped(self, items: Iterable[T]) -> Iterator[T]:
+        """Stop yielding items once other worker failed"""
+
+        self._is_stopped = self._stop_event.is_set()
+
+        for item in items:
+            if self._is_stopped:
+                return
+
+            yield item
+
+    def report(self, uploaded_count: int) -> None:
+        self._progress.put(uploaded_count)
+
+        # checked only on progress, to avoid a round trip to manager for every row
+        self._is_stopped = self._stop_event.is_set()
+
+
+def key_shard(key: str, shard_count: int) -> int:
+    """Shard of the row key, unlike hash() it is the same in every process"""
+
+    return zlib.crc32(key.encode("utf-8")) % shard_count
+
+
+def process_shards(
+    worker: Callable[[Shard], R],
+    shard_count: int,
+    on_progress: Callable[[int], Any],
+    initializer: Optional[Callable[[], Any]] = None,
+) -> List[R]:
+    """Run worker for every shard in a separate process
+
+    Progress reported by workers is passed to `on_progress`.
+    If any worker fails, others are asked to stop and the error is raised.
+    """
+
+    # processes are spawned, not forked, since parent may be running threads
+    mp_context = multiprocessing.get_context("spawn")
+
+    with mp_context.Manager() as manager:
+        progress = manager.Queue()
+        stop_event = manager.Event()
+
+        with ProcessPoolExecutor(
+            max_workers=shard_count, mp_context=mp_context, initializer=initializer
+        ) as executor:
+            futures = [
+                executor.submit(worker, Shard(i, shard_count, progress, stop_event))
+                for i in range(shard_count)
+            ]
+
+            try:
+                _wait_shards(set(futures), progress, on_progress)
+            except BaseException:
+                stop_event.set()
+                raise
+
+        return [f.result() for f in futures]
+
+
+def _wait_shards(
+    in_flight: Set["Future[R]"],
+    progress: "queue.Queue[int]",
+    on_progress: Callable[[int], Any],
+) -> None:
+    while in_flight:
+        done, in_flight = wait(
+            in_flight, timeout=PROGRESS_POLL_INTERVAL, return_when=FIRST_COMPLETED
+        )
+
+        _drain_progress(progress, on_progress)
+
+        for future in done:
+            future.result()
+
+
+def _drain_progress(
+    progress: "queue.Queue[int]", on_progress: Callable[[int], Any]
+) -> None:
+    while True:
+        try:
+            uploaded_count = progress.get_nowait()
+        except queue.Empty:
+            return
+
+        on_progress(uploaded_count)
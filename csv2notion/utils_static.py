@@ -51,6 +51,7 @@ class ConversionRules(object):
 
     add_missing_columns: bool
     add_missing_relations: bool
+    register_select_options: bool
 
     mandatory_column: List[str]
     fail_on_relation_duplicates: bool
@@ -1,5 +1,18 @@
-from typing import List
+import re
+from typing import List, Optional
 
 
 def split_str(s: str, sep: str = ",") -> List[str]:
     return [v.strip() for v in s.split(sep) if v.strip()]
+
+
+def get_file_id(image_url: str) -> Optional[str]:
+    # aws_host/space_id/file_id/filename
+    aws_re = r"^https://(.*?\.amazonaws\.com)/([a-f0-9\-]+)/([a-f0-9\-]+)/(.*?)$"
+
+    aws_match = re.search(aws_re, image_url)
+
+    if aws_match:
+        return aws_match.group(3)
+
+    return None
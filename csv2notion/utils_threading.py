@@ -1,38 +1,210 @@
+import queue
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Callable, Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Set, TypeVar
 
 from csv2notion.notion_db import NotionDB
 from csv2notion.notion_db_client import NotionClientExtended
-from csv2notion.notion_uploader import NotionRowUploader
+from csv2notion.notion_upload_journal import UploadJournal
+from csv2notion.notion_uploader import NotionRowUploader, NotionUploadRow
+from csv2notion.utils_throttle import AdaptiveThrottle
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+QUEUE_POLL_INTERVAL = 0.1
+
+# keep workers busy while finished tasks are being collected
+TASKS_PER_WORKER = 2
 
 
 class ThreadRowUploader(object):
-    def __init__(self, client: NotionClientExtended, collection_id: str) -> None:
+    def __init__(
+        self,
+        client: NotionClientExtended,
+        collection_id: str,
+        journal: Optional[UploadJournal] = None,
+    ) -> None:
         self.thread_data = threading.local()
 
         self.client = client
         self.collection_id = collection_id
+        self.journal = journal
+
+    def worker(self, rows: List[NotionUploadRow], is_merge: bool) -> int:
+        notion_uploader = self._get_uploader()
+
+        if len(rows) == 1:
+            db_rows = [notion_uploader.upload_row(rows[0], is_merge=is_merge)]
+        else:
+            db_rows = notion_uploader.upload_rows(rows, is_merge=is_merge)
+
+        if self.journal is not None:
+            self.journal.add([(r.key(), db_r.id) for r, db_r in zip(rows, db_rows)])
 
-    def worker(self, *args: Any, **kwargs: Any) -> None:
+        return len(rows)
+
+    def _get_uploader(self) -> NotionRowUploader:
         try:
-            notion_uploader = self.thread_data.uploader
+            notion_uploader: NotionRowUploader = self.thread_data.uploader
         except AttributeError:
             client = NotionClientExtended(old_client=self.client)
             notion_db = NotionDB(client, self.collection_id)
             notion_uploader = NotionRowUploader(notion_db)
             self.thread_data.uploader = notion_uploader
 
-        notion_uploader.upload_row(*args, **kwargs)
+        return notion_uploader
+
+
+class _ProducerDone(object):
+    """Marks the end of the producer output"""
+
+
+class _ProducerError(object):
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
 
 
 def process_iter(
-    worker: Callable[[Any], None], tasks: Iterable[Any], max_workers: int
-) -> Iterator[None]:
-    if max_workers == 1:
+    worker: Callable[[Any], R],
+    tasks: Iterable[Any],
+    max_workers: int,
+    throttle: Optional[AdaptiveThrottle] = None,
+) -> Iterator[R]:
+    if throttle is not None:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from _process_throttled(executor, worker, tasks, throttle)
+    elif max_workers == 1:
         yield from map(worker, tasks)
     else:
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(worker, t) for t in tasks]
+            yield from _process_windowed(
+                executor, worker, tasks, max_workers * TASKS_PER_WORKER
+            )
+
+
+def _process_windowed(
+    executor: Executor,
+    worker: Callable[[Any], R],
+    tasks: Iterable[Any],
+    max_in_flight: int,
+) -> Iterator[R]:
+    """Keep at most `max_in_flight` tasks submitted, refilling as they complete"""
+
+    tasks_iter = iter(tasks)
+
+    in_flight = {executor.submit(worker, t) for t in islice(tasks_iter, max_in_flight)}
+
+    while in_flight:
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+
+        in_flight.update(
+            executor.submit(worker, t) for t in islice(tasks_iter, len(done))
+        )
+
+        yield from (f.result() for f in done)
+
+
+def _process_throttled(
+    executor: Executor,
+    worker: Callable[[Any], R],
+    tasks: Iterable[Any],
+    throttle: AdaptiveThrottle,
+) -> Iterator[R]:
+    """Keep as many tasks running as `throttle` currently allows"""
+
+    tasks_iter = iter(tasks)
+    in_flight: Set["Future[R]"] = set()
+
+    while True:
+        free_slots = throttle.limit - len(in_flight)
+        if free_slots > 0:
+            in_flight.update(
+                executor.submit(worker, t) for t in islice(tasks_iter, free_slots)
+            )
+
+        if not in_flight:
+            return
+
+        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+
+        for future in done:
+            task_result = future.result()
+            throttle.on_success()
+            yield task_result
+
+
+def chunk_iter(tasks: Iterable[T], size: int) -> Iterator[List[T]]:
+    tasks_iter = iter(tasks)
+
+    while True:
+        chunk = list(islice(tasks_iter, size))
+        if not chunk:
+            return
+
+        yield chunk
+
+
+def prefetch_iter(tasks: Iterable[T], max_size: int) -> Iterator[T]:
+    """Consume `tasks` in a background thread, keeping at most `max_size` ready
+
+    Producer blocks when the buffer is full, so it never runs more than
+    `max_size` items ahead of the consumer. Errors raised by the producer
+    are re-raised in the consumer thread.
+    """
+
+    buffer: "queue.Queue[Any]" = queue.Queue(maxsize=max_size)
+    stop_event = threading.Event()
+
+    producer = threading.Thread(
+        target=_produce, args=(tasks, buffer, stop_event), daemon=True
+    )
+    producer.start()
+
+    try:
+        while True:
+            task = buffer.get()
+
+            if isinstance(task, _ProducerDone):
+                break
+            if isinstance(task, _ProducerError):
+                raise task.error
+
+            yield task
+    finally:
+        stop_event.set()
+        producer.join()
+
+
+def _produce(
+    tasks: Iterable[Any], buffer: "queue.Queue[Any]", stop_event: threading.Event
+) -> None:
+    try:
+        for task in tasks:
+            if not _put_until_stopped(buffer, task, stop_event):
+                return
+    except Exception as e:
+        _put_until_stopped(buffer, _ProducerError(e), stop_event)
+        return
+
+    _put_until_stopped(buffer, _ProducerDone(), stop_event)
+
+
+def _put_until_stopped(
+    buffer: "queue.Queue[Any]", task: Any, stop_event: threading.Event
+) -> bool:
+    while not stop_event.is_set():
+        try:
+            buffer.put(task, timeout=QUEUE_POLL_INTERVAL)
+        except queue.Full:
+            continue
+        return True
 
-            yield from (f.result() for f in as_completed(futures))
+    return False
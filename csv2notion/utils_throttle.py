@@ -0,0 +1,109 @@
+import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import requests
+
+# seconds to wait if server asked to slow down without saying for how long
+DEFAULT_BACKOFF = 1.0
+MAX_BACKOFF = 60.0
+
+# statuses worth retrying an idempotent request on
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+# throughput drop (relative to previous window) tolerated before shrinking
+RATE_TOLERANCE = 0.9
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveThrottle(object):  # noqa: WPS230
+    """AIMD concurrency limit shared by upload threads
+
+    Limit grows by one after every window of `limit` finished tasks
+    while throughput keeps up, and is halved when server asks to slow down.
+    All requests are paused for the time server asked to wait (Retry-After).
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1) -> None:
+        self.max_limit = max(max_limit, min_limit)
+        self.min_limit = min_limit
+        self.limit = min_limit
+
+        self._lock = threading.Lock()
+        self._pause_until = 0.0
+        self._last_rate = 0.0
+        self._window_done = 0
+        self._window_start = time.monotonic()
+
+    def on_success(self) -> None:
+        with self._lock:
+            self._window_done += 1
+
+            if self._window_done < self.limit:
+                return
+
+            now = time.monotonic()
+            rate = self._window_done / max(now - self._window_start, 1e-6)
+
+            if rate >= self._last_rate * RATE_TOLERANCE:
+                self.limit = min(self.limit + 1, self.max_limit)
+            else:
+                self.limit = max(self.limit - 1, self.min_limit)
+
+            self._last_rate = rate
+            self._reset_window(now)
+
+    def on_throttle(self, retry_after: Optional[float] = None) -> None:
+        delay = DEFAULT_BACKOFF if retry_after is None else retry_after
+        delay = min(delay, MAX_BACKOFF)
+
+        with self._lock:
+            now = time.monotonic()
+
+            # many requests are throttled at once, shrink only once per pause
+            if now >= self._pause_until:
+                self.limit = max(self.limit // 2, self.min_limit)
+                logger.debug(f"Throttled, reducing upload threads to {self.limit}")
+
+            self._pause_until = max(self._pause_until, now + delay)
+            self._last_rate = 0
+            self._reset_window(now)
+
+    def wait(self) -> None:
+        delay = self._pause_until - time.monotonic()
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def _reset_window(self, now: float) -> None:
+        self._window_done = 0
+        self._window_start = now
+
+
+def get_retry_after(response: requests.Response) -> Optional[float]:
+    retry_after = response.headers.get("Retry-After")
+
+    if retry_after is None:
+        return None
+
+    try:
+        return max(float(retry_after), 0)
+    except ValueError:
+        pass  # noqa: WPS420
+
+    try:
+        retry_date = parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+
+    return max(retry_date.timestamp() - time.time(), 0)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    if retry_after is not None:
+        return min(retry_after, MAX_BACKOFF)
+
+    return min(DEFAULT_BACKOFF * (1 << min(attempt, 6)), MAX_BACKOFF)
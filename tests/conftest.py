@@ -3,6 +3,11 @@ import base64
 import pytest
 
 from tests.fixtures.db_maker import db_maker  # noqa: F401
+from tests.fixtures.fake_notion import fake_notion  # noqa: F401
+from tests.fixtures.offline_client import (  # noqa: F401
+    make_response,
+    offline_client,
+)
 from tests.fixtures.vcr_uuid4 import vcr_uuid4  # noqa: F401
 
 
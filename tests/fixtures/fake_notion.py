@@ -0,0 +1,9 @@
+import pytest
+
+from tests.fixtures.fake_notion_server import FakeNotionServer
+
+
+@pytest.fixture()
+def fake_notion():
+    with FakeNotionServer() as server:
+        yield server
@@ -0,0 +1,419 @@
+"""In-process fake of the unofficial Notion API for offline load testing.
+
+Records are kept in memory and transactions are applied to them with
+the SDK's own RecordStore logic, so csv2notion can create, query and update
+databases against it. Latency, jitter and rate limiting are configurable.
+"""
+
+import json
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from notion.store import Missing, RecordStore
+
+from csv2notion.notion_db_client import NotionClientExtended
+
+Response = Tuple[int, Dict[str, str], Dict[str, Any]]
+
+FAKE_FILE_HOST = "https://prod-files-secure.s3.us-west-2.amazonaws.com"
+
+
+class FakeNotionServer(object):  # noqa: WPS214
+    def __init__(
+        self,
+        latency: float = 0,
+        jitter: float = 0,
+        rate_limit: float = 0,
+        retry_after: Optional[float] = 0.1,
+        seed: int = 0,
+    ) -> None:
+        """Fake Notion API server
+
+        Args:
+            latency: seconds to wait before answering every request
+            jitter: max random deviation from latency, in seconds
+            rate_limit: share of requests answered with 429
+            retry_after: Retry-After sent with 429, None to omit the header
+            seed: seed for jitter and rate limiting, to make runs repeatable
+        """
+
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+
+        self.requests: "Counter[str]" = Counter()
+        self.max_in_flight: "Counter[str]" = Counter()
+        self.rate_limited: "Counter[str]" = Counter()
+        self.uploads: Dict[str, bytes] = {}
+
+        self.store = RecordStore(None)
+        self.user_id = str(uuid.uuid4())
+        self.space_id = str(uuid.uuid4())
+
+        self._lock = threading.Lock()
+        self._in_flight: "Counter[str]" = Counter()
+        self._random = random.Random(seed)
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+        self._endpoints: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+            "loadUserContent": self._load_user_content,
+            "getRecordValues": self._get_record_values,
+            "syncRecordValues": self._sync_record_values,
+            "loadPageChunk": self._load_page_chunk,
+            "submitTransaction": self._submit_transaction,
+            "queryCollection": self._query_collection,
+            "getUploadFileUrl": self._get_upload_file_url,
+            "getPublicPageData": self._get_public_page_data,
+            "findUser": self._find_user,
+        }
+
+        self._init_workspace()
+
+    def __enter__(self) -> "FakeNotionServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        if self._httpd is None:
+            raise RuntimeError("Server is not running")
+
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.url}api/v3/"
+
+    def start(self) -> None:
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FakeNotionHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake_notion = self  # type: ignore
+
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._httpd is None:
+            return
+
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._httpd = None
+
+    def make_client(self, **options: Any) -> NotionClientExtended:
+        client = NotionClientExtended(token_v2="fake_token", api_base_url=self.api_url)
+        client.options = options
+        return client
+
+    def get_record(self, table: str, record_id: str) -> Optional[Dict[str, Any]]:
+        record = self.store._get(table, record_id)
+        return None if record is Missing else record
+
+    def get_rows(self, collection_id: str) -> List[Dict[str, Any]]:
+        """Alive rows of the collection, in creation order"""
+
+        blocks = list(self.store._values["block"].values())
+
+        return [
+            b
+            for b in blocks
+            if b.get("parent_table") == "collection"
+            and b.get("parent_id") == collection_id
+            and b.get("alive", True)
+        ]
+
+    def handle(self, method: str, path: str, body: bytes) -> Response:
+        with self._lock:
+            self.requests[path] += 1
+            self._in_flight[path] += 1
+            self.max_in_flight[path] = max(
+                self.max_in_flight[path], self._in_flight[path]
+            )
+
+        try:
+            return self._respond(method, path, body)
+        finally:
+            with self._lock:
+                self._in_flight[path] -= 1
+
+    def _respond(self, method: str, path: str, body: bytes) -> Response:
+        self._delay()
+
+        if self._is_rate_limited():
+            self.rate_limited[path] += 1
+            headers = {}
+            if self.retry_after is not None:
+                headers["Retry-After"] = str(self.retry_after)
+            return 429, headers, {"message": "Rate limited"}
+
+        if method == "PUT":
+            return self._put_upload(path, body)
+
+        endpoint = path.rsplit("/", 1)[-1]
+        handler = self._endpoints.get(endpoint)
+        if method != "POST" or handler is None:
+            return 400, {}, {"message": f"Unsupported endpoint: {path}"}
+
+        try:
+            with self._lock:
+                return 200, {}, handler(json.loads(body or b"{}"))
+        except Exception as e:  # noqa: B902
+            return 500, {}, {"message": repr(e)}
+
+    def _delay(self) -> None:
+        with self._lock:
+            deviation = self._random.uniform(-self.jitter, self.jitter)
+
+        delay = self.latency + deviation
+        if delay > 0:
+            time.sleep(delay)
+
+    def _is_rate_limited(self) -> bool:
+        if not self.rate_limit:
+            return False
+
+        with self._lock:
+            return self._random.random() < self.rate_limit
+
+    def _init_workspace(self) -> None:
+        self._set_record(
+            "notion_user",
+            self.user_id,
+            {
+                "id": self.user_id,
+                "email": "fake@example.com",
+                "given_name": "Fake",
+                "family_name": "User",
+            },
+        )
+        self._set_record(
+            "space",
+            self.space_id,
+            {
+                "id": self.space_id,
+                "name": "Fake workspace",
+                "pages": [],
+                "permissions": [
+                    {
+                        "role": "editor",
+                        "type": "user_permission",
+                        "user_id": self.user_id,
+                    }
+                ],
+            },
+        )
+
+    def _set_record(self, table: str, record_id: str, record: Dict[str, Any]) -> None:
+        record.setdefault("version", 1)
+        self.store._update_record(table, record_id, value=record, role="editor")
+
+    def _record_map(self, pointers: List[Tuple[str, str]]) -> Dict[str, Any]:
+        record_map: Dict[str, Dict[str, Any]] = {}
+
+        for table, record_id in pointers:
+            record = self.get_record(table, record_id)
+            if record is not None:
+                record_map.setdefault(table, {})[record_id] = {
+                    "role": "editor",
+                    "value": record,
+                }
+
+        return record_map
+
+    def _load_user_content(self, _: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "recordMap": self._record_map(
+                [("notion_user", self.user_id), ("space", self.space_id)]
+            )
+        }
+
+    def _get_record_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        results = []
+
+        for request in data["requests"]:
+            record = self.get_record(request["table"], request["id"])
+            results.append(
+                {} if record is None else {"role": "editor", "value": record}
+            )
+
+        return {"results": results}
+
+    def _sync_record_values(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # like the real server, only records newer than known version are sent
+        pointers = [
+            (r["pointer"]["table"], r["pointer"]["id"])
+            for r in data["requests"]
+            if self._get_version(r["pointer"]) > r.get("version", -1)
+        ]
+        return {"recordMap": self._record_map(pointers)}
+
+    def _load_page_chunk(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        page_id = data["page"]["id"]
+        page = self.get_record("block", page_id) or {}
+
+        pointers = [("block", page_id)]
+        pointers += [("block", b_id) for b_id in page.get("content", [])]
+
+        if page.get("collection_id"):
+            pointers += [("collection", page["collection_id"])]
+            pointers += [("collection_view", v_id) for v_id in page.get("view_ids", [])]
+
+        return {"recordMap": self._record_map(pointers), "cursor": {"stack": []}}
+
+    def _submit_transaction(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        self.store.run_local_operations(data["operations"])
+
+        for operation in data["operations"]:
+            self.store._role[operation["table"]][operation["id"]] = "editor"
+
+        updated = {(op["table"], op["id"]) for op in data["operations"]}
+        for table, record_id in updated:
+            record = self.get_record(table, record_id)
+            if record is not None:
+                record["version"] = record.get("version", 0) + 1
+
+        return {}
+
+    def _get_version(self, pointer: Dict[str, str]) -> int:
+        record = self.get_record(pointer["table"], pointer["id"]) or {}
+        return int(record.get("version", 0))
+
+    def _query_collection(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        loader = data["loader"]
+        rows = self.get_rows(data["collection"]["id"])
+
+        if loader.get("filter"):
+            rows = [r for r in rows if _match_filter(r, loader["filter"])]
+
+        reducer_results = {}
+        row_ids: List[str] = []
+
+        for name, reducer in loader["reducers"].items():
+            if reducer["type"] == "aggregation":
+                reducer_results[name] = {
+                    "type": "aggregation",
+                    "aggregationResult": {"type": "number", "value": len(rows)},
+                }
+            else:
+                row_ids = [r["id"] for r in rows[: reducer.get("limit", 50)]]
+                reducer_results[name] = {
+                    "type": "results",
+                    "blockIds": row_ids,
+                    "total": len(rows),
+                }
+
+        return {
+            "result": {"type": "reducer", "reducerResults": reducer_results},
+            "recordMap": self._record_map([("block", r_id) for r_id in row_ids]),
+        }
+
+    def _get_upload_file_url(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        file_id = str(uuid.uuid4())
+        file_url = f"{FAKE_FILE_HOST}/{self.space_id}/{file_id}/{data['name']}"
+
+        return {
+            "url": file_url,
+            "signedGetUrl": file_url,
+            "signedPutUrl": f"{self.url}upload/{file_id}",
+        }
+
+    def _get_public_page_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"spaceId": self.space_id, "spaceName": "Fake workspace"}
+
+    def _find_user(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        user = self.get_record("notion_user", self.user_id) or {}
+
+        if data.get("email") != user.get("email"):
+            return {}
+
+        return {"value": {"role": "reader", "value": user}}
+
+    def _put_upload(self, path: str, body: bytes) -> Response:
+        file_id = path.rsplit("/", 1)[-1]
+
+        with self._lock:
+            self.uploads[file_id] = body
+
+        return 200, {}, {}
+
+
+class _FakeNotionHandler(BaseHTTPRequestHandler):
+    # keep connections alive, like the real server does
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._handle("POST")
+
+    def do_PUT(self) -> None:  # noqa: N802
+        self._handle("PUT")
+
+    def log_message(self, *args: Any) -> None:
+        """Keep test output clean"""
+
+    def _handle(self, method: str) -> None:
+        fake_notion: FakeNotionServer = self.server.fake_notion  # type: ignore
+
+        status, headers, payload = fake_notion.handle(
+            method, self.path, self._read_body()
+        )
+        response_body = json.dumps(payload).encode("utf-8")
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response_body)))
+        for header, header_value in headers.items():
+            self.send_header(header, header_value)
+        self.end_headers()
+
+        self.wfile.write(response_body)
+
+    def _read_body(self) -> bytes:
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            return self._read_chunked()
+
+        content_length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(content_length)
+
+    def _read_chunked(self) -> bytes:
+        chunks = []
+
+        while True:
+            chunk_size = int(self.rfile.readline().split(b";")[0], 16)
+            if chunk_size == 0:
+                self.rfile.readline()
+                return b"".join(chunks)
+
+            chunks.append(self.rfile.read(chunk_size))
+            self.rfile.readline()
+
+
+def _match_filter(row: Dict[str, Any], query_filter: Dict[str, Any]) -> bool:
+    if "filters" in query_filter:
+        matches = (_match_filter(row, f) for f in query_filter["filters"])
+        return any(matches) if query_filter.get("operator") == "or" else all(matches)
+
+    if query_filter.get("property") != "title":
+        raise ValueError(f"Unsupported filter: {query_filter}")
+
+    property_filter = query_filter["filter"]
+    if property_filter["operator"] != "string_is":
+        raise ValueError(f"Unsupported filter: {query_filter}")
+
+    # like the real server, comparison is not case sensitive
+    title = _plain_text(row.get("properties", {}).get("title", []))
+    return title.lower() == property_filter["value"]["value"].lower()
+
+
+def _plain_text(rich_text: List[List[Any]]) -> str:
+    return "".join(segment[0] for segment in rich_text)
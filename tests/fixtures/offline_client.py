@@ -0,0 +1,32 @@
+import pytest
+import requests
+from notion.store import RecordStore
+
+from csv2notion.notion_db_client import NotionClientExtended
+
+
+@pytest.fixture()
+def offline_client(mocker):
+    """Client with local store only, requests go to mocked `post` and `session`"""
+
+    client = NotionClientExtended.__new__(NotionClientExtended)
+    client.options = {}
+    client.session = mocker.Mock()
+    client._batch_operations = None
+    client._deferred_transactions = None
+    client._monitor = None
+    client._store = RecordStore(client)
+    client.current_user = mocker.Mock(id="user")
+    client.post = mocker.Mock()
+    return client
+
+
+@pytest.fixture()
+def make_response():
+    def response_maker(status_code, **headers):
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        return response
+
+    return response_maker
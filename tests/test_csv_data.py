@@ -0,0 +1,98 @@
+import pytest
+
+from csv2notion.csv_data import CSVData, StreamingCSVData
+from csv2notion.utils_exceptions import CriticalError
+
+
+@pytest.fixture()
+def csv_file(tmp_path):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b,c\na1,1,x\na2,2,y\na3,3,z\n")
+    return test_file
+
+
+@pytest.mark.parametrize("csv_data_class", [CSVData, StreamingCSVData])
+def test_csv_data_read(csv_file, csv_data_class):
+    csv_data = csv_data_class(csv_file)
+
+    assert len(csv_data) == 3
+    assert csv_data.columns == ["a", "b", "c"]
+    assert csv_data.key_column == "a"
+    assert csv_data.content_columns == ["b", "c"]
+    assert csv_data.types == {"b": "number", "c": "text"}
+    assert list(csv_data) == [
+        {"a": "a1", "b": "1", "c": "x"},
+        {"a": "a2", "b": "2", "c": "y"},
+        {"a": "a3", "b": "3", "c": "z"},
+    ]
+
+
+@pytest.mark.parametrize("csv_data_class", [CSVData, StreamingCSVData])
+def test_csv_data_drop_columns(csv_file, csv_data_class):
+    csv_data = csv_data_class(csv_file)
+
+    csv_data.drop_columns("b")
+
+    assert csv_data.columns == ["a", "c"]
+    assert csv_data.types == {"c": "text"}
+    assert csv_data.col_values("c") == ["x", "y", "z"]
+    assert all("b" not in row for row in csv_data)
+
+
+@pytest.mark.parametrize("csv_data_class", [CSVData, StreamingCSVData])
+def test_csv_data_drop_rows(csv_file, csv_data_class):
+    csv_data = csv_data_class(csv_file)
+
+    csv_data.drop_rows("a1", "a3")
+
+    assert len(csv_data) == 1
+    assert csv_data.col_values("a") == ["a2"]
+
+
+@pytest.mark.parametrize("csv_data_class", [CSVData, StreamingCSVData])
+def test_csv_data_replace_values(csv_file, csv_data_class):
+    csv_data = csv_data_class(csv_file)
+
+    csv_data.replace_values("c", {"x", "z"}, "")
+
+    assert csv_data.col_values("c") == ["", "y", ""]
+
+
+@pytest.mark.parametrize("csv_data_class", [CSVData, StreamingCSVData])
+def test_csv_data_empty(tmp_path, csv_data_class):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b,c\n")
+
+    csv_data = csv_data_class(test_file)
+
+    assert len(csv_data) == 0
+    assert not csv_data.columns
+
+
+@pytest.mark.parametrize("csv_data_class", [CSVData, StreamingCSVData])
+def test_csv_data_not_found(tmp_path, csv_data_class):
+    with pytest.raises(CriticalError) as e:
+        csv_data_class(tmp_path / "missing.csv")
+
+    assert "not found" in str(e.value)
+
+
+def test_streaming_csv_data_excess_columns(tmp_path, caplog):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b\na1,b1,extra\na2,b2,extra\n")
+
+    csv_data = StreamingCSVData(test_file)
+
+    assert list(csv_data) == [{"a": "a1", "b": "b1"}, {"a": "a2", "b": "b2"}]
+    assert caplog.text.count("Inconsistent number of columns detected") == 1
+
+
+@pytest.mark.parametrize("csv_data_class", [CSVData, StreamingCSVData])
+def test_csv_data_type_sample_rows(tmp_path, csv_data_class):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b\na1,1\na2,2\na3,x\n")
+
+    csv_data = csv_data_class(test_file, type_sample_rows=2)
+
+    assert csv_data.types == {"b": "number"}
+    assert len(csv_data) == 3
@@ -0,0 +1,445 @@
+import json
+import time
+
+import pytest
+import requests
+
+from csv2notion.cli import cli
+from csv2notion.csv_data import CSVData
+from csv2notion.notion_db import NotionDB, notion_db_from_csv
+from csv2notion.utils_exceptions import NotionError
+
+
+def _cli_fake(fake_notion, *args):
+    cli("--token", "fake_token", "--api-url", fake_notion.api_url, *args)
+
+
+def _collection(fake_notion):
+    collections = list(fake_notion.store._values["collection"].values())
+    assert len(collections) == 1
+    return collections[0]
+
+
+def _db_url(fake_notion):
+    page_id = _collection(fake_notion)["parent_id"]
+    return "https://www.notion.so/{0}".format(page_id.replace("-", ""))
+
+
+def _rows(fake_notion):
+    collection = _collection(fake_notion)
+    columns = {c_id: c["name"] for c_id, c in collection["schema"].items()}
+
+    return [
+        {
+            columns[c_id]: "".join(s[0] for s in c_val) if c_val else ""
+            for c_id, c_val in row["properties"].items()
+            if c_id in columns
+        }
+        for row in fake_notion.get_rows(collection["id"])
+    ]
+
+
+def _write_csv(tmp_path, rows_count, value="v"):
+    test_file = tmp_path / "test.csv"
+    csv_rows = [f"k{i},{value}{i}" for i in range(rows_count)]
+    test_file.write_text("\n".join(["a,b", *csv_rows]))
+    return test_file
+
+
+def test_fake_notion_new_db(tmp_path, fake_notion):
+    test_file = _write_csv(tmp_path, 10)
+
+    _cli_fake(fake_notion, "--max-threads=4", str(test_file))
+
+    test_rows = sorted(_rows(fake_notion), key=lambda r: int(r["a"][1:]))
+    assert test_rows == [{"a": f"k{i}", "b": f"v{i}"} for i in range(10)]
+
+
+def test_fake_notion_merge(tmp_path, fake_notion):
+    _cli_fake(fake_notion, str(_write_csv(tmp_path, 5)))
+
+    _cli_fake(
+        fake_notion,
+        "--url",
+        _db_url(fake_notion),
+        "--merge",
+        "--merge-prefetch-keys",
+        str(_write_csv(tmp_path, 6, value="new")),
+    )
+
+    test_rows = sorted(_rows(fake_notion), key=lambda r: r["a"])
+    assert test_rows == [{"a": f"k{i}", "b": f"new{i}"} for i in range(6)]
+
+
+def test_fake_notion_rate_limited(tmp_path, fake_notion):
+    fake_notion.rate_limit = 0.3
+    fake_notion.retry_after = 0.01
+
+    _cli_fake(
+        fake_notion,
+        "--max-threads=4",
+        "--adaptive-threads",
+        str(_write_csv(tmp_path, 20)),
+    )
+
+    assert len(_rows(fake_notion)) == 20
+    assert sum(fake_notion.rate_limited.values()) > 0
+
+
+def test_fake_notion_upload_file(tmp_path, fake_notion):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b\na1,test.txt")
+    (tmp_path / "test.txt").write_text("test content")
+
+    _cli_fake(fake_notion, "--column-types", "file", str(test_file))
+
+    assert list(fake_notion.uploads.values()) == [b"test content"]
+    assert _rows(fake_notion)[0]["b"] == "test.txt"
+
+
+def test_fake_notion_processes(tmp_path, fake_notion):
+    test_file = _write_csv(tmp_path, 20)
+
+    _cli_fake(fake_notion, "--processes=2", "--max-threads=2", str(test_file))
+
+    test_rows = sorted(_rows(fake_notion), key=lambda r: int(r["a"][1:]))
+    assert test_rows == [{"a": f"k{i}", "b": f"v{i}"} for i in range(20)]
+
+
+def test_fake_notion_async_engine(tmp_path, fake_notion):
+    _cli_fake(fake_notion, str(_write_csv(tmp_path, 1)))
+    db_url = _db_url(fake_notion)
+    fake_notion.latency = 0.02
+
+    _cli_fake(
+        fake_notion,
+        "--url",
+        db_url,
+        "--engine=async",
+        "--max-threads=4",
+        str(_write_csv(tmp_path, 20)),
+    )
+
+    assert fake_notion.max_in_flight["/api/v3/submitTransaction"] > 1
+
+    # rows added concurrently are all kept in view order
+    test_rows = sorted(_rows(fake_notion), key=lambda r: int(r["a"][1:]))
+    assert len(test_rows) == 21
+
+    collection = _collection(fake_notion)
+    page = fake_notion.get_record("block", collection["parent_id"])
+    view = fake_notion.get_record("collection_view", page["view_ids"][0])
+    assert sorted(view["page_sort"]) == sorted(
+        r["id"] for r in fake_notion.get_rows(collection["id"])
+    )
+
+
+def test_fake_notion_processes_stop(tmp_path, fake_notion):
+    fake_notion.latency = 0.02
+
+    test_file = tmp_path / "test.csv"
+    csv_rows = [f"k{i},v{i}" for i in range(1, 200)]
+    test_file.write_text("\n".join(["a,b", "k0,", *csv_rows]))
+
+    with pytest.raises(NotionError):
+        _cli_fake(
+            fake_notion,
+            "--processes=2",
+            "--max-threads=2",
+            "--mandatory-column=b",
+            str(test_file),
+        )
+
+    # first row fails one worker, the other stops before uploading its rows
+    assert len(_rows(fake_notion)) < 50
+
+
+def test_fake_notion_rate_limit_response(fake_notion):
+    fake_notion.rate_limit = 1
+
+    response = requests.post(f"{fake_notion.api_url}loadUserContent", json={})
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "0.1"
+    assert fake_notion.rate_limited["/api/v3/loadUserContent"] == 1
+
+
+def test_fake_notion_latency(fake_notion):
+    fake_notion.latency = 0.05
+    fake_notion.jitter = 0.01
+
+    time_start = time.monotonic()
+    fake_notion.make_client()
+
+    assert time.monotonic() - time_start >= 0.04
+
+
+def test_fake_notion_upload_file_threads(tmp_path, fake_notion):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b,c\na1,f1.txt,f3.txt\na2,f2.txt,f1.txt")
+    for i in range(1, 4):
+        (tmp_path / f"f{i}.txt").write_text(f"content {i}")
+
+    _cli_fake(
+        fake_notion,
+        "--column-types",
+        "file,file",
+        "--file-upload-threads=4",
+        "--icon-column=b",
+        "--icon-column-keep",
+        str(test_file),
+    )
+
+    test_rows = sorted(_rows(fake_notion), key=lambda r: r["a"])
+    assert test_rows == [
+        {"a": "a1", "b": "f1.txt", "c": "f3.txt"},
+        {"a": "a2", "b": "f2.txt", "c": "f1.txt"},
+    ]
+    assert sorted(fake_notion.uploads.values()) == [
+        b"content 1",
+        b"content 1",
+        b"content 1",
+        b"content 2",
+        b"content 2",
+        b"content 3",
+    ]
+
+
+def test_fake_notion_preflight_files(tmp_path, fake_notion, caplog):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text('a,b\na1,"f1.txt, missing.txt"\na2,f1.txt')
+    (tmp_path / "f1.txt").write_text("content 1")
+
+    _cli_fake(
+        fake_notion,
+        "--column-types",
+        "file",
+        "--preflight-files",
+        "--processes=2",
+        str(test_file),
+    )
+
+    test_rows = sorted(_rows(fake_notion), key=lambda r: r["a"])
+    assert test_rows == [{"a": "a1", "b": "f1.txt"}, {"a": "a2", "b": "f1.txt"}]
+    assert list(fake_notion.uploads.values()) == [b"content 1", b"content 1"]
+    assert caplog.text.count("missing.txt") == 1
+
+
+def _make_relation_db(fake_notion, tmp_path):
+    relation_file = tmp_path / "relation.csv"
+    relation_file.write_text("r\nr1\nr2")
+    _cli_fake(fake_notion, str(relation_file))
+    relation_id = _collection(fake_notion)["id"]
+
+    main_file = tmp_path / "main.csv"
+    main_file.write_text("a,b,c\nx,y,z")
+    main_db = NotionDB(
+        fake_notion.make_client(),
+        notion_db_from_csv(fake_notion.make_client(), "main", CSVData(main_file))[1],
+    )
+
+    b_id = main_db.columns["b"]["id"]
+    c_id = main_db.columns["c"]["id"]
+    main_db.collection.set(
+        f"schema.{b_id}",
+        {"name": "b", "type": "relation", "collection_id": relation_id},
+    )
+    main_db.collection.set(f"schema.{c_id}", {"name": "c", "type": "person"})
+
+    return main_db.collection.get("parent_id"), relation_id
+
+
+def test_fake_notion_metadata_cache(tmp_path, fake_notion, caplog):
+    page_id, relation_id = _make_relation_db(fake_notion, tmp_path)
+    db_url = "https://www.notion.so/{0}".format(page_id.replace("-", ""))
+    cache_file = tmp_path / "metadata.json"
+
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b,c\nk1,r1,fake@example.com")
+
+    def run():
+        fake_notion.requests.clear()
+        _cli_fake(
+            fake_notion,
+            "--url",
+            db_url,
+            "--merge",
+            "--metadata-cache",
+            str(cache_file),
+            str(test_file),
+        )
+        return fake_notion.requests.copy()
+
+    cold_requests = run()
+    warm_requests = run()
+
+    assert warm_requests["/api/v3/syncRecordValues"] == 1
+    assert warm_requests["/api/v3/getRecordValues"] < (
+        cold_requests["/api/v3/getRecordValues"]
+    )
+
+    # renamed row is not in cached row keys, which are refetched
+    relation_row = fake_notion.get_rows(relation_id)[0]
+    relation_row["properties"]["title"] = [["r3"]]
+    test_file.write_text("a,b,c\nk1,r3,fake@example.com")
+
+    run()
+
+    assert "is not a valid value" not in caplog.text
+
+
+def test_fake_notion_metadata_cache_renamed_row(tmp_path, fake_notion, caplog):
+    page_id, relation_id = _make_relation_db(fake_notion, tmp_path)
+    db_url = "https://www.notion.so/{0}".format(page_id.replace("-", ""))
+    cache_file = tmp_path / "metadata.json"
+
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b\nk1,r1")
+
+    def run():
+        _cli_fake(
+            fake_notion,
+            "--url",
+            db_url,
+            "--merge",
+            "--metadata-cache",
+            str(cache_file),
+            str(test_file),
+        )
+
+    run()
+
+    # renamed row must not be found by its old title
+    relation_row = next(
+        r
+        for r in fake_notion.get_rows(relation_id)
+        if r["properties"]["title"] == [["r1"]]
+    )
+    relation_row["properties"]["title"] = [["r9"]]
+    relation_row["version"] += 1
+
+    caplog.clear()
+    run()
+
+    assert "is not a valid value" in caplog.text
+
+
+def test_fake_notion_processes_add_missing_relations(tmp_path, fake_notion):
+    page_id, relation_id = _make_relation_db(fake_notion, tmp_path)
+    db_url = "https://www.notion.so/{0}".format(page_id.replace("-", ""))
+
+    # rows are handled by different processes
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b\nk1,r3\nk4,r3")
+
+    _cli_fake(
+        fake_notion,
+        "--url",
+        db_url,
+        "--processes=2",
+        "--add-missing-relations",
+        str(test_file),
+    )
+
+    relation_rows = fake_notion.get_rows(relation_id)
+    relation_titles = [r["properties"]["title"][0][0] for r in relation_rows]
+    assert sorted(relation_titles) == ["r1", "r2", "r3"]
+
+
+def test_fake_notion_metadata_cache_processes(tmp_path, fake_notion):
+    page_id, relation_id = _make_relation_db(fake_notion, tmp_path)
+    db_url = "https://www.notion.so/{0}".format(page_id.replace("-", ""))
+    cache_file = tmp_path / "metadata.json"
+
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b,c\nk1,r1,fake@example.com\nk2,r1,")
+
+    _cli_fake(
+        fake_notion,
+        "--url",
+        db_url,
+        "--merge",
+        "--processes=2",
+        "--metadata-cache",
+        str(cache_file),
+        str(test_file),
+    )
+
+    # relation rows are only loaded by worker processes
+    cache_data = json.loads(cache_file.read_text())
+    assert cache_data["rows"][relation_id]["count"] == 2
+
+
+def test_fake_notion_sync_state(tmp_path, fake_notion, caplog):
+    _cli_fake(fake_notion, str(_write_csv(tmp_path, 5)))
+    state_file = tmp_path / "sync.json"
+
+    def run(test_file, *args):
+        fake_notion.requests.clear()
+        _cli_fake(
+            fake_notion,
+            "--url",
+            _db_url(fake_notion),
+            "--merge",
+            "--sync-state",
+            str(state_file),
+            *args,
+            str(test_file),
+        )
+        return fake_notion.requests.copy()
+
+    run(_write_csv(tmp_path, 5))
+    unchanged_requests = run(_write_csv(tmp_path, 5))
+
+    assert "Skipped 5 unchanged rows" in caplog.text
+    assert unchanged_requests["/api/v3/submitTransaction"] == 0
+
+    test_file = _write_csv(tmp_path, 6)
+    test_file.write_text(test_file.read_text().replace("v1", "new1"))
+
+    run(test_file, "--processes=2")
+
+    assert "Skipped 4 unchanged rows" in caplog.text
+
+    test_rows = sorted(_rows(fake_notion), key=lambda r: r["a"])
+    assert test_rows[1] == {"a": "k1", "b": "new1"}
+    assert len(test_rows) == 6
+
+    run(test_file)
+
+    assert "Skipped 6 unchanged rows" in caplog.text
+
+
+def test_fake_notion_sync_state_conversion_error(tmp_path, fake_notion, caplog):
+    page_id, relation_id = _make_relation_db(fake_notion, tmp_path)
+    db_url = "https://www.notion.so/{0}".format(page_id.replace("-", ""))
+    state_file = tmp_path / "sync.json"
+
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b\nk1,r1\nk2,r3")
+
+    def run():
+        caplog.clear()
+        _cli_fake(
+            fake_notion,
+            "--url",
+            db_url,
+            "--merge",
+            "--sync-state",
+            str(state_file),
+            str(test_file),
+        )
+
+    run()
+    assert "Value 'r3' for relation" in caplog.text
+
+    # relation row appears later, row with error is not skipped
+    relation_row = fake_notion.get_rows(relation_id)[1]
+    relation_row["properties"]["title"] = [["r3"]]
+
+    run()
+    assert "Skipped 1 unchanged rows" in caplog.text
+    assert "Value 'r3' for relation" not in caplog.text
+
+    run()
+    assert "Skipped 2 unchanged rows" in caplog.text
@@ -1,6 +1,7 @@
 import pytest
 
 from csv2notion.notion_type_guess import (
+    ColumnTypeGuesser,
     guess_type_by_values,
     is_checkbox,
     is_email,
@@ -76,3 +77,35 @@ def test_is_checkbox(value, result):
 )
 def test_guess_type_by_values(values, result):
     assert guess_type_by_values(values) == result
+
+
+def test_column_type_guesser():
+    type_guesser = ColumnTypeGuesser(["a", "b", "c", "d"])
+
+    rows = [
+        {"a": "1", "b": "true", "c": "", "d": "https://google.com"},
+        {"a": "2", "b": "false", "c": " ", "d": "abc"},
+        {"a": "", "b": "1", "c": "", "d": "https://google.com"},
+    ]
+
+    for row in rows:
+        type_guesser.add_row(row)
+
+    assert type_guesser.result() == {
+        "a": "number",
+        "b": "text",
+        "c": "text",
+        "d": "text",
+    }
+    assert not type_guesser.is_resolved()
+
+
+def test_column_type_guesser_resolved():
+    type_guesser = ColumnTypeGuesser(["a", "b"])
+
+    type_guesser.add_row({"a": "abc", "b": "1"})
+    assert not type_guesser.is_resolved()
+
+    type_guesser.add_row({"a": "1", "b": "abc"})
+    assert type_guesser.is_resolved()
+    assert type_guesser.result() == {"a": "text", "b": "text"}
@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+
+import pytest
+
+from csv2notion.cli_args import parse_args
+from csv2notion.notion_convert import NotionRowConverter
+from csv2notion.utils_exceptions import NotionError
+from csv2notion.utils_static import ConversionRules
+
+
+def _make_converter(column_types, *args):
+    rules = ConversionRules.from_args(parse_args(["--token", "x", *args, "test.csv"]))
+    db = SimpleNamespace(columns={k: {"type": v} for k, v in column_types.items()})
+
+    return NotionRowConverter(db, rules)
+
+
+def test_convert_column_plan():
+    converter = _make_converter(
+        {
+            "a": "title",
+            "b": "number",
+            "c": "last_edited_time",
+            "d": "created_time",
+            "e": "created_time",
+        }
+    )
+
+    rows = [
+        {"a": "a1", "b": "1", "c": "2022-01-02", "d": "2022-01-01", "e": ""},
+        {"a": "a2", "b": "", "c": "", "d": "", "e": "2022-01-03"},
+    ]
+
+    test_rows = list(converter.iter_notion_rows(rows))
+
+    assert test_rows[0].columns == {"a": "a1", "b": 1}
+    assert list(test_rows[0].properties) == ["created_time", "last_edited_time"]
+    assert test_rows[0].properties["created_time"].day == 1
+    assert test_rows[0].properties["last_edited_time"].day == 2
+
+    assert test_rows[1].columns == {"a": "a2", "b": None}
+    assert list(test_rows[1].properties) == ["created_time"]
+    assert test_rows[1].properties["created_time"].day == 3
+
+
+def test_convert_column_plan_mandatory():
+    converter = _make_converter(
+        {"a": "title", "b": "number"}, "--mandatory-column", "b"
+    )
+
+    rows = [{"a": "a1", "b": "1"}, {"a": "a2", "b": ""}]
+
+    with pytest.raises(NotionError) as e:
+        list(converter.iter_notion_rows(rows))
+
+    assert "CSV [3]: Mandatory column 'b' is empty" in str(e.value)
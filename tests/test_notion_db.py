@@ -0,0 +1,191 @@
+from types import SimpleNamespace
+
+import pytest
+from notion.store import Missing
+
+from csv2notion.notion_db import NotionDB
+from csv2notion.notion_db_collection import CollectionExtended, LazyRowMap
+from csv2notion.notion_row import CollectionRowBlockExtended
+
+ID_A = "11111111-1111-1111-1111-111111111111"
+ID_B = "22222222-2222-2222-2222-222222222222"
+ID_C = "33333333-3333-3333-3333-333333333333"
+ID_D = "44444444-4444-4444-4444-444444444444"
+COLLECTION_ID = "55555555-5555-5555-5555-555555555555"
+
+
+@pytest.fixture()
+def offline_db(mocker):
+    client = mocker.Mock()
+    client.options = {}
+    row_ids = {"a": ID_A, "b": ID_B}
+    columns = [{"name": "key", "type": "title"}]
+
+    new_row_ids = iter([ID_C, ID_D])
+
+    db = NotionDB.__new__(NotionDB)
+    db.client = client
+    db.is_relation = False
+    db.collection = SimpleNamespace(
+        id=COLLECTION_ID,
+        get_unique_rows=lambda titles=None: LazyRowMap(
+            client, {k: v for k, v in row_ids.items() if titles is None or k in titles}
+        ),
+        get_schema_properties=lambda: columns,
+        add_row_block=lambda **kwargs: CollectionRowBlockExtended(
+            client, next(new_row_ids)
+        ),
+    )
+    db._cache_columns = {}
+    db._cache_rows = None
+    db._cache_rows_by_id = None
+    db._is_rows_cached = False
+    db._is_rows_fetched = False
+
+    return db
+
+
+def test_rows_lazy(offline_db):
+    assert "a" in offline_db.rows
+    assert "c" not in offline_db.rows
+    assert not offline_db.rows._rows
+
+    assert offline_db.rows["a"].id == ID_A
+    assert offline_db.rows["a"] is offline_db.rows["a"]
+    assert list(offline_db.rows._rows) == ["a"]
+
+    with pytest.raises(KeyError):
+        offline_db.rows["c"]
+
+
+def test_rows_by_id(offline_db):
+    assert offline_db.rows_by_id.row_ids() == {ID_A: ID_A, ID_B: ID_B}
+    assert offline_db.rows_by_id[ID_B].id == ID_B
+
+
+def test_rows_by_id_add_row(offline_db):
+    assert len(offline_db.rows_by_id) == 2
+
+    new_row = offline_db.add_row_key("c")
+
+    assert offline_db.rows["c"] is new_row
+    assert offline_db.rows_by_id[ID_C] is new_row
+
+
+def test_rows_by_id_add_row_before_index(offline_db):
+    new_row = offline_db.add_row_key("c")
+
+    assert offline_db.rows_by_id[ID_C].id == new_row.id
+    assert len(offline_db.rows_by_id) == 3
+
+
+def test_rows_row_keys(offline_db):
+    offline_db.client.options = {"row_keys": {COLLECTION_ID: {"b", "c"}}}
+
+    assert list(offline_db.rows) == ["b"]
+
+
+def test_rows_row_keys_not_found(offline_db, mocker):
+    offline_db.client.options = {"row_keys": {COLLECTION_ID: {"c"}}}
+    query_titles = mocker.Mock(return_value=[])
+    offline_db.collection = CollectionExtended(offline_db.client, COLLECTION_ID)
+    mocker.patch.object(offline_db.collection, "_query_titles", query_titles)
+
+    assert "c" not in offline_db.rows
+    assert "c" not in offline_db.rows
+    assert offline_db.find_row("c") is None
+
+    query_titles.assert_called_once_with(["c"])
+
+
+@pytest.fixture()
+def offline_collection(mocker):
+    titles = {ID_A: "a", ID_B: "A", ID_C: "a", ID_D: "b"}
+
+    client = mocker.Mock()
+    client.get_record_data.side_effect = lambda table, row_id: {
+        "properties": {"title": [[titles[row_id]]]}
+    }
+    client.post.return_value.json.return_value = {
+        "recordMap": {},
+        "result": {
+            "reducerResults": {
+                "collection_group_results": {"blockIds": [ID_A, ID_B, ID_C]},
+            },
+        },
+    }
+
+    collection = CollectionExtended(client, COLLECTION_ID)
+    mocker.patch.object(collection, "_get_a_collection_view")
+
+    return collection
+
+
+def test_get_unique_rows_titles(offline_collection):
+    rows = offline_collection.get_unique_rows({"a", "c"})
+
+    assert rows.row_ids() == {"a": ID_A}
+
+    endpoint, query = offline_collection._client.post.call_args[0]
+    query_filters = query["loader"]["filter"]["filters"]
+    assert endpoint == "queryCollection"
+    assert [f["filter"]["value"]["value"] for f in query_filters] == ["a", "c"]
+
+
+def test_get_row_ids_by_titles_batches(offline_collection, mocker):
+    mocker.patch("csv2notion.notion_db_collection.TITLE_QUERY_BATCH_SIZE", 1)
+
+    row_ids = offline_collection.get_row_ids_by_titles(["a", "b", "a"])
+
+    assert row_ids == [ID_A, ID_B, ID_C]
+    assert offline_collection._client.post.call_count == 2
+    offline_collection._client.refresh_records.assert_not_called()
+
+
+def test_get_row_ids_by_titles_missing_records(offline_collection):
+    store = offline_collection._client._store
+    store._get.side_effect = lambda table, row_id: None if row_id == ID_A else Missing
+
+    offline_collection.get_row_ids_by_titles(["a"])
+
+    offline_collection._client.get_record_data.assert_not_called()
+    offline_collection._client.refresh_records.assert_called_once_with(
+        block=[ID_B, ID_C]
+    )
+
+
+def test_add_select_options(offline_collection, mocker):
+    schema = {
+        "title": {"name": "key", "type": "title"},
+        "abcd": {"name": "tags", "type": "multi_select", "options": []},
+        "efgh": {
+            "name": "kind",
+            "type": "select",
+            "options": [{"id": "x", "value": "A", "color": "red"}],
+        },
+    }
+    mocker.patch.object(offline_collection, "get", return_value=schema)
+    set_schema = mocker.patch.object(offline_collection, "set")
+    offline_collection._client.options = {}
+
+    offline_collection.add_select_options({"abcd": ["t1", "t2"], "efgh": ["a", "b"]})
+
+    set_schema.assert_called_once_with("schema", schema)
+    assert [o["value"] for o in schema["abcd"]["options"]] == ["t1", "t2"]
+    assert [o["value"] for o in schema["efgh"]["options"]] == ["A", "b"]
+
+
+def test_add_select_options_unchanged(offline_collection, mocker):
+    schema = {
+        "efgh": {
+            "name": "kind",
+            "type": "select",
+            "options": [{"id": "x", "value": "A", "color": "red"}],
+        },
+    }
+    mocker.patch.object(offline_collection, "get", return_value=schema)
+    set_schema = mocker.patch.object(offline_collection, "set")
+
+    offline_collection.add_select_options({"efgh": ["a"]})
+
+    set_schema.assert_not_called()
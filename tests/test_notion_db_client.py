@@ -0,0 +1,120 @@
+import pytest
+import requests
+from notion.operations import build_operation
+
+
+def test_batch_transactions(offline_client):
+    with offline_client.batch_transactions():
+        for record_id in ("a", "b"):
+            offline_client.submit_transaction(
+                build_operation(id=record_id, path=["title"], args=record_id)
+            )
+
+            # local store is updated before the batch is sent
+            assert offline_client._store._get("block", record_id) is not None
+
+    offline_client.post.assert_called_once()
+
+    endpoint, data = offline_client.post.call_args[0]
+    submitted_ids = [op["id"] for op in data["operations"]]
+
+    assert endpoint == "submitTransaction"
+    assert submitted_ids == ["a", "a", "b", "b"]
+
+
+def test_batch_transactions_nested_atomic(offline_client):
+    with offline_client.batch_transactions():
+        with offline_client.as_atomic_transaction():
+            offline_client.submit_transaction(
+                build_operation(id="a", path=["title"], args="a"),
+                update_last_edited=False,
+            )
+            offline_client.submit_transaction(
+                build_operation(id="b", path=["title"], args="b"),
+                update_last_edited=False,
+            )
+
+    offline_client.post.assert_called_once()
+
+    data = offline_client.post.call_args[0][1]
+    submitted_ids = [op["id"] for op in data["operations"]]
+
+    # atomic transaction adds last edited time updates when it is submitted
+    assert submitted_ids[:2] == ["a", "b"]
+    assert sorted(submitted_ids[2:]) == ["a", "b"]
+
+
+def test_batch_transactions_error(offline_client):
+    with pytest.raises(ValueError):
+        with offline_client.batch_transactions():
+            offline_client.submit_transaction(
+                build_operation(id="a", path=["title"], args="a")
+            )
+            raise ValueError
+
+    offline_client.post.assert_not_called()
+    assert offline_client._batch_operations is None
+
+
+@pytest.fixture()
+def posting_client(offline_client):
+    # real post, requests are sent through mocked session
+    del offline_client.post
+    return offline_client
+
+
+def test_post_rate_limited(mocker, posting_client, make_response):
+    sleep = mocker.patch("csv2notion.notion_db_client.time.sleep")
+
+    posting_client.session.post.side_effect = [
+        make_response(429, **{"Retry-After": "3"}),
+        make_response(429),
+        make_response(200),
+    ]
+
+    assert posting_client.post("test", {}).status_code == 200
+    assert posting_client.session.post.call_count == 3
+    assert [c.args for c in sleep.call_args_list] == [(3,), (2,)]
+
+
+def test_post_rate_limited_throttle(mocker, posting_client, make_response):
+    throttle = mocker.Mock()
+
+    posting_client.options = {"throttle": throttle}
+    posting_client.session.post.side_effect = [
+        make_response(429, **{"Retry-After": "3"}),
+        make_response(200),
+    ]
+
+    assert posting_client.post("test", {}).status_code == 200
+    throttle.on_throttle.assert_called_once_with(3)
+    assert throttle.wait.call_count == 2
+
+
+def test_post_error(posting_client, make_response):
+    posting_client.session.post.return_value = make_response(500)
+
+    with pytest.raises(requests.HTTPError):
+        posting_client.post("test", {})
+
+
+def test_defer_transactions(offline_client):
+    with offline_client.defer_transactions() as transactions:
+        offline_client.submit_transaction(
+            build_operation(id="a", path=["title"], args="a")
+        )
+
+        with offline_client.batch_transactions():
+            for record_id in ("b", "c"):
+                offline_client.submit_transaction(
+                    build_operation(id=record_id, path=["title"], args=record_id)
+                )
+
+        assert offline_client._store._get("block", "c") is not None
+
+    offline_client.post.assert_not_called()
+
+    assert [[op["id"] for op in ops] for ops in transactions] == [
+        ["a", "a"],
+        ["b", "b", "c", "c"],
+    ]
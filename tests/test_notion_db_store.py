@@ -0,0 +1,55 @@
+from notion.store import Missing, RecordStore
+
+from csv2notion.notion_db_store import SharedRecordStore
+
+
+def test_shared_store_reads_parent(mocker):
+    record_id = "00000000-0000-0000-0000-000000000001"
+
+    parent_store = RecordStore(mocker.Mock())
+    parent_store._update_record("block", record_id, value={"title": "a"}, role="editor")
+
+    shared_store = SharedRecordStore(mocker.Mock(), parent_store)
+
+    assert shared_store._get("block", record_id) == {"title": "a"}
+    assert shared_store.get_role("block", record_id) == "editor"
+    assert shared_store._get("block", "missing") is Missing
+
+
+def test_shared_store_writes_are_local(mocker):
+    parent_store = RecordStore(mocker.Mock())
+    parent_store._update_record("block", "a", value={"title": "a"})
+
+    shared_store = SharedRecordStore(mocker.Mock(), parent_store)
+    shared_store.run_local_operation("block", "a", ["title"], "set", "b")
+
+    record = shared_store._get("block", "a")
+    record["alive"] = True
+
+    assert shared_store._get("block", "a") == {"title": "b", "alive": True}
+    assert parent_store._get("block", "a") == {"title": "a"}
+
+
+def test_shared_store_copies_only_accessed_records(mocker):
+    parent_store = RecordStore(mocker.Mock())
+    parent_store._update_record("block", "a", value={"title": "a"})
+    parent_store._update_record("block", "b", value={"title": "b"})
+
+    shared_store = SharedRecordStore(mocker.Mock(), parent_store)
+    shared_store._get("block", "a")
+
+    assert set(shared_store._values["block"]) == {"a"}
+
+
+def test_shared_store_collection_rows(mocker):
+    parent_store = RecordStore(mocker.Mock())
+    parent_store.set_collection_rows("c", ["a", "b"])
+
+    shared_store = SharedRecordStore(mocker.Mock(), parent_store)
+
+    assert shared_store.get_collection_rows("c") == ["a", "b"]
+
+    shared_store.set_collection_rows("c", ["a"])
+
+    assert shared_store.get_collection_rows("c") == ["a"]
+    assert parent_store.get_collection_rows("c") == ["a", "b"]
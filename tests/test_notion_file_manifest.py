@@ -0,0 +1,81 @@
+import logging
+
+import pytest
+
+from csv2notion.cli_args import parse_args
+from csv2notion.csv_data import CSVData
+from csv2notion.notion_file_manifest import build_file_manifest
+from csv2notion.utils_exceptions import NotionError
+from csv2notion.utils_file import file_hash_cache
+from csv2notion.utils_static import ConversionRules
+
+
+def _build_manifest(mocker, tmp_path, csv_content, column_types, *args):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text(csv_content)
+
+    rules = ConversionRules.from_args(
+        parse_args(["--token", "x", *args, str(test_file)])
+    )
+
+    db = mocker.Mock()
+    db.columns = {k: {"type": v} for k, v in column_types.items()}
+
+    return build_file_manifest(CSVData(test_file), db, rules)
+
+
+def test_file_manifest(mocker, tmp_path):
+    for file_name in ("f1.txt", "f2.txt", "img.png", "icon.png"):
+        (tmp_path / file_name).write_text(file_name)
+
+    manifest = _build_manifest(
+        mocker,
+        tmp_path,
+        'a,b,c,d,e\na1,f1.txt,text,img.png,icon.png\na2,"f2.txt, f1.txt",,,\U0001f44d',
+        {"a": "title", "b": "file", "c": "text", "d": "file", "e": "text"},
+        "--image-column=d",
+        "--icon-column=e",
+    )
+
+    assert manifest.found == {
+        tmp_path / "f1.txt",
+        tmp_path / "f2.txt",
+        tmp_path / "img.png",
+        tmp_path / "icon.png",
+    }
+    assert not manifest.missing
+    assert not manifest.banned
+    assert len(manifest) == 4
+    assert file_hash_cache.hashes().items() >= manifest.hashes.items()
+    assert len(manifest.hashes) >= 4
+
+
+def test_file_manifest_errors(mocker, tmp_path, caplog):
+    (tmp_path / "test.js").write_text("test")
+
+    with caplog.at_level(logging.ERROR, logger="csv2notion"):
+        manifest = _build_manifest(
+            mocker,
+            tmp_path,
+            'a,b\na1,missing1.txt\na2,"test.js, missing2.txt, https://x.com/f.txt"',
+            {"a": "title", "b": "file"},
+        )
+
+    assert not manifest.found
+    assert manifest.missing == {tmp_path / "missing1.txt", tmp_path / "missing2.txt"}
+    assert manifest.banned == {tmp_path / "test.js"}
+    assert "Files do not exist: missing1.txt, missing2.txt" in caplog.text
+    assert "File extensions are not allowed to upload on Notion: test.js" in (
+        caplog.text
+    )
+
+
+def test_file_manifest_fail_on_conversion_error(mocker, tmp_path):
+    with pytest.raises(NotionError, match="Error during conversion"):
+        _build_manifest(
+            mocker,
+            tmp_path,
+            "a,b\na1,missing.txt",
+            {"a": "title", "b": "file"},
+            "--fail-on-conversion-error",
+        )
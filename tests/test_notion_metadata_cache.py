@@ -0,0 +1,150 @@
+import json
+import time
+
+from csv2notion.notion_metadata_cache import CACHE_VERSION, MetadataCache
+
+
+def _write_cache(cache_file, records=None, rows=None, version=CACHE_VERSION):
+    cache_data = {"version": version, "records": records or {}, "rows": rows or {}}
+    cache_file.write_text(json.dumps(cache_data))
+
+
+def _record(record_time, record_version=1):
+    return {
+        "time": record_time,
+        "value": {"id": "c1", "version": record_version},
+        "role": "editor",
+    }
+
+
+def test_metadata_cache_rows(tmp_path):
+    cache_file = tmp_path / "cache.json"
+
+    metadata_cache = MetadataCache(cache_file)
+    metadata_cache.add_rows("c1", {"k1": "r1"}, rows_count=1, is_fetched=True)
+    metadata_cache.save()
+
+    metadata_cache = MetadataCache(cache_file)
+
+    assert metadata_cache.get_row_ids("c1", rows_count=1) == {"k1": "r1"}
+    assert metadata_cache.get_row_ids("c1", rows_count=2) is None
+    assert metadata_cache.get_row_ids("c2", rows_count=1) is None
+
+
+def test_metadata_cache_rows_keep_fetch_time(tmp_path):
+    cache_file = tmp_path / "cache.json"
+    _write_cache(
+        cache_file, rows={"c1": {"time": 100, "count": 1, "rows": {}, "versions": {}}}
+    )
+
+    metadata_cache = MetadataCache(cache_file, ttl=time.time())
+    metadata_cache.add_rows("c1", {"k1": "r1"}, rows_count=1, is_fetched=False)
+    metadata_cache.save()
+
+    rows_entry = json.loads(cache_file.read_text())["rows"]["c1"]
+    assert rows_entry["time"] == 100
+
+
+def test_metadata_cache_update(tmp_path):
+    metadata_cache = MetadataCache(tmp_path / "cache.json")
+    metadata_cache.add_rows("c1", {"k1": "r1"}, rows_count=1, is_fetched=True)
+
+    shard_cache = MetadataCache(tmp_path / "cache.json")
+    shard_cache.add_rows("c1", {}, rows_count=0, is_fetched=True)
+    shard_cache.add_rows("c2", {"k2": "r2"}, rows_count=1, is_fetched=True)
+
+    metadata_cache.update(shard_cache)
+
+    assert metadata_cache.get_row_ids("c1", rows_count=1) == {"k1": "r1"}
+    assert metadata_cache.get_row_ids("c2", rows_count=1) == {"k2": "r2"}
+
+
+def test_metadata_cache_ttl(tmp_path):
+    cache_file = tmp_path / "cache.json"
+    _write_cache(
+        cache_file,
+        records={"collection:c1": _record(time.time() - 100)},
+        rows={
+            "c1": {"time": time.time() - 100, "count": 0, "rows": {}, "versions": {}}
+        },
+    )
+
+    assert len(MetadataCache(cache_file, ttl=1000)) == 2
+    assert not MetadataCache(cache_file, ttl=10)
+
+
+def test_metadata_cache_preload(tmp_path, mocker):
+    cache_file = tmp_path / "cache.json"
+    _write_cache(
+        cache_file,
+        records={
+            "collection:c1": _record(time.time()),
+            "collection:c2": _record(time.time()),
+            "collection:c3": _record(time.time()),
+        },
+    )
+
+    client = mocker.Mock()
+    client.post.return_value.json.return_value = {
+        "recordMap": {
+            "collection": {
+                "c2": {"value": {"id": "c2", "version": 2}, "role": "editor"},
+                "c3": {"role": "none"},
+            },
+        },
+    }
+
+    metadata_cache = MetadataCache(cache_file)
+    metadata_cache.preload(client)
+
+    client.post.assert_called_once()
+    assert client._store._update_record.call_args_list == [
+        mocker.call("collection", "c1", value=_record(0)["value"], role="editor"),
+        mocker.call(
+            "collection", "c2", value={"id": "c2", "version": 2}, role="editor"
+        ),
+    ]
+    assert metadata_cache.is_validated("collection", "c1")
+    assert not metadata_cache.is_validated("collection", "c3")
+
+
+def test_metadata_cache_preload_changed_rows(tmp_path, mocker):
+    cache_file = tmp_path / "cache.json"
+
+    metadata_cache = MetadataCache(cache_file)
+    metadata_cache.add_rows(
+        "c1", {"k1": "r1"}, rows_count=1, is_fetched=True, row_versions={"r1": 1}
+    )
+    metadata_cache.add_rows(
+        "c2", {"k2": "r2"}, rows_count=1, is_fetched=True, row_versions={"r2": 1}
+    )
+    metadata_cache.save()
+
+    client = mocker.Mock()
+    client.post.return_value.json.return_value = {
+        "recordMap": {"block": {"r2": {"value": {"id": "r2", "version": 2}}}},
+    }
+
+    metadata_cache = MetadataCache(cache_file)
+    metadata_cache.preload(client)
+
+    sync_requests = client.post.call_args[0][1]["requests"]
+    assert {"pointer": {"table": "block", "id": "r1"}, "version": 1} in sync_requests
+    assert metadata_cache.get_row_ids("c1", rows_count=1) == {"k1": "r1"}
+    assert metadata_cache.get_row_ids("c2", rows_count=1) is None
+
+
+def test_metadata_cache_corrupted(tmp_path, caplog):
+    cache_file = tmp_path / "cache.json"
+    cache_file.write_text("{bad")
+
+    assert not MetadataCache(cache_file)
+    assert "corrupted" in caplog.text
+
+
+def test_metadata_cache_outdated(tmp_path, caplog):
+    cache_file = tmp_path / "cache.json"
+    _write_cache(cache_file, version=0)
+
+    assert not MetadataCache(cache_file)
+    assert "outdated" in caplog.text
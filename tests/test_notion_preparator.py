@@ -0,0 +1,59 @@
+from csv2notion.cli_args import parse_args
+from csv2notion.csv_data import CSVData
+from csv2notion.notion_preparator import NotionPreparator
+from csv2notion.utils_static import ConversionRules
+
+
+def _make_preparator(mocker, tmp_path, csv_content, column_types, *args):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text(csv_content)
+
+    rules = ConversionRules.from_args(
+        parse_args(["--token", "x", *args, str(test_file)])
+    )
+
+    db = mocker.Mock()
+    db.columns = {k: {"type": v} for k, v in column_types.items()}
+    db.relations = {}
+
+    return NotionPreparator(db, CSVData(test_file), rules)
+
+
+def test_register_select_options(mocker, tmp_path):
+    preparator = _make_preparator(
+        mocker,
+        tmp_path,
+        'a,b,c,d\na1,"t2, t1",k1,x\na2,t1,,y\na3,"t3,t2",k2,z',
+        {"a": "title", "b": "multi_select", "c": "select", "d": "text"},
+        "--register-select-options",
+    )
+
+    preparator.prepare()
+
+    preparator.db.add_select_options.assert_called_once_with(
+        {"b": ["t2", "t1", "t3"], "c": ["k1", "k2"]}
+    )
+
+
+def test_register_select_options_empty(mocker, tmp_path):
+    preparator = _make_preparator(
+        mocker,
+        tmp_path,
+        "a,b\na1,\na2,",
+        {"a": "title", "b": "select"},
+        "--register-select-options",
+    )
+
+    preparator.prepare()
+
+    preparator.db.add_select_options.assert_not_called()
+
+
+def test_register_select_options_disabled(mocker, tmp_path):
+    preparator = _make_preparator(
+        mocker, tmp_path, "a,b\na1,b1", {"a": "title", "b": "select"}
+    )
+
+    preparator.prepare()
+
+    preparator.db.add_select_options.assert_not_called()
@@ -2,6 +2,7 @@ from datetime import datetime
 
 import pytest
 
+from csv2notion.notion_row import CollectionRowBlockExtended
 from csv2notion.utils_exceptions import NotionError
 
 
@@ -65,3 +66,85 @@ def test_notion_row_bad_upload(db_maker, tmp_path, mocker, smallest_gif):
         test_row.cover = test_image
 
     assert "Could not upload file" in str(e.value)
+
+
+@pytest.fixture()
+def offline_row(offline_client):
+    collection_id = "00000000-0000-0000-0000-000000000001"
+    row_id = "00000000-0000-0000-0000-000000000002"
+
+    offline_client.options = {"is_merge_skip_unchanged": True}
+
+    offline_client._store._update_record(
+        "collection",
+        collection_id,
+        value={
+            "id": collection_id,
+            "schema": {
+                "title": {"name": "a", "type": "title"},
+                "bbbb": {"name": "b", "type": "number"},
+                "cccc": {
+                    "name": "c",
+                    "type": "select",
+                    "options": [{"id": "1", "value": "x"}],
+                },
+                "dddd": {"name": "d", "type": "text"},
+            },
+        },
+    )
+    offline_client._store._update_record(
+        "block",
+        row_id,
+        value={
+            "id": row_id,
+            "parent_id": collection_id,
+            "parent_table": "collection",
+            "created_time": 1000,
+            "properties": {"title": [["key"]], "bbbb": [["1"]], "cccc": [["x"]]},
+        },
+    )
+
+    return CollectionRowBlockExtended(offline_client, row_id)
+
+
+def test_notion_row_is_property_changed(offline_row):
+    assert not offline_row.is_property_changed("a", "key")
+    assert not offline_row.is_property_changed("b", 1)
+    assert not offline_row.is_property_changed("c", "x")
+    assert not offline_row.is_property_changed("d", "")
+
+    assert offline_row.is_property_changed("a", "new key")
+    assert offline_row.is_property_changed("b", 2)
+    assert offline_row.is_property_changed("c", "y")
+    assert offline_row.is_property_changed("d", "text")
+    assert offline_row.is_property_changed("missing", "value")
+
+
+def test_notion_row_update_unchanged(offline_row):
+    offline_row.update(
+        properties={"created_time": datetime.fromtimestamp(1)},
+        columns={"a": "key", "b": 1, "c": "x", "d": ""},
+    )
+
+    offline_row._client.post.assert_not_called()
+
+
+def test_notion_row_update_changed_only(offline_row):
+    offline_row.update(columns={"a": "key", "b": 2, "c": "x"})
+
+    offline_row._client.post.assert_called_once()
+
+    data = offline_row._client.post.call_args[0][1]
+    changed_paths = [op["path"] for op in data["operations"] if op["path"]]
+
+    assert changed_paths == [["properties", "bbbb"]]
+
+
+def test_notion_row_update_releases_files(offline_row, mocker):
+    upload_pool = mocker.Mock()
+    offline_row._client.options = {"upload_pool": upload_pool}
+
+    with pytest.raises(AttributeError):
+        offline_row.update(columns={"missing": "value"})
+
+    upload_pool.release.assert_called_once_with(offline_row)
@@ -0,0 +1,106 @@
+import logging
+
+import pytest
+import requests
+
+from csv2notion.notion_row_upload_file import (
+    MAX_PUT_ATTEMPTS,
+    PUT_CONNECT_TIMEOUT,
+    PUT_STALL_TIMEOUT,
+    FileUploadBody,
+    _put_file,
+)
+
+
+@pytest.fixture()
+def test_file(tmp_path):
+    test_file = tmp_path / "test.txt"
+    test_file.write_text("test")
+    return test_file
+
+
+def test_put_file_retry(mocker, test_file, make_response):
+    sleep = mocker.patch("csv2notion.notion_row_upload_file.time.sleep")
+    put = mocker.patch(
+        "csv2notion.notion_row_upload_file.requests.put",
+        side_effect=[
+            requests.ConnectionError(),
+            make_response(503, **{"Retry-After": "5"}),
+            make_response(200),
+        ],
+    )
+
+    _put_file("https://example.com", test_file, "text/plain")
+
+    assert put.call_count == 3
+    assert [c.args for c in sleep.call_args_list] == [(1,), (5,)]
+
+
+def test_put_file_retry_throttle(mocker, test_file, make_response):
+    throttle = mocker.Mock()
+    mocker.patch(
+        "csv2notion.notion_row_upload_file.requests.put",
+        side_effect=[make_response(429), make_response(200)],
+    )
+
+    _put_file("https://example.com", test_file, "text/plain", throttle)
+
+    throttle.on_throttle.assert_called_once_with(None)
+
+
+def test_put_file_retry_exhausted(mocker, test_file, make_response):
+    mocker.patch("csv2notion.notion_row_upload_file.time.sleep")
+    put = mocker.patch(
+        "csv2notion.notion_row_upload_file.requests.put",
+        return_value=make_response(503),
+    )
+
+    with pytest.raises(requests.HTTPError):
+        _put_file("https://example.com", test_file, "text/plain")
+
+    assert put.call_count == MAX_PUT_ATTEMPTS
+
+
+def test_put_file_no_retry(mocker, test_file, make_response):
+    put = mocker.patch(
+        "csv2notion.notion_row_upload_file.requests.put",
+        return_value=make_response(403),
+    )
+
+    with pytest.raises(requests.HTTPError):
+        _put_file("https://example.com", test_file, "text/plain")
+
+    assert put.call_count == 1
+
+
+def test_put_file_streamed(mocker, test_file, make_response):
+    put = mocker.patch(
+        "csv2notion.notion_row_upload_file.requests.put",
+        side_effect=lambda url, data, **kwargs: _read_body(data, make_response(200)),
+    )
+
+    _put_file("https://example.com", test_file, "text/plain")
+
+    assert put.call_args.kwargs["timeout"] == (PUT_CONNECT_TIMEOUT, PUT_STALL_TIMEOUT)
+
+
+def test_upload_body_progress(mocker, test_file, caplog):
+    mocker.patch("csv2notion.notion_row_upload_file.LARGE_FILE_SIZE", 0)
+    mocker.patch("csv2notion.notion_row_upload_file.PROGRESS_LOG_INTERVAL", 0)
+
+    with caplog.at_level(logging.DEBUG, logger="csv2notion"):
+        with FileUploadBody(test_file) as upload_body:
+            assert len(upload_body) == 4
+            assert upload_body.read(3) == b"tes"
+            assert upload_body.read(3) == b"t"
+            upload_body.log_done()
+
+    assert upload_body.sent == 4
+    assert "Uploading test.txt: 75% of 0.0 MB" in caplog.text
+    assert "Uploaded test.txt (0.0 MB) in" in caplog.text
+
+
+def _read_body(upload_body, response):
+    assert len(upload_body) == 4
+    assert upload_body.read(-1) == b"test"
+    return response
@@ -0,0 +1,129 @@
+import os
+
+from csv2notion.cli_args import parse_args
+from csv2notion.cli_steps import upload_total
+from csv2notion.csv_data import CSVData
+from csv2notion.notion_sync_state import SyncState
+from csv2notion.notion_upload_journal import UploadJournal
+from csv2notion.utils_static import ConversionRules
+
+
+def _sync(mocker, tmp_path, csv_content, column_types, *args):
+    test_file = tmp_path / "test.csv"
+    test_file.write_text(csv_content)
+
+    rules = ConversionRules.from_args(
+        parse_args(["--token", "x", "--merge", *args, str(test_file)])
+    )
+
+    db = mocker.Mock()
+    db.columns = {k: {"type": v} for k, v in column_types.items()}
+
+    csv_data = CSVData(test_file)
+
+    sync_state = SyncState(tmp_path / "sync.json")
+    sync_state.start("collection_id", csv_data, db, rules)
+
+    synced_rows = list(sync_state.skip_unchanged(csv_data, csv_data.key_column))
+    sync_state.save()
+
+    return [row["a"] for row in synced_rows]
+
+
+def test_sync_state(mocker, tmp_path):
+    column_types = {"a": "title", "b": "text"}
+
+    assert _sync(mocker, tmp_path, "a,b\na1,b1\na2,b2", column_types) == [
+        "a1",
+        "a2",
+    ]
+    assert _sync(mocker, tmp_path, "a,b\na1,b1\na2,new\na3,b3", column_types) == [
+        "a2",
+        "a3",
+    ]
+    assert _sync(mocker, tmp_path, "a,b\na1,b1\na2,new\na3,b3", column_types) == []
+
+
+def test_sync_state_duplicate_keys(mocker, tmp_path):
+    column_types = {"a": "title", "b": "text"}
+    csv_content = "a,b\na1,b1\na1,b2\na2,b3"
+
+    assert _sync(mocker, tmp_path, csv_content, column_types) == ["a1", "a1", "a2"]
+    assert _sync(mocker, tmp_path, csv_content, column_types) == ["a1", "a1"]
+
+
+def test_sync_state_settings_changed(mocker, tmp_path):
+    csv_content = "a,b\na1,b1"
+
+    assert _sync(mocker, tmp_path, csv_content, {"a": "title", "b": "text"})
+    assert _sync(mocker, tmp_path, csv_content, {"a": "title", "b": "number"})
+    assert _sync(
+        mocker,
+        tmp_path,
+        csv_content,
+        {"a": "title", "b": "number"},
+        "--merge-only-column=b",
+    )
+    assert not _sync(
+        mocker,
+        tmp_path,
+        csv_content,
+        {"a": "title", "b": "number"},
+        "--merge-only-column=b",
+    )
+
+
+def test_sync_state_file_changed(mocker, tmp_path):
+    test_file = tmp_path / "f.txt"
+    test_file.write_text("test")
+
+    column_types = {"a": "title", "b": "file"}
+
+    assert _sync(mocker, tmp_path, "a,b\na1,f.txt", column_types)
+    assert not _sync(mocker, tmp_path, "a,b\na1,f.txt", column_types)
+
+    test_file_stat = test_file.stat()
+    os.utime(test_file, ns=(test_file_stat.st_atime_ns, test_file_stat.st_mtime_ns + 1))
+
+    assert _sync(mocker, tmp_path, "a,b\na1,f.txt", column_types)
+
+
+def test_sync_state_upload_total(mocker, tmp_path):
+    column_types = {"a": "title", "b": "text"}
+
+    _sync(mocker, tmp_path, "a,b\na1,b1\na2,b2", column_types)
+
+    test_file = tmp_path / "test.csv"
+    test_file.write_text("a,b\na1,b1\na2,new\na3,b3")
+
+    db = mocker.Mock()
+    db.columns = {k: {"type": v} for k, v in column_types.items()}
+    rules = ConversionRules.from_args(
+        parse_args(["--token", "x", "--merge", str(test_file)])
+    )
+
+    csv_data = CSVData(test_file)
+
+    sync_state = SyncState(tmp_path / "sync.json")
+    sync_state.start("collection_id", csv_data, db, rules)
+
+    journal = UploadJournal(tmp_path / "test.csv.journal")
+    journal.start("collection_id")
+    journal.add([("a3", "id-a3")])
+    journal = UploadJournal(tmp_path / "test.csv.journal")
+
+    assert upload_total(csv_data, None, sync_state) == 2
+    assert upload_total(csv_data, journal, sync_state) == 1
+
+    synced_rows = list(sync_state.skip_unchanged(csv_data, csv_data.key_column))
+
+    assert [row["a"] for row in synced_rows] == ["a2", "a3"]
+    assert sync_state.skipped == 1
+
+
+def test_sync_state_corrupted(tmp_path, caplog):
+    state_file = tmp_path / "sync.json"
+    state_file.write_text("{bad")
+
+    assert not SyncState(state_file)
+    assert "corrupted" in caplog.text
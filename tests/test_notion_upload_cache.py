@@ -0,0 +1,109 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from csv2notion.notion_row_upload_file import upload_file
+from csv2notion.notion_upload_cache import UploadCache
+from csv2notion.utils_exceptions import NotionError
+
+TEST_URL = (
+    "https://prod-files-secure.s3.us-west-2.amazonaws.com"
+    "/4bd59d7b-ec44-4ba7-a0d2-41c6f7dc4b3d"
+    "/0d1e9e3a-2c8b-4e3e-8bd4-6a4a2c4c5f8d/test.gif"
+)
+
+
+def test_upload_cache_get_or_upload(mocker):
+    upload = mocker.Mock(return_value="url")
+    upload_cache = UploadCache()
+
+    assert upload_cache.get_or_upload("space", "sha", upload) == "url"
+    assert upload_cache.get_or_upload("space", "sha", upload) == "url"
+    assert upload_cache.get("space", "sha") == "url"
+    assert upload.call_count == 1
+
+
+def test_upload_cache_threads(mocker):
+    upload = mocker.Mock(return_value="url")
+    upload_cache = UploadCache()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        urls = list(
+            executor.map(
+                lambda _: upload_cache.get_or_upload("space", "sha", upload), range(50)
+            )
+        )
+
+    assert urls == ["url"] * 50
+    assert upload.call_count == 1
+
+
+def test_upload_cache_upload_error(mocker):
+    upload_cache = UploadCache()
+
+    with pytest.raises(NotionError):
+        upload_cache.get_or_upload("space", "sha", mocker.Mock(side_effect=NotionError))
+
+    assert upload_cache.get("space", "sha") is None
+
+
+def test_upload_cache_file(tmp_path, mocker):
+    cache_file = tmp_path / "cache.jsonl"
+    other_url = TEST_URL.replace("test.gif", "other.gif")
+
+    upload_cache = UploadCache(cache_file)
+    upload_cache.get_or_upload("space", "sha1", mocker.Mock(return_value=TEST_URL))
+    upload_cache.get_or_upload("space", "sha2", mocker.Mock(return_value=other_url))
+
+    with open(cache_file, "a") as f:
+        f.write("bad entry\n")
+        f.write(
+            '{"space_id": "space", "sha256": "sha3",'
+            ' "url": "https://example.com/test.gif"}\n'
+        )
+        f.write('{"space_id": "space", "sha256": "sha4", "url": null}\n')
+        f.write(f'{{"sha256": "sha5", "url": "{TEST_URL}"}}\n')
+
+    upload_cache = UploadCache(cache_file)
+
+    assert len(upload_cache) == 2
+    assert upload_cache.get("space", "sha1") == TEST_URL
+    assert upload_cache.get("space", "sha2") == other_url
+    assert upload_cache.get("space", "sha3") is None
+    assert upload_cache.get("space", "sha5") is None
+
+
+def test_upload_cache_other_space(tmp_path, mocker):
+    cache_file = tmp_path / "cache.jsonl"
+    other_url = TEST_URL.replace("test.gif", "other.gif")
+
+    upload_cache = UploadCache(cache_file)
+    upload_cache.get_or_upload("space1", "sha", mocker.Mock(return_value=TEST_URL))
+
+    upload_cache = UploadCache(cache_file)
+    upload = mocker.Mock(return_value=other_url)
+
+    assert upload_cache.get("space2", "sha") is None
+    assert upload_cache.get_or_upload("space2", "sha", upload) == other_url
+    assert upload_cache.get("space1", "sha") == TEST_URL
+    assert upload.call_count == 1
+
+
+def test_upload_file_cached(tmp_path, mocker, smallest_gif):
+    test_image = tmp_path / "test_image.gif"
+    test_image.write_bytes(smallest_gif)
+
+    block = mocker.Mock(space_info={"spaceId": "space"})
+    block._client.options = {"upload_cache": UploadCache()}
+
+    mock_upload = mocker.patch(
+        "csv2notion.notion_row_upload_file._upload_file", return_value=TEST_URL
+    )
+
+    first_url, first_meta = upload_file(block, test_image)
+    second_url, second_meta = upload_file(block, test_image)
+
+    assert first_url == second_url == TEST_URL
+    assert first_meta == second_meta
+    assert first_meta["file_id"] == "0d1e9e3a-2c8b-4e3e-8bd4-6a4a2c4c5f8d"
+    assert mock_upload.call_count == 1
@@ -0,0 +1,82 @@
+from csv2notion.notion_upload_journal import UploadJournal
+
+
+def test_upload_journal_new(tmp_path):
+    journal_file = tmp_path / "test.csv.journal"
+
+    journal = UploadJournal(journal_file)
+
+    assert journal.collection_id is None
+    assert len(journal) == 0
+    assert not journal_file.exists()
+
+
+def test_upload_journal_resume(tmp_path):
+    journal_file = tmp_path / "test.csv.journal"
+
+    journal = UploadJournal(journal_file)
+    journal.start("collection")
+    journal.add([("a", "id-a1"), ("b", "id-b")])
+    journal.add([("a", "id-a2")])
+
+    journal = UploadJournal(journal_file)
+    journal.start("collection")
+
+    rows = [{"k": "a"}, {"k": "b"}, {"k": "a"}, {"k": "a"}, {"k": "c"}]
+
+    assert journal.collection_id == "collection"
+    assert len(journal) == 3
+    assert list(journal.skip_done(rows, "k")) == [{"k": "a"}, {"k": "c"}]
+
+
+def test_upload_journal_other_collection(tmp_path, caplog):
+    journal_file = tmp_path / "test.csv.journal"
+
+    journal = UploadJournal(journal_file)
+    journal.start("collection")
+    journal.add([("a", "id-a")])
+
+    journal = UploadJournal(journal_file)
+    journal.start("other_collection")
+
+    assert len(journal) == 0
+    assert "belongs to another database" in caplog.text
+
+    journal = UploadJournal(journal_file)
+
+    assert journal.collection_id == "other_collection"
+    assert len(journal) == 0
+
+
+def test_upload_journal_bad_entries(tmp_path, caplog):
+    journal_file = tmp_path / "test.csv.journal"
+    journal_file.write_text(
+        '{"collection_id": "collection"}\n{"key": "a", "id": "id-a"}\n{"key": "b'
+    )
+
+    journal = UploadJournal(journal_file)
+
+    assert len(journal) == 1
+    assert "Skipping bad upload journal entry" in caplog.text
+
+
+def test_upload_journal_corrupted(tmp_path, caplog):
+    journal_file = tmp_path / "test.csv.journal"
+    journal_file.write_text("bad\n")
+
+    journal = UploadJournal(journal_file)
+
+    assert journal.collection_id is None
+    assert "is corrupted" in caplog.text
+
+
+def test_upload_journal_remove(tmp_path):
+    journal_file = tmp_path / "test.csv.journal"
+
+    journal = UploadJournal(journal_file)
+    journal.start("collection")
+    journal.remove()
+
+    assert not journal_file.exists()
+
+    journal.remove()
@@ -0,0 +1,111 @@
+import threading
+
+from csv2notion.notion_upload_pool import FileUploadPool
+
+
+def _make_files(tmp_path, sizes):
+    test_files = []
+
+    for i, size in enumerate(sizes):
+        test_file = tmp_path / f"{i}.txt"
+        test_file.write_bytes(b"x" * size)
+        test_files.append(test_file)
+
+    return test_files
+
+
+def test_upload_pool_prefetch(tmp_path, mocker):
+    upload_file = mocker.patch(
+        "csv2notion.notion_upload_pool.upload_file",
+        side_effect=lambda block, file_path: (file_path.name, {}),
+    )
+    block = mocker.Mock(id="block")
+    test_files = _make_files(tmp_path, [1, 2])
+
+    upload_pool = FileUploadPool(max_workers=2)
+    upload_pool.prefetch(block, test_files + test_files)
+
+    assert upload_pool.upload(block, test_files[0]) == ("0.txt", {})
+    assert upload_pool.upload(block, test_files[1]) == ("1.txt", {})
+    assert upload_file.call_count == 2
+
+
+def test_upload_pool_not_prefetched(tmp_path, mocker):
+    upload_file = mocker.patch(
+        "csv2notion.notion_upload_pool.upload_file", return_value=("url", {})
+    )
+    block = mocker.Mock(id="block")
+    test_file = _make_files(tmp_path, [1])[0]
+
+    upload_pool = FileUploadPool(max_workers=2)
+
+    assert upload_pool.upload(block, test_file) == ("url", {})
+    upload_file.assert_called_once_with(block, test_file)
+
+
+def test_upload_pool_max_in_flight_bytes(tmp_path, mocker):
+    lock = threading.Lock()
+    in_flight = []
+    max_in_flight = []
+
+    def upload_file(block, file_path):
+        with lock:
+            in_flight.append(file_path.stat().st_size)
+            max_in_flight.append(sum(in_flight))
+
+        threading.Event().wait(0.02)
+
+        with lock:
+            in_flight.remove(file_path.stat().st_size)
+
+        return "url", {}
+
+    mocker.patch("csv2notion.notion_upload_pool.upload_file", upload_file)
+    block = mocker.Mock(id="block")
+    test_files = _make_files(tmp_path, [60, 50, 30, 20, 10, 10])
+
+    upload_pool = FileUploadPool(max_workers=6, max_in_flight_bytes=80)
+    upload_pool.prefetch(block, test_files)
+
+    for test_file in test_files:
+        upload_pool.upload(block, test_file)
+
+    assert max(max_in_flight) <= 80
+
+
+def test_upload_pool_file_over_limit(tmp_path, mocker):
+    mocker.patch("csv2notion.notion_upload_pool.upload_file", return_value=("url", {}))
+    block = mocker.Mock(id="block")
+    test_file = _make_files(tmp_path, [100])[0]
+
+    upload_pool = FileUploadPool(max_workers=1, max_in_flight_bytes=10)
+    upload_pool.prefetch(block, [test_file])
+
+    assert upload_pool.upload(block, test_file) == ("url", {})
+
+
+def test_upload_pool_release(tmp_path, mocker):
+    started = threading.Event()
+    finish = threading.Event()
+
+    def upload_file(block, file_path):
+        started.set()
+        finish.wait()
+        return "url", {}
+
+    upload_file = mocker.patch(
+        "csv2notion.notion_upload_pool.upload_file", side_effect=upload_file
+    )
+    block = mocker.Mock(id="block")
+    test_files = _make_files(tmp_path, [1, 2])
+
+    upload_pool = FileUploadPool(max_workers=1)
+    upload_pool.prefetch(block, test_files)
+
+    started.wait()
+    upload_pool.release(block)
+    finish.set()
+    upload_pool._executor.shutdown(wait=True)
+
+    assert not upload_pool._futures
+    assert upload_file.call_count == 1
@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from csv2notion.notion_uploader import NotionRowUploader, NotionUploadRow
+
+
+def _row(key, properties=None, **columns):
+    return NotionUploadRow(columns={"a": key, **columns}, properties=properties or {})
+
+
+def test_upload_row_has_files():
+    assert not _row("a").has_files()
+    assert not _row("a", {"icon": "https://example.com/icon.png"}).has_files()
+    assert _row("a", {"icon": Path("icon.png")}).has_files()
+    assert _row("a", b=["https://example.com/a.txt", Path("b.txt")]).has_files()
+
+
+def test_upload_rows_split_batch(mocker):
+    db = mocker.Mock(rows={"existing": mocker.Mock()})
+    uploader = NotionRowUploader(db)
+
+    rows = [
+        _row("new"),
+        _row("existing"),
+        _row("new"),
+        _row("file", {"cover": Path("cover.png")}),
+        _row("other"),
+    ]
+
+    batch_rows, single_rows = uploader._split_batch(rows, is_merge=True)
+
+    assert [r.key() for r in batch_rows] == ["new", "other"]
+    assert [r.key() for r in single_rows] == ["existing", "new", "file"]
+
+
+def test_upload_rows_split_batch_no_merge(mocker):
+    db = mocker.Mock(rows={"existing": mocker.Mock()})
+    uploader = NotionRowUploader(db)
+
+    rows = [_row("new"), _row("existing"), _row("new")]
+
+    batch_rows, single_rows = uploader._split_batch(rows, is_merge=False)
+
+    assert [r.key() for r in batch_rows] == ["new", "existing", "new"]
+    assert single_rows == []
+
+
+def test_upload_rows_order(mocker):
+    db = mocker.MagicMock(rows={"existing": mocker.Mock(id="id-existing")})
+    db.add_row.side_effect = lambda columns, **kwargs: mocker.Mock(
+        id=f"id-{columns['a']}"
+    )
+    uploader = NotionRowUploader(db)
+
+    rows = [_row("new"), _row("existing"), _row("other")]
+
+    db_rows = uploader.upload_rows(rows, is_merge=True)
+
+    assert [r.id for r in db_rows] == ["id-new", "id-existing", "id-other"]
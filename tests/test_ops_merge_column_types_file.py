@@ -3,7 +3,7 @@ import re
 import pytest
 
 from csv2notion.cli import cli
-from csv2notion.notion_row_upload_file import get_file_id
+from csv2notion.utils_str import get_file_id
 
 
 @pytest.mark.vcr()
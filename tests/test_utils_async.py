@@ -0,0 +1,132 @@
+import time
+from contextlib import contextmanager
+from itertools import count
+from pathlib import Path
+
+import pytest
+
+from csv2notion.notion_uploader import NotionUploadRow
+from csv2notion.utils_async import AsyncRowUploader
+
+
+class FakeClient(object):
+    def __init__(self):
+        self.sent = []
+        self._transactions = None
+
+    @contextmanager
+    def defer_transactions(self):
+        self._transactions = []
+        yield self._transactions
+        self._transactions = None
+
+    def post(self, endpoint, data):
+        operations = data["operations"]
+        time.sleep(0.05 if operations[0]["id"] == "slow" else 0)
+        self.sent.extend((op["id"], op["args"]) for op in operations)
+
+
+def _operation(record_id, args, table="block", command="set"):
+    return {"table": table, "id": record_id, "args": args, "command": command}
+
+
+@pytest.fixture()
+def offline_uploader(mocker):
+    client = FakeClient()
+    row_ids = count()
+
+    def upload_row(row, is_merge):
+        row_id = next(row_ids)
+        client._transactions.append([_operation(row.key(), row_id)])
+        return mocker.Mock(id=row_id)
+
+    uploader = AsyncRowUploader.__new__(AsyncRowUploader)
+    uploader.client = client
+    uploader.uploader = mocker.Mock(upload_row=upload_row)
+    uploader.thread_uploader = mocker.Mock()
+    uploader.thread_uploader.worker.side_effect = lambda rows, is_merge: len(rows)
+    uploader.max_in_flight = 4
+    uploader.journal = mocker.Mock()
+    uploader.throttle = None
+    uploader._key_tasks = {}
+    uploader._shared_task = None
+
+    return uploader
+
+
+def _row(key, properties=None):
+    return NotionUploadRow(columns={"a": key}, properties=properties or {})
+
+
+def test_async_uploader(offline_uploader):
+    uploaded = []
+    tasks = [[_row("slow")], [_row("b")], [_row("slow")], [_row("c")]]
+
+    offline_uploader.upload(tasks, is_merge=True, on_uploaded=uploaded.append)
+
+    sent = offline_uploader.client.sent
+
+    assert uploaded == [1, 1, 1, 1]
+    assert len(sent) == 4
+    assert [s for s in sent if s[0] == "slow"] == [("slow", 0), ("slow", 2)]
+    assert sent[-1] == ("slow", 2)
+    assert offline_uploader.journal.add.call_count == 4
+
+
+def test_async_uploader_thread_rows(offline_uploader):
+    uploaded = []
+    tasks = [
+        [_row("a", {"icon": Path("icon.png")})],
+        [_row("b", {"cover_block": "https://example.com/cover.png"})],
+        [_row("c")],
+    ]
+
+    offline_uploader.upload(tasks, is_merge=False, on_uploaded=uploaded.append)
+
+    assert uploaded == [1, 1, 1]
+    assert offline_uploader.thread_uploader.worker.call_count == 2
+    assert offline_uploader.client.sent == [("c", 0)]
+
+
+def test_async_uploader_error(offline_uploader):
+    offline_uploader.uploader.upload_row = lambda row, is_merge: 1 / 0
+
+    with pytest.raises(ZeroDivisionError):
+        offline_uploader.upload([[_row("a")]], is_merge=False, on_uploaded=print)
+
+
+def _upload_view_rows(offline_uploader, mocker, command):
+    client = offline_uploader.client
+    row_ids = count()
+
+    def upload_row(row, is_merge):
+        row_id = next(row_ids)
+        client._transactions.append(
+            [
+                _operation(row.key(), row_id),
+                _operation("view", row_id, table="collection_view", command=command),
+            ]
+        )
+        return mocker.Mock(id=row_id)
+
+    offline_uploader.uploader.upload_row = upload_row
+
+    tasks = [[_row("slow")], [_row("b")], [_row("c")]]
+    offline_uploader.upload(tasks, is_merge=False, on_uploaded=print)
+
+    return [s for s in client.sent if s[0] == "view"]
+
+
+def test_async_uploader_shared_records(offline_uploader, mocker):
+    assert _upload_view_rows(offline_uploader, mocker, "set") == [
+        ("view", 0),
+        ("view", 1),
+        ("view", 2),
+    ]
+
+
+def test_async_uploader_shared_records_append(offline_uploader, mocker):
+    # appending to a list does not wait for slow transaction
+    view_ops = _upload_view_rows(offline_uploader, mocker, "listAfter")
+
+    assert view_ops[-1] == ("view", 0)
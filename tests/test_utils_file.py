@@ -0,0 +1,84 @@
+import hashlib
+
+from csv2notion import utils_file
+from csv2notion.utils_file import FileHashCache, compute_file_sha256
+
+
+def _sha256(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def test_compute_file_sha256(tmp_path):
+    test_file = tmp_path / "test.bin"
+    test_file.write_bytes(b"test" * 1000)
+
+    assert compute_file_sha256(test_file) == _sha256(b"test" * 1000)
+
+
+def test_compute_file_sha256_mmap(tmp_path, mocker):
+    mocker.patch.object(utils_file, "HASH_MMAP_MIN_SIZE", 10)
+
+    test_file = tmp_path / "test.bin"
+    test_file.write_bytes(b"test" * 1000)
+
+    assert compute_file_sha256(test_file) == _sha256(b"test" * 1000)
+
+
+def test_compute_file_sha256_empty(tmp_path, mocker):
+    mocker.patch.object(utils_file, "HASH_MMAP_MIN_SIZE", 0)
+
+    test_file = tmp_path / "test.bin"
+    test_file.write_bytes(b"")
+
+    assert compute_file_sha256(test_file) == _sha256(b"")
+
+
+def test_file_hash_cache(tmp_path, mocker):
+    test_file = tmp_path / "test.bin"
+    test_file.write_bytes(b"test")
+
+    compute_spy = mocker.spy(utils_file, "compute_file_sha256")
+    hash_cache = FileHashCache()
+
+    assert hash_cache.get_sha256(test_file) == _sha256(b"test")
+    assert hash_cache.get_sha256(test_file) == _sha256(b"test")
+    assert compute_spy.call_count == 1
+
+    test_file.write_bytes(b"modified")
+
+    assert hash_cache.get_sha256(test_file) == _sha256(b"modified")
+    assert compute_spy.call_count == 2
+
+
+def test_file_hash_cache_persist(tmp_path, mocker):
+    test_file = tmp_path / "test.bin"
+    test_file.write_bytes(b"test")
+    cache_file = tmp_path / "hashes.json"
+
+    hash_cache = FileHashCache()
+    hash_cache.get_sha256(test_file)
+    hash_cache.save(cache_file)
+
+    compute_spy = mocker.spy(utils_file, "compute_file_sha256")
+
+    hash_cache = FileHashCache()
+    hash_cache.load(cache_file)
+
+    assert len(hash_cache) == 1
+    assert hash_cache.get_sha256(test_file) == _sha256(b"test")
+    assert compute_spy.call_count == 0
+
+
+def test_file_hash_cache_load_bad(tmp_path):
+    cache_file = tmp_path / "hashes.json"
+    hash_cache = FileHashCache()
+
+    hash_cache.load(cache_file)
+
+    cache_file.write_text("not json")
+    hash_cache.load(cache_file)
+
+    cache_file.write_text('[["path", 1]]')
+    hash_cache.load(cache_file)
+
+    assert len(hash_cache) == 0
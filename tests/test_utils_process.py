@@ -0,0 +1,89 @@
+import queue
+import threading
+
+import pytest
+
+from csv2notion.utils_process import Shard, key_shard, process_shards
+
+TEST_ROWS = [{"key": f"k{i % 10}", "value": str(i)} for i in range(50)]
+
+
+def _upload_shard(shard):
+    rows = list(shard.filter_rows(TEST_ROWS, "key"))
+    shard.report(len(rows))
+    return shard.index, [row["value"] for row in rows]
+
+
+def _fail_shard(shard):
+    if shard.index == 1:
+        raise ValueError("shard failed")
+    return shard.index
+
+
+def test_key_shard():
+    shards = {key_shard(f"k{i}", 4) for i in range(100)}
+
+    assert shards == {0, 1, 2, 3}
+    assert key_shard("k1", 4) == key_shard("k1", 4)
+
+
+def test_shard_filter_rows():
+    shards = [Shard(i, 3, queue.Queue(), threading.Event()) for i in range(3)]
+
+    sharded_rows = [list(s.filter_rows(TEST_ROWS, "key")) for s in shards]
+
+    assert sorted(r["value"] for rows in sharded_rows for r in rows) == sorted(
+        r["value"] for r in TEST_ROWS
+    )
+    for shard, rows in zip(shards, sharded_rows):
+        assert all(shard.owns(r["key"]) for r in rows)
+        # rows of the same shard keep CSV order
+        assert [int(r["value"]) for r in rows] == sorted(int(r["value"]) for r in rows)
+
+
+def test_shard_stop():
+    stop_event = threading.Event()
+    shard = Shard(0, 1, queue.Queue(), stop_event)
+    rows = shard.filter_rows(TEST_ROWS, "key")
+
+    next(rows)
+    stop_event.set()
+    next(rows)
+    shard.report(2)
+
+    assert list(rows) == []
+
+
+def test_shard_until_stopped():
+    stop_event = threading.Event()
+    shard = Shard(0, 1, queue.Queue(), stop_event)
+    rows = shard.until_stopped(TEST_ROWS)
+
+    next(rows)
+    stop_event.set()
+    next(rows)
+    shard.report(2)
+
+    assert list(rows) == []
+
+    # stop is also checked before the first item
+    assert list(shard.until_stopped(TEST_ROWS)) == []
+
+
+def test_process_shards():
+    progress = []
+
+    shard_results = process_shards(_upload_shard, 3, on_progress=progress.append)
+
+    assert [index for index, _ in shard_results] == [0, 1, 2]
+    assert sum(progress) == len(TEST_ROWS)
+    assert sorted(v for _, values in shard_results for v in values) == sorted(
+        r["value"] for r in TEST_ROWS
+    )
+
+
+def test_process_shards_error():
+    with pytest.raises(ValueError) as e:
+        process_shards(_fail_shard, 2, on_progress=lambda _: None)
+
+    assert "shard failed" in str(e.value)
@@ -0,0 +1,116 @@
+import time
+
+import pytest
+
+from csv2notion.utils_threading import (
+    TASKS_PER_WORKER,
+    chunk_iter,
+    prefetch_iter,
+    process_iter,
+)
+from csv2notion.utils_throttle import AdaptiveThrottle
+
+
+def test_prefetch_iter():
+    assert list(prefetch_iter(range(100), max_size=3)) == list(range(100))
+
+
+def test_prefetch_iter_empty():
+    assert list(prefetch_iter([], max_size=3)) == []
+
+
+def test_prefetch_iter_producer_error():
+    def producer():
+        yield 1
+        raise ValueError("producer failed")
+
+    prefetched = prefetch_iter(producer(), max_size=3)
+
+    assert next(prefetched) == 1
+    with pytest.raises(ValueError) as e:
+        next(prefetched)
+
+    assert "producer failed" in str(e.value)
+
+
+def test_prefetch_iter_bounded():
+    produced = []
+
+    def producer():
+        for i in range(100):
+            produced.append(i)
+            yield i
+
+    prefetched = prefetch_iter(producer(), max_size=2)
+
+    assert next(prefetched) == 0
+
+    prefetched.close()
+
+    # 1 consumed, 2 buffered, 1 waiting to be put into buffer
+    assert len(produced) <= 4
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_process_iter(max_workers):
+    processed = []
+
+    results = list(process_iter(processed.append, range(100), max_workers))
+
+    assert results == [None] * 100
+    assert sorted(processed) == list(range(100))
+
+
+def test_process_iter_bounded():
+    submitted = []
+    processed = []
+    max_in_flight = []
+
+    def tasks():
+        for i in range(100):
+            submitted.append(i)
+            max_in_flight.append(len(submitted) - len(processed))
+            yield i
+
+    def worker(task):
+        time.sleep(0.001)
+        processed.append(task)
+
+    list(process_iter(worker, tasks(), max_workers=4))
+
+    assert sorted(processed) == list(range(100))
+    assert max(max_in_flight) <= 4 * TASKS_PER_WORKER
+
+
+def test_process_iter_worker_error():
+    def worker(task):
+        if task == 5:
+            raise ValueError("worker failed")
+
+    with pytest.raises(ValueError) as e:
+        list(process_iter(worker, range(10), max_workers=4))
+
+    assert "worker failed" in str(e.value)
+
+
+def test_chunk_iter():
+    assert list(chunk_iter(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(chunk_iter([], 2)) == []
+
+
+def test_process_iter_throttled():
+    throttle = AdaptiveThrottle(max_limit=4)
+    running = []
+    max_running = []
+
+    def worker(task):
+        running.append(task)
+        max_running.append(len(running))
+        time.sleep(0.001)
+        running.remove(task)
+        return task
+
+    results = list(process_iter(worker, range(50), max_workers=4, throttle=throttle))
+
+    assert sorted(results) == list(range(50))
+    assert max(max_running) <= 4
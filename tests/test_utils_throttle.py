@@ -0,0 +1,94 @@
+import itertools
+
+import pytest
+
+from csv2notion.utils_throttle import (
+    MAX_BACKOFF,
+    AdaptiveThrottle,
+    backoff_delay,
+    get_retry_after,
+)
+
+
+def test_throttle_grows(mocker):
+    # one task finishes every second, so throughput grows with concurrency
+    mocker.patch(
+        "csv2notion.utils_throttle.time.monotonic", side_effect=itertools.count()
+    )
+
+    throttle = AdaptiveThrottle(max_limit=3)
+
+    assert throttle.limit == 1
+
+    for _ in range(10):
+        throttle.on_success()
+
+    assert throttle.limit == 3
+
+
+def test_throttle_shrinks_on_slowdown(mocker):
+    monotonic = mocker.patch("csv2notion.utils_throttle.time.monotonic")
+    monotonic.return_value = 0
+
+    throttle = AdaptiveThrottle(max_limit=10)
+    throttle.limit = 2
+
+    monotonic.return_value = 1
+    throttle.on_success()
+    throttle.on_success()
+
+    assert throttle.limit == 3
+
+    monotonic.return_value = 10
+    for _ in range(3):
+        throttle.on_success()
+
+    assert throttle.limit == 2
+
+
+def test_throttle_shrinks(mocker):
+    mocker.patch("csv2notion.utils_throttle.time.monotonic", return_value=100.0)
+
+    throttle = AdaptiveThrottle(max_limit=10)
+    throttle.limit = 8
+
+    throttle.on_throttle(retry_after=5)
+    throttle.on_throttle(retry_after=5)
+
+    assert throttle.limit == 4
+    assert throttle._pause_until == 105.0
+
+
+def test_throttle_wait(mocker):
+    mocker.patch("csv2notion.utils_throttle.time.monotonic", return_value=100.0)
+    sleep = mocker.patch("csv2notion.utils_throttle.time.sleep")
+
+    throttle = AdaptiveThrottle(max_limit=10)
+
+    throttle.wait()
+    sleep.assert_not_called()
+
+    throttle.on_throttle(retry_after=2)
+    throttle.wait()
+    sleep.assert_called_once_with(2.0)
+
+
+@pytest.mark.parametrize(
+    "headers,result",
+    [
+        ({}, None),
+        ({"Retry-After": "3"}, 3.0),
+        ({"Retry-After": "-1"}, 0),
+        ({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0),
+        ({"Retry-After": "bad"}, None),
+    ],
+)
+def test_get_retry_after(make_response, headers, result):
+    assert get_retry_after(make_response(429, **headers)) == result
+
+
+def test_backoff_delay():
+    assert backoff_delay(0) == 1
+    assert backoff_delay(2) == 4
+    assert backoff_delay(1000) == MAX_BACKOFF
+    assert backoff_delay(0, retry_after=7) == 7